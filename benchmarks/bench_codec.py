@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Compare the JSON codecs on large container payloads.
+
+Usage:
+    python benchmarks/bench_codec.py [--records 20000] [--repeat 5]
+
+Times the decoding of a `containers/fetch` body embedding a large `resultObject`,
+of an `agents/fetch-all` body and the encoding of launch payloads, for every
+codec installed.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pbuster.codec import CODECS, get_codec  # noqa: E402
+
+
+def container_body(records):
+    result = [{'profileUrl': f'https://www.linkedin.com/in/user-{i}', 'name': f'User {i}',
+               'company': 'ACME', 'connections': i % 500, 'tags': ['a', 'b'], 'timestamp': '2026-01-01T00:00:00Z'}
+              for i in range(records)]
+    return json.dumps({'id': '123', 'status': 'finished', 'exitCode': 0, 'output': 'line\n' * 1000,
+                       'resultObject': json.dumps(result)}).encode()
+
+
+def agents_body(agents):
+    return json.dumps([{'id': str(i), 'name': f'agent {i}', 'scriptId': '3112', 'updatedAt': 1700000000000,
+                        'argument': json.dumps({'spreadsheetUrl': 'https://docs.google.com/x', 'numberOfProfiles': 10})}
+                       for i in range(agents)]).encode()
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000, help='Records in the result object.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measure; the best one is kept.')
+    args = parser.parse_args()
+
+    container = container_body(args.records)
+    agents = agents_body(args.records // 10)
+    launch = {'id': '123', 'arguments': {'sessionCookie': 'x' * 200, 'spreadsheetUrl': 'https://docs.google.com/x'}}
+
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f'{name:8} not installed')
+
+    print(f'container body: {len(container) / 1e6:.1f} MB, agents body: {len(agents) / 1e6:.1f} MB\n')
+    print(f"{'codec':8} {'container+result':>18} {'agents+argument':>18} {'1k launch dumps':>18}")
+    results = {}
+    for codec in codecs:
+        def decode_container():
+            body = codec.loads(container)
+            codec.loads(body['resultObject'])
+
+        def decode_agents():
+            for agent in codec.loads(agents):
+                codec.loads(agent['argument'])
+
+        def encode_launches():
+            for _ in range(1000):
+                codec.dumps(launch)
+
+        results[codec.name] = [timeit(fn, args.repeat) for fn in (decode_container, decode_agents, encode_launches)]
+        print(f'{codec.name:8} ' + ' '.join(f'{t * 1000:15.1f} ms' for t in results[codec.name]))
+
+    default = get_codec().name
+    if default != 'json':
+        speedups = ', '.join(f'{ref / t:.1f}x' for ref, t in zip(results['json'], results[default]))
+        print(f'\ndefault codec: {default} ({speedups} faster than json)')
+    else:
+        print('\ndefault codec: json (install orjson or ujson for faster decoding)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Measure the startup time of the CLI and fail when it regresses.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--max-ms 250] [--top 10]
+
+Runs `python -m pbuster.cli --help` in fresh interpreters and reports the median wall time,
+then lists the slowest imports reported by `python -X importtime`. Exits with
+status 1 when the median exceeds `--max-ms`, or when a heavy module (the API
+client, requests, rich, dotenv) is imported just to print the help. Run it
+before every release.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CLI = ['-m', 'pbuster.cli']
+
+# Modules that only commands needing them may import
+LAZY_MODULES = ('pbuster.phantombuster', 'requests', 'rich', 'dotenv', 'httpx')
+
+
+def run(args, env):
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True)
+    return time.perf_counter() - started, proc
+
+
+def import_times(env):
+    """Return `(cumulative_us, module)` of every top-level import of `pbuster.cli --help`."""
+    _, proc = run(['-X', 'importtime'] + CLI + ['--help'], env)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        imports.append((int(cumulative), name))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Interpreter runs to time.')
+    parser.add_argument('--max-ms', type=float, default=250, help='Maximum median startup time, in milliseconds.')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list.')
+    args = parser.parse_args()
+
+    # No API key: `--help` must not need one
+    env = {key: value for key, value in os.environ.items() if key != 'PHANTOMBUSTER_API_KEY'}
+
+    baseline = statistics.median(run(['-c', 'pass'], env)[0] for _ in range(args.runs)) * 1000
+    times = []
+    for _ in range(args.runs):
+        elapsed, proc = run(CLI + ['--help'], env)
+        if proc.returncode != 0:
+            print(proc.stderr)
+            sys.exit(f'pbuster.cli --help failed with status {proc.returncode}')
+        times.append(elapsed * 1000)
+    median = statistics.median(times)
+
+    imports = import_times(env)
+    print(f'pbuster.cli --help: median {median:.0f} ms over {args.runs} runs '
+          f'(bare interpreter {baseline:.0f} ms, CLI overhead {median - baseline:.0f} ms)\n')
+    print('slowest imports (cumulative):')
+    for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+        print(f'  {cumulative / 1000:8.1f} ms  {name.strip()}')
+
+    eager = sorted({name.strip() for _, name in imports if name.strip().split('.')[0] in LAZY_MODULES
+                    or name.strip() in LAZY_MODULES})
+    failed = False
+    if eager:
+        print(f'\nFAIL: imported by --help: {", ".join(eager)}')
+        failed = True
+    if median > args.max_ms:
+        print(f'\nFAIL: median startup {median:.0f} ms > {args.max_ms:.0f} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the client against a local stand-in of the API and record the results.
+
+Usage:
+    python benchmarks/run.py [--scenarios launch wait webhook results cli] [--latency 0.02]
+                             [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+
+Every scenario runs in a fresh interpreter against a fresh `standin.StandIn`
+server, so that its peak RSS is its own. Measures, per scenario:
+
+    launch    `Agent.launch` latency, one launch after the other
+    wait      `Container.as_completed` (behind `wait` and `wait_many`) over launched containers,
+              with the polls per completed container
+    webhook   the wait scenario with a `WebhookReceiver` attached to the client, the stand-in
+              posting the webhooks of finished containers (`--webhook-loss` of them dropped)
+    results   `Container.results` and `Container.iter_results` latency on finished containers
+    cli       `agent list`, `container list` and `script list` CLI commands, in fresh processes
+
+and reports requests/s (as counted by the server), p50/p99 latency in
+milliseconds and peak RSS in KiB. Results are written as JSON to
+`benchmarks/results/<version>-<timestamp>.json` unless `--output` is set.
+With `--compare`, exits with status 1 when a metric regressed by more than
+`--tolerance` against a previous results file.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import resource
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.standin import StandIn, StandInConfig  # noqa: E402
+
+SCENARIOS = ('launch', 'wait', 'webhook', 'results', 'cli')
+
+# Metrics compared by `--compare`, with the direction of an improvement
+HIGHER_IS_BETTER = {'requests_per_second': True, 'p50_ms': False, 'p99_ms': False,
+                    'peak_rss_kib': False, 'polls_per_container': False}
+
+LAUNCH_ARGUMENTS = {'spreadsheetUrl': 'https://docs.google.com/spreadsheets/d/x', 'sessionCookie': 'x' * 200}
+
+# Runs the CLI with its client pointed at the stand-in: `python -c CLI_BOOTSTRAP URL ARGS...`
+CLI_BOOTSTRAP = ("import sys; sys.path.insert(0, {root!r}); "
+                 "from pbuster.phantombuster import PhantomBuster; PhantomBuster.BASE_URL = sys.argv.pop(1); "
+                 "from pbuster import cli; cli.cli(prog_name='pbuster')")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of values, None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))]
+
+
+def max_rss_kib(usage):
+    """Peak RSS of a `resource.struct_rusage`, in KiB (macOS reports bytes)."""
+    return usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+
+
+def free_port():
+    """A local TCP port nothing listens on, for the webhook receiver of a worker."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def version():
+    """Version of the source tree, with the git commit when available."""
+    with open(os.path.join(ROOT, 'VERSION')) as f:
+        ver = f.read().strip()
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return f'{ver}+{commit}' if commit else ver
+
+
+# -------------------------- workers (child processes) --------------------------
+
+def _client(url, params, **kwargs):
+    from pbuster.phantombuster import PhantomBuster
+    PhantomBuster.BASE_URL = url
+    return PhantomBuster(api_key='benchmark', transport=params['transport'], **kwargs)
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def work_launch(url, params):
+    pb = _client(url, params)
+    agent_ids = [str(i % params['agents']) for i in range(params['launches'])]
+    latencies = []
+    for agent_id in agent_ids:
+        latencies.append(_timed(pb.agent.launch, agent_id, LAUNCH_ARGUMENTS)[1])
+    return {'operations': len(latencies), 'latencies': latencies}
+
+
+def work_wait(url, params, webhook=None):
+    from pbuster.polling import Backoff
+    pb = _client(url, params, webhook=webhook)
+    launched = pb.agent.launch_many([(str(i % params['agents']), LAUNCH_ARGUMENTS) for i in range(params['containers'])])
+    container_ids = [item['container_id'] for item in launched if item['error'] is None]
+    polling = Backoff(min_interval=params['poll_interval'], max_interval=params['poll_interval'] * 8)
+    latencies = []
+    started = time.perf_counter()
+    for _ in pb.container.as_completed(container_ids, polling=polling, timeout=params['timeout']):
+        latencies.append((time.perf_counter() - started) * 1000)
+    stats = pb.container.poll_stats
+    return {'operations': len(latencies), 'latencies': latencies, 'completed': len(latencies),
+            'client_polls_per_container': stats['polls'] / stats['waits'] if stats['waits'] else None}
+
+
+def work_webhook(url, params):
+    from pbuster.webhook import WebhookReceiver
+    with WebhookReceiver(port=params['webhook_port']) as receiver:
+        result = work_wait(url, params, webhook=receiver)
+        result['webhooks_received'] = receiver.stats['received']
+    return result
+
+
+def work_results(url, params):
+    pb = _client(url, params)
+    container_ids = [f'{i % params["agents"]}-{i}' for i in range(params['fetches'])]
+    latencies, streamed, records = [], [], 0
+    for container_id in container_ids:
+        latencies.append(_timed(pb.container.results, container_id)[1])
+    for container_id in container_ids:
+        started = time.perf_counter()
+        records += sum(1 for _ in pb.container.iter_results(container_id))
+        streamed.append((time.perf_counter() - started) * 1000)
+    return {'operations': len(latencies) + len(streamed), 'latencies': latencies, 'records': records,
+            'iter_results_p50_ms': percentile(streamed, 50), 'iter_results_p99_ms': percentile(streamed, 99)}
+
+
+def work_cli(url, params):
+    commands = {
+        'agent list --output ndjson': ['agent', 'list', '--output', 'ndjson'],
+        'agent list (table)': ['agent', 'list'],
+        'container list --output ndjson': ['container', 'list', '0', '--limit', str(params['list_limit']), '--output', 'ndjson'],
+        'script list --output ndjson': ['script', 'list', '--output', 'ndjson'],
+    }
+    env = dict(os.environ, PHANTOMBUSTER_API_KEY='benchmark', PHANTOMBUSTER_TRANSPORT=params['transport'], COLUMNS='200')
+    env.pop('PHANTOMBUSTER_OFFLINE', None)
+    bootstrap = CLI_BOOTSTRAP.format(root=ROOT)
+    latencies, per_command, peak_rss = [], {}, 0
+    for name, args in commands.items():
+        times = []
+        for _ in range(params['cli_runs']):
+            started = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, '-c', bootstrap, url] + args, cwd=ROOT, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            out, err = proc.communicate()
+            elapsed = (time.perf_counter() - started) * 1000
+            if proc.returncode != 0:
+                raise RuntimeError(f'pbuster {" ".join(args)} failed: {err.decode()[-500:]}')
+            times.append(elapsed)
+            peak_rss = max(peak_rss, max_rss_kib(resource.getrusage(resource.RUSAGE_CHILDREN)))
+        per_command[name] = {'p50_ms': percentile(times, 50), 'p99_ms': percentile(times, 99), 'bytes': len(out)}
+        latencies += times
+    return {'operations': len(latencies), 'latencies': latencies, 'commands': per_command, 'peak_rss_kib': peak_rss}
+
+
+WORKERS = {'launch': work_launch, 'wait': work_wait, 'webhook': work_webhook, 'results': work_results, 'cli': work_cli}
+
+
+def worker(name, url, params):
+    started = time.perf_counter()
+    result = WORKERS[name](url, params)
+    result['seconds'] = time.perf_counter() - started
+    result['self_rss_kib'] = max_rss_kib(resource.getrusage(resource.RUSAGE_SELF))
+    json.dump(result, sys.stdout)
+
+
+# -------------------------- runner (parent process) --------------------------
+
+def run_scenario(name, config, params):
+    """Run a scenario in a child process against a fresh stand-in and summarize it."""
+    if name == 'webhook':
+        params = dict(params, webhook_port=free_port())
+        config = StandInConfig(**dict(vars(config), webhook_url=f"http://127.0.0.1:{params['webhook_port']}/"))
+    with StandIn(config) as server:
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', name,
+                                 '--url', server.url, '--params', json.dumps(params)],
+                                cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = proc.communicate()
+        requests = dict(server.requests)
+    if proc.returncode != 0:
+        raise RuntimeError(f'{name} scenario failed:\n{err.decode()}')
+    raw = json.loads(out)
+    latencies = raw.pop('latencies')
+    total = sum(requests.values())
+    summary = {
+        'operations': raw.pop('operations'),
+        'seconds': round(raw['seconds'], 3),
+        'requests': total,
+        'requests_per_second': round(total / raw.pop('seconds'), 1),
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        # CLI commands run in their own processes: the peak is the one of the largest
+        'peak_rss_kib': raw.pop('peak_rss_kib', None) or raw['self_rss_kib'],
+        'requests_by_route': requests,
+    }
+    raw.pop('self_rss_kib')
+    if name in ('wait', 'webhook'):
+        completed = raw.pop('completed')
+        summary['polls_per_container'] = round(requests.get('containers/fetch', 0) / completed, 2) if completed else None
+    summary.update(raw)
+    return summary
+
+
+def compare(results, baseline, tolerance):
+    """List the metrics of `results` that regressed by more than `tolerance` against `baseline`."""
+    regressions = []
+    for name, scenario in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            old, new = previous.get(metric), scenario.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f'{name}.{metric}: {old} -> {new} ({change:+.0%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds the stand-in adds to every response.')
+    parser.add_argument('--agents', type=int, default=50, help='Agents of the stand-in organization.')
+    parser.add_argument('--launches', type=int, default=200, help='Launches of the launch scenario.')
+    parser.add_argument('--containers', type=int, default=100, help='Containers waited for by the wait scenario.')
+    parser.add_argument('--run-seconds', type=float, default=2.0, help='Seconds a launched container runs.')
+    parser.add_argument('--poll-interval', type=float, default=0.25, help='First delay between polls of the wait scenario.')
+    parser.add_argument('--webhook-loss', type=float, default=0.0, help='Fraction of webhooks the stand-in drops.')
+    parser.add_argument('--fetches', type=int, default=20, help='Result objects fetched by the results scenario.')
+    parser.add_argument('--result-records', type=int, default=5000, help='Records in every result object.')
+    parser.add_argument('--cli-runs', type=int, default=5, help='Runs of every CLI command.')
+    parser.add_argument('--transport', default='requests', help='HTTP transport of the client (see pbuster.transport).')
+    parser.add_argument('--output', help='Results file. benchmarks/results/<version>-<timestamp>.json if not set.')
+    parser.add_argument('--compare', help='Previous results file to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Relative change tolerated by --compare.')
+    parser.add_argument('--worker', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--params', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.url, json.loads(args.params))
+
+    config = StandInConfig(latency=args.latency, agents=args.agents, result_records=args.result_records,
+                           run_seconds=args.run_seconds, webhook_loss=args.webhook_loss)
+    params = {'agents': args.agents, 'launches': args.launches, 'containers': args.containers,
+              'poll_interval': args.poll_interval, 'timeout': max(60.0, args.run_seconds * 10),
+              'fetches': args.fetches, 'cli_runs': args.cli_runs, 'list_limit': 100, 'transport': args.transport}
+    results = {
+        'version': version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': dict(vars(config), **params),
+        'scenarios': {},
+    }
+
+    print(f"{'scenario':10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS KiB':>9} {'polls':>6}")
+    for name in args.scenarios:
+        summary = results['scenarios'][name] = run_scenario(name, config, params)
+        polls = summary.get('polls_per_container')
+        print(f"{name:10} {summary['requests_per_second']:9.1f} {summary['p50_ms']:9.2f} {summary['p99_ms']:9.2f} "
+              f"{summary['peak_rss_kib']:9d} {polls if polls is not None else '':>6}")
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         f"{results['version']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nresults written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f'\nFAIL: regressions beyond {args.tolerance:.0%}:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'\nno regression beyond {args.tolerance:.0%} against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
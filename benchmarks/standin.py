@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the PhantomBuster API v2, for benchmarks.
+
+Emulates the `agents/*`, `containers/*`, `scripts/*` and `orgs/*` routes used by
+the client with configurable latency, payload sizes and container lifecycles.
+Launched containers run for `run_seconds` (or `run_polls` polls) and then finish
+with a result object of `result_records` records, posting their webhook to
+`webhook_url` when set.
+
+Usage:
+    python benchmarks/standin.py --port 8000 --latency 0.05
+    # then point the client at http://127.0.0.1:8000/api/v2/
+
+    from benchmarks.standin import StandIn
+    with StandIn(latency=0.01) as server:
+        pb._req.endpoint = server.url
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StandInConfig(object):
+    """Behaviour of the stand-in server.
+
+    Args:
+        latency (float): Seconds added to every response.
+        jitter (float): Random +/- fraction applied to the latency.
+        agents (int): Agents of the organization.
+        containers_per_agent (int): Finished containers in the history of every agent.
+        result_records (int): Records in every result object.
+        record_size (int): Approximate size of a record, in bytes.
+        output_lines (int): Lines of console output of a finished container.
+        run_seconds (float): Seconds a launched container runs.
+        run_polls (int): Polls of `containers/fetch` before a launched container finishes, if set.
+        parallelism (int): Parallelism of the plan reported by `orgs/fetch-resources`.
+        webhook_url (str): URL the webhook of a launched container is posted to once it ran `run_seconds`.
+        webhook_loss (float): Fraction of the webhooks dropped, to exercise the polling safety net.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.1, agents=50, containers_per_agent=200, result_records=1000,
+                 record_size=200, output_lines=100, run_seconds=1.0, run_polls=None, parallelism=10,
+                 webhook_url=None, webhook_loss=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.agents = agents
+        self.containers_per_agent = containers_per_agent
+        self.result_records = result_records
+        self.record_size = record_size
+        self.output_lines = output_lines
+        self.run_seconds = run_seconds
+        self.run_polls = run_polls
+        self.parallelism = parallelism
+        self.webhook_url = webhook_url
+        self.webhook_loss = webhook_loss
+
+
+class _State(object):
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.launched = {}  # container id -> {'agentId', 'createdAt', 'polls'}
+        self.sequence = 0
+        self.started_at = int(time.time() * 1000)
+        self._result = None
+
+    def agent(self, agent_id):
+        index = int(agent_id) if str(agent_id).isdigit() else 0
+        return {'id': str(agent_id), 'name': f'agent {agent_id}', 'scriptId': '3112', 'orgName': 'phantombuster',
+                'createdAt': self.started_at - 10 ** 9 + index, 'updatedAt': self.started_at - 10 ** 8,
+                'lastEndType': 'finished', 'launchType': 'manually',
+                'argument': json.dumps({'spreadsheetUrl': 'https://docs.google.com/spreadsheets/d/x', 'numberOfProfiles': 10})}
+
+    def history(self, agent_id):
+        """Finished containers of an agent, newest first."""
+        return [{'id': f'{agent_id}-{i}', 'agentId': agent_id, 'status': 'finished', 'exitCode': 0 if i % 10 else 1,
+                 'launchType': 'manually', 'createdAt': self.started_at - (i + 1) * 3600000,
+                 'endedAt': self.started_at - (i + 1) * 3600000 + 60000}
+                for i in range(self.config.containers_per_agent)]
+
+    def result_object(self):
+        if self._result is None:
+            padding = 'x' * max(0, self.config.record_size - 80)
+            records = [{'profileUrl': f'https://www.linkedin.com/in/user-{i}', 'name': f'User {i}', 'bio': padding}
+                       for i in range(self.config.result_records)]
+            self._result = json.dumps(records)
+        return self._result
+
+    def container(self, container_id, poll=False):
+        """A launched or historical container, advancing its lifecycle on polls."""
+        with self.lock:
+            launched = self.launched.get(container_id)
+            if launched is None:
+                return {'id': container_id, 'status': 'finished', 'exitCode': 0, 'createdAt': self.started_at, 'endedAt': self.started_at + 60000}
+            if poll:
+                launched['polls'] += 1
+            if self.config.run_polls is not None:
+                finished = launched['polls'] >= self.config.run_polls
+            else:
+                finished = time.time() - launched['launchedAt'] >= self.config.run_seconds
+            if finished and 'endedAt' not in launched:
+                launched['endedAt'] = int(time.time() * 1000)
+            return {'id': container_id, 'agentId': launched['agentId'], 'status': 'finished' if finished else 'running',
+                    'exitCode': 0 if finished else None, 'createdAt': launched['createdAt'], 'endedAt': launched.get('endedAt')}
+
+    def launch(self, agent_id):
+        with self.lock:
+            self.sequence += 1
+            container_id = f'L{self.sequence}'
+            self.launched[container_id] = {'agentId': agent_id, 'createdAt': int(time.time() * 1000),
+                                           'launchedAt': time.time(), 'polls': 0}
+        if self.config.webhook_url and self.config.run_polls is None:
+            timer = threading.Timer(self.config.run_seconds, self.notify, (container_id, agent_id))
+            timer.daemon = True
+            timer.start()
+        return container_id
+
+    def notify(self, container_id, agent_id):
+        """Post the webhook of a finished container, unless it is one of the dropped ones."""
+        from pbuster.webhook import simulate
+
+        if random.random() < self.config.webhook_loss:
+            return
+        try:
+            simulate(self.config.webhook_url, container_id, agent_id)
+        except OSError:
+            pass  # Receiver gone
+
+    def running(self):
+        return sum(1 for cid in list(self.launched) if self.container(cid)['status'] == 'running')
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and body are written separately
+    state = None  # set by StandIn
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        config = self.state.config
+        if config.latency:
+            time.sleep(max(0.0, config.latency * (1 + random.uniform(-config.jitter, config.jitter))))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        url = urlparse(self.path)
+        route = url.path.split('/api/v2/', 1)[-1]
+        with self.state.lock:
+            self.state.requests[route] += 1
+        return route, {key: values[0] for key, values in parse_qs(url.query).items()}
+
+    def do_GET(self):
+        route, query = self._route()
+        state, config = self.state, self.state.config
+
+        if route == 'agents/fetch-all':
+            return self._send([state.agent(i) for i in range(config.agents)])
+        if route in ('agents/fetch', 'agents/fetch-output'):
+            agent = state.agent(query.get('id', '0'))
+            if route == 'agents/fetch-output':
+                return self._send({'output': 'line\n' * config.output_lines, 'status': 'finished'})
+            return self._send(agent)
+
+        if route == 'containers/fetch-all':
+            agent_id = query.get('agentId', '0')
+            launched = [state.container(cid) for cid, c in list(state.launched.items()) if c['agentId'] == agent_id]
+            containers = sorted(launched, key=lambda c: -c['createdAt']) + state.history(agent_id)
+            mode = query.get('mode')
+            if mode == 'unfinalized':
+                containers = [c for c in containers if c['status'] == 'running']
+            elif mode == 'finalized':
+                containers = [c for c in containers if c['status'] != 'running']
+            if 'beforeEndedAt' in query:
+                before = int(query['beforeEndedAt'])
+                containers = [c for c in containers if c.get('endedAt') is not None and c['endedAt'] < before]
+            if 'limit' in query:
+                containers = containers[:int(query['limit'])]
+            return self._send({'containers': containers})
+        if route == 'containers/fetch':
+            container = state.container(query.get('id', ''), poll=True)
+            if container['status'] == 'finished':
+                container['resultObject'] = state.result_object()
+                container['output'] = 'line\n' * config.output_lines
+            return self._send(container)
+        if route == 'containers/fetch-output':
+            container = state.container(query.get('id', ''))
+            output = ''.join(f'line {i}\n' for i in range(config.output_lines))
+            position = int(query.get('fromOutputPos', 0))
+            return self._send({'output': output[position:], 'outputPos': len(output), 'status': container['status'],
+                               'isAgentRunning': container['status'] == 'running'})
+        if route == 'containers/fetch-result-object':
+            return self._send(json.dumps({'id': query.get('id'), 'resultObject': state.result_object()}).encode())
+
+        if route == 'scripts/fetch-all':
+            return self._send([{'id': str(i), 'name': f'script {i}', 'updatedAt': state.started_at} for i in range(20)])
+        if route == 'scripts/fetch':
+            return self._send({'id': query.get('id'), 'name': 'script', 'argumentTypes': {}})
+        if route == 'orgs/fetch':
+            return self._send({'id': '1', 'name': 'stand-in'})
+        if route == 'orgs/fetch-resources':
+            return self._send({'plan': {'parallelism': config.parallelism, 'executionTime': 10 ** 6},
+                               'current': {'parallelism': state.running(), 'executionTime': 0}})
+        self._send({'error': 'Not found'}, 404)
+
+    def do_POST(self):
+        route, _ = self._route()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'null') or {}
+
+        if route == 'agents/launch':
+            return self._send({'containerId': self.state.launch(str(body.get('id')))})
+        if route in ('agents/stop', 'agents/save'):
+            return self._send({'id': body.get('id') or '1'})
+        if route == 'agents/delete':
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send({'error': 'Not found'}, 404)
+
+
+class StandIn(object):
+    """Run the stand-in server on a background thread.
+
+    Args:
+        config (StandInConfig): Server behaviour. Keyword arguments build one if not set.
+        port (int): Port to listen on. A free one if 0.
+    """
+
+    def __init__(self, config=None, port=0, **kwargs):
+        self.config = config or StandInConfig(**kwargs)
+        self.state = _State(self.config)
+        handler = type('Handler', (_Handler,), {'state': self.state})
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}/api/v2/'
+
+    @property
+    def requests(self):
+        """Counter: Requests received per route."""
+        return self.state.requests
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='pbuster-standin', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the PhantomBuster API.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--result-records', type=int, default=1000, help='Records in every result object.')
+    parser.add_argument('--run-seconds', type=float, default=1.0, help='Seconds a launched container runs.')
+    args = parser.parse_args()
+    server = StandIn(port=args.port, latency=args.latency, result_records=args.result_records, run_seconds=args.run_seconds)
+    print(f'Serving on {server.url}')
+    server.server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
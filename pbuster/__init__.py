@@ -1,3 +1,12 @@
-from .phantombuster import PhantomBuster
+__all__ = ['PhantomBuster', 'AsyncPhantomBuster']
 
-__all__ = ['PhantomBuster']
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported on first use, so that `pbuster.cli --help` does not load the API client
+    if name == 'PhantomBuster':
+        from .phantombuster import PhantomBuster
+        return PhantomBuster
+    if name == 'AsyncPhantomBuster':
+        from .aio import AsyncPhantomBuster
+        return AsyncPhantomBuster
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
-import os
-import json
-from .utils import script_settings_loader
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from .utils import script_settings as default_script_settings
 from pbuster.container import Container
+from pbuster.launch import LaunchPlanCache
 
 class Agent(object):
 
@@ -15,17 +16,22 @@ class Agent(object):
     AGENT_DELETE = "agents/delete"
 
     WAIT_TIME = 2  # seconds
+    PLAN_TTL = 300  # seconds a cached launch plan is valid
+    MAX_IN_FLIGHT = 8  # concurrent launches in launch_many
 
-    def __init__(self, req):
+    def __init__(self, req, container=None, script_settings=None):
       self.req = req
+      self.container = container or Container(req)
+      self.script_settings = script_settings or default_script_settings
+      self.plans = LaunchPlanCache(self.script_settings, ttl=self.PLAN_TTL)
 
     def _json_to_dict(self, txt):
         """JSON to DICT."""
         if isinstance(txt, dict):
             return txt
         try:
-            return json.loads(txt)
-        except json.JSONDecodeError:
+            return self.req.codec.loads(txt)
+        except ValueError:
             return {}
 
     def list(self):
@@ -82,39 +88,88 @@ class Agent(object):
         Returns:
             (dict): A dictionary containing the response with the container ID of the launched agent.
         """
-        payload = {
-            'id': agent_id,
-            'arguments': {}
-        }
+        plan = self.plans.get(agent_id) or self.plans.put(agent_id, self.req.get(self.AGENT.format(agent_id)))
+        return self.req.post(self.AGENT_LAUNCH, payload=plan.payload(agent_id, arguments))
+
+    def prime(self, agent_ids=None):
+        """Warm up the launch plans of many agents with a single `agents/fetch-all` request
+
+        Once primed, launching an agent only sends the launch request. Plans of agents
+        whose `updatedAt` did not change are kept as they are.
+
+        Args:
+            agent_ids (list): Agent IDs to prime. All agents of the organization if not set.
+
+        Returns:
+            (int): Number of plans primed.
+        """
+        agents = {str(agent.get('id')): agent for agent in self.req.get(self.AGENTS)}
+        agent_ids = [str(agent_id) for agent_id in agent_ids] if agent_ids is not None else list(agents)
+        for agent_id in agent_ids:
+            agent = agents.get(agent_id) or self.req.get(self.AGENT.format(agent_id))
+            self.plans.put(agent_id, agent)
+        return len(agent_ids)
+
+    def launch_many(self, items, max_in_flight=MAX_IN_FLIGHT):
+        """Launch many agents concurrently
 
-        # Load script settings for the agent
-        script_id = self.get(agent_id).get('scriptId')
-        script_settings = script_settings_loader(script_id)
-        payload['arguments'].update(script_settings.get('arguments', {}))
-        payload['arguments'].update(arguments or {})
+        Launch plans of every distinct agent are resolved upfront (with a single
+        `agents/fetch-all` request when several are missing), then launches run
+        through a pool of at most `max_in_flight` workers. A failing item does not
+        abort the others.
 
-        # Ensure sessionCookie is set, either from arguments or environment variable
-        if 'sessionCookie' not in payload['arguments']:
-            payload['arguments']['sessionCookie'] = os.getenv('PHANTOMBUSTER_LINKEDIN_COOKIE')
+        Args:
+            items (list): `(agent_id, arguments)` tuples. The same agent may appear several times.
+            max_in_flight (int): Maximum number of launches running at the same time.
+
+        Returns:
+            (list): One dictionary per item, in input order, with `agent_id`, `container_id`, `response` and `error` (the exception raised, or None).
+        """
+        items = [(str(agent_id), arguments) for agent_id, arguments in items]
+        missing = self._missing_plans(agent_id for agent_id, _ in items)
+        if len(missing) > 1:
+            try:
+                self.prime(missing)
+            except Exception:
+                pass  # Each launch resolves its own plan and reports its own error
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            return list(executor.map(lambda item: self._launch_item(*item), items))
+
+    def _missing_plans(self, agent_ids):
+        """Distinct agent IDs without a valid launch plan."""
+        return [agent_id for agent_id in dict.fromkeys(agent_ids) if self.plans.get(agent_id) is None]
 
-        # Raise exception if required_args are missing.
-        if not set(script_settings.get('required', [])).issubset(payload['arguments'].keys()):
-            raise ValueError(f"Missing required arguments: {script_settings['required']}")
+    def _launch_item(self, agent_id, arguments):
+        try:
+            response = self.launch(agent_id, arguments)
+        except Exception as ex:
+            return self._launch_result(agent_id, error=ex)
+        return self._launch_result(agent_id, response)
 
-        return self.req.post(self.AGENT_LAUNCH, payload=payload)
+    @staticmethod
+    def _launch_result(agent_id, response=None, error=None):
+        return {
+            'agent_id': agent_id,
+            'container_id': (response or {}).get('containerId'),
+            'response': response,
+            'error': error,
+        }
 
-    def launch_and_wait(self, agent_id, arguments=None):
+    def launch_and_wait(self, agent_id, arguments=None, polling=None, timeout=None, cancel=None):
         """Run a specific agent and wait for it to finish and get results
         
         Args:
             agent_id (str): Agent ID to launch
             arguments (dict): Arguments to send with the launch request. Some are required, depending on the script.
+            polling (Backoff): Polling strategy used while waiting.
+            timeout (float): Seconds to wait for completion before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
         
         Returns:
             (tuple): A tuple containing the container ID and the results of the agent execution.
         """
         # 1. Run the agent
-        pb_container = Container(self.req)
+        pb_container = self.container
         response = self.launch(agent_id, arguments)
         container_id = response.get('containerId')
         
@@ -122,9 +177,13 @@ class Agent(object):
             raise ValueError("Failed to launch agent: No container ID returned.")
         
         # 2. Wait for completion
-        container = pb_container.wait(container_id)
+        container = pb_container.wait(container_id, polling=polling, timeout=timeout, cancel=cancel)
 
         # 3. Error handling
+        return self._check_result(agent_id, container_id, container)
+
+    def _check_result(self, agent_id, container_id, container):
+        """Raise if a finished container failed or returned no results."""
         if container.get('exitCode') != 0:
             raise ValueError(f"Agent failed. Container {container_id} got exit code {container.get('exitCode')}.")
         if container.get('exitCode') == 0 and not container.get('resultObject'):
@@ -132,26 +191,33 @@ class Agent(object):
         
         return container
 
-    def wait(self, agent_id):
+    def wait(self, agent_id, polling=None, timeout=None, cancel=None):
         """Wait for a specific agent to finish execution
         
         Args:
             agent_id (str): Agent ID to wait for
+            polling (Backoff): Polling strategy used while waiting.
+            timeout (float): Seconds to wait for completion before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
         
         Returns:
             (dict): A dictionary containing the agent's output after it has finished executing.
         """
-        pb_container = Container(self.req)
+        pb_container = self.container
 
-        # Get latest running container for the agent
-        containers = pb_container.list(agent_id)
-        running_containers = [c for c in containers if c['status'] == 'running']
+        # Get latest running container for the agent; two are enough to tell it is ambiguous
+        containers = list(islice(pb_container.iter(agent_id, status='running'), 2))
+        container_id = self._running_container_id(agent_id, containers)
+        return pb_container.wait(container_id, polling=polling, timeout=timeout, cancel=cancel)
+
+    def _running_container_id(self, agent_id, containers):
+        """Return the ID of the only running container among `containers`."""
+        running_containers = [c for c in containers if c.get('status') == 'running']
         if not running_containers:
             raise ValueError(f"No running containers found for agent {agent_id}.")
         if len(running_containers) > 1:
             raise ValueError(f"Multiple running containers found for agent {agent_id}. Please specify the container ID.")
-        
-        return pb_container.wait(running_containers[0]['id'])
+        return running_containers[0]['id']
 
     def create(self, script_name, agent_name=None, org_name="phantombuster", arguments={}):
         """Create a new agent
@@ -194,4 +260,5 @@ class Agent(object):
             (dict): A dictionary containing the response from the delete request.
         """
         softAbort = True
+        self.plans.invalidate(agent_id)
         return self.req.post(self.AGENT_DELETE, payload={'id': agent_id, 'softAbort': softAbort})
\ No newline at end of file
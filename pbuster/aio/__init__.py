@@ -0,0 +1,3 @@
+from .phantombuster import AsyncPhantomBuster
+
+__all__ = ['AsyncPhantomBuster']
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from pbuster.agent import Agent
+from pbuster.aio.container import AsyncContainer
+
+
+class AsyncAgent(Agent):
+    """Awaitable version of `pbuster.agent.Agent`."""
+
+    def __init__(self, req, container=None, script_settings=None):
+        super().__init__(req, container or AsyncContainer(req), script_settings)
+
+    async def list(self):
+        """Fetch all agents (Phantoms)
+
+        Returns:
+            (dict): A dictionary containing all agents (Phantoms).
+        """
+        return await self.req.get(self.AGENTS)
+
+    async def get(self, agent_id):
+        """Fetch a specific agent by ID
+
+        Args:
+            agent_id (str): Agent ID to fetch
+
+        Returns:
+            (dict): A dictionary containing the agent details.
+        """
+        agent = await self.req.get(self.AGENT.format(agent_id))
+        agent['argument'] = self._json_to_dict(agent.get('argument', ''))
+        return agent
+
+    async def status(self, agent_id):
+        """Fetch the status of the last execution of a specific agent by ID
+
+        Args:
+            agent_id (str): Agent ID to fetch status for
+
+        Returns:
+            (str): Status of the last agent execution.
+        """
+        return (await self.req.get(self.AGENT.format(agent_id))).get('lastEndType', "")
+
+    async def output(self, agent_id):
+        """Fetch the output of a specific agent by ID
+
+        Args:
+            agent_id (str): Agent ID to fetch output for
+
+        Returns:
+            (dict): A dictionary containing the agent's output.
+        """
+        return await self.req.get(self.AGENT_OUTPUT.format(agent_id))
+
+    async def launch(self, agent_id, arguments=None):
+        """Run a specific agent.
+
+        Args:
+            agent_id (str): Agent ID to launch
+            arguments (dict): Arguments to send with the launch request. Some are required, depending on the script.
+
+        Returns:
+            (dict): A dictionary containing the response with the container ID of the launched agent.
+        """
+        plan = self.plans.get(agent_id) or self.plans.put(agent_id, await self.req.get(self.AGENT.format(agent_id)))
+        return await self.req.post(self.AGENT_LAUNCH, payload=plan.payload(agent_id, arguments))
+
+    async def prime(self, agent_ids=None):
+        """Warm up the launch plans of many agents with a single `agents/fetch-all` request
+
+        Args:
+            agent_ids (list): Agent IDs to prime. All agents of the organization if not set.
+
+        Returns:
+            (int): Number of plans primed.
+        """
+        agents = {str(agent.get('id')): agent for agent in await self.req.get(self.AGENTS)}
+        agent_ids = [str(agent_id) for agent_id in agent_ids] if agent_ids is not None else list(agents)
+        for agent_id in agent_ids:
+            agent = agents.get(agent_id) or await self.req.get(self.AGENT.format(agent_id))
+            self.plans.put(agent_id, agent)
+        return len(agent_ids)
+
+    async def launch_many(self, items, max_in_flight=Agent.MAX_IN_FLIGHT):
+        """Launch many agents concurrently
+
+        Args:
+            items (list): `(agent_id, arguments)` tuples. The same agent may appear several times.
+            max_in_flight (int): Maximum number of launches running at the same time.
+
+        Returns:
+            (list): One dictionary per item, in input order, with `agent_id`, `container_id`, `response` and `error` (the exception raised, or None).
+        """
+        items = [(str(agent_id), arguments) for agent_id, arguments in items]
+        missing = self._missing_plans(agent_id for agent_id, _ in items)
+        if len(missing) > 1:
+            try:
+                await self.prime(missing)
+            except Exception:
+                pass  # Each launch resolves its own plan and reports its own error
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def launch_item(agent_id, arguments):
+            async with semaphore:
+                try:
+                    response = await self.launch(agent_id, arguments)
+                except Exception as ex:
+                    return self._launch_result(agent_id, error=ex)
+                return self._launch_result(agent_id, response)
+
+        return await asyncio.gather(*[launch_item(agent_id, arguments) for agent_id, arguments in items])
+
+    async def launch_and_wait(self, agent_id, arguments=None, polling=None, timeout=None, cancel=None):
+        """Run a specific agent and wait for it to finish without blocking the event loop
+
+        Args:
+            agent_id (str): Agent ID to launch
+            arguments (dict): Arguments to send with the launch request. Some are required, depending on the script.
+            polling (Backoff): Polling strategy used while waiting.
+            timeout (float): Seconds to wait for completion before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+
+        Returns:
+            (dict): A dictionary containing the finished container.
+        """
+        pb_container = self.container
+        response = await self.launch(agent_id, arguments)
+        container_id = response.get('containerId')
+
+        if not container_id:
+            raise ValueError("Failed to launch agent: No container ID returned.")
+
+        container = await pb_container.wait(container_id, polling=polling, timeout=timeout, cancel=cancel)
+        return self._check_result(agent_id, container_id, container)
+
+    async def wait(self, agent_id, polling=None, timeout=None, cancel=None):
+        """Wait for the running container of a specific agent to finish
+
+        Args:
+            agent_id (str): Agent ID to wait for
+            polling (Backoff): Polling strategy used while waiting.
+            timeout (float): Seconds to wait for completion before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+
+        Returns:
+            (dict): A dictionary containing the agent's output after it has finished executing.
+        """
+        pb_container = self.container
+        containers = []
+        async for container in pb_container.iter(agent_id, status='running'):
+            containers.append(container)
+            if len(containers) == 2:
+                break
+        container_id = self._running_container_id(agent_id, containers)
+        return await pb_container.wait(container_id, polling=polling, timeout=timeout, cancel=cancel)
+
+    async def create(self, script_name, agent_name=None, org_name="phantombuster", arguments={}):
+        """Create a new agent
+
+        Args:
+            script_name (str): Name of the script to associate with the agent.
+            agent_name (str): Name of the agent to create.
+            org_name (str): Name of the organization that owns the script. Default is "phantombuster".
+            arguments (dict): Optional arguments to send with the agent creation request.
+
+        Returns:
+            (dict): ID of the created agent.
+        """
+        payload = {
+            'script': script_name,
+            'name': agent_name or script_name,
+            'org': org_name
+        }
+
+        return await self.req.post(self.AGENT_SAVE, payload=payload)
+
+    async def stop(self, agent_id):
+        """Stop a specific agent by ID
+
+        Args:
+            agent_id (str): Agent ID to stop
+
+        Returns:
+            (dict): A dictionary containing the response from the stop request.
+        """
+        return await self.req.post(self.AGENT_STOP, payload={'id': agent_id, 'stop': True})
+
+    async def delete(self, agent_id):
+        """Delete a specific agent by ID
+
+        Args:
+            agent_id (str): Agent ID to delete
+
+        Returns:
+            (dict): A dictionary containing the response from the delete request.
+        """
+        self.plans.invalidate(agent_id)
+        return await self.req.post(self.AGENT_DELETE, payload={'id': agent_id, 'softAbort': True})
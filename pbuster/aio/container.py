@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from pbuster.container import Container, ContainerPager
+from pbuster.results import ResultObjectParser
+from pbuster.export import Exporter
+from pbuster.polling import PollScheduler, WaitTimeout, WaitCancelled
+
+
+class AsyncContainer(Container):
+    """Awaitable version of `pbuster.container.Container`."""
+
+    async def list(self, agent_id):
+        """Fetch all containers for a specific agent
+
+        Args:
+            agent_id (str): Agent ID to fetch containers for
+
+        Returns:
+            (dict): A dictionary containing all containers for the specified agent.
+        """
+        return (await self.req.get(self.CONTAINERS.format(agent_id)))['containers']
+
+    async def iter(self, agent_id, status=None, since=None, page_size=Container.PAGE_SIZE):
+        """Iterate over the containers of a specific agent, newest first, one page at a time
+
+        Args:
+            agent_id (str): Agent ID to fetch containers for
+            status (str): Only yield containers with this status, e.g. 'running'. Filtered server-side when possible.
+            since (datetime|float): Stop at containers created before this date (datetime or epoch seconds).
+            page_size (int): Containers fetched per request.
+
+        Yields:
+            (dict): Containers of the agent.
+        """
+        pager = ContainerPager(self.CONTAINERS_PAGE, agent_id, status, since, page_size)
+        while pager.route is not None:
+            for container in pager.feed(await self.req.get(pager.route)):
+                yield container
+
+    async def get(self, container_id):
+        """Fetch a specific container by ID with results and output
+
+        Args:
+            container_id (str): Container ID to fetch
+
+        Returns:
+            (dict): A dictionary containing the container details.
+        """
+        return await self.req.get(self.CONTAINER.format(container_id))
+
+    async def output(self, container_id, raw=False):
+        """Fetch the output of a specific container by ID
+
+        Args:
+            container_id (str): Container ID to fetch output for
+            raw (bool): If True, fetch raw output
+
+        Returns:
+            (dict): A dictionary containing the container's output.
+        """
+        return (await self.req.get(self.CONTAINER_OUTPUT.format(container_id, str(raw).lower())))['output']
+
+    async def tail(self, container_id, follow=True, position=0, polling=None, timeout=None, cancel=None):
+        """Stream the output of a specific container line by line
+
+        Args:
+            container_id (str): Container ID to tail
+            follow (bool): Keep polling until the container finishes. If False, stop after the first fetch.
+            position (int): Output position to start from. 0 streams the whole output.
+            polling (Backoff): Polling strategy used while following.
+            timeout (float): Seconds to follow before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to stop following with `WaitCancelled`.
+
+        Yields:
+            (str): Output lines, without trailing newline.
+        """
+        poller = self._poller(polling, timeout, cancel)
+        pending = ''
+        finished = False
+        while True:
+            rsp = await self.req.get(self.CONTAINER_OUTPUT_FROM.format(container_id, position))
+            chunk, position = self._output_chunk(rsp, position)
+            lines = (pending + chunk).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line
+
+            if not follow or finished or self._output_finished(rsp):
+                break
+            if rsp.get('isAgentRunning') is None:
+                # No running flag in the response: check the container, then fetch the remaining output once more
+                finished = self.is_finished(await self.get(container_id))
+                if finished:
+                    continue
+            await poller.asleep()
+
+        if pending:
+            yield pending
+
+    async def results(self, container_id):
+        """Fetch the results of a specific container by ID
+
+        Args:
+            container_id (str): Container ID to fetch results for
+
+        Returns:
+            (dict): A dictionary containing the container's results.
+        """
+        rsp = await self.req.get(self.CONTAINER_RESULTS.format(container_id))
+        return self._parse_results(rsp)
+
+    async def iter_results(self, container_id, fields=None):
+        """Stream the results of a specific container by ID, one record at a time
+
+        Args:
+            container_id (str): Container ID to fetch results for
+            fields (list): Keep only these keys of every record. All keys if not set.
+
+        Yields:
+            (dict): Result records, in the order the script saved them.
+        """
+        parser = ResultObjectParser(fields)
+        async for chunk in self.req.stream(self.CONTAINER_RESULTS.format(container_id)):
+            for record in parser.feed(chunk):
+                yield record
+        for record in parser.close():
+            yield record
+
+    async def export(self, container_ids, path, format='ndjson', fields=None, batch_size=Exporter.BATCH_SIZE,
+                     sample_size=Exporter.SAMPLE_SIZE, on_batch=None):
+        """Stream the results of one or more containers to an NDJSON, CSV or Parquet file
+
+        Args:
+            container_ids (list): Container IDs whose results are exported, in order.
+            path (str): Output file, or '-' for stdout (text formats only).
+            format (str): 'ndjson', 'csv' or 'parquet'.
+            fields (list): Keep only these keys of every record. All keys if not set.
+            batch_size (int): Records written at once.
+            sample_size (int): Records used to infer the CSV columns or the Parquet schema.
+            on_batch (callable): Called with the running stats after every batch written.
+
+        Returns:
+            (dict): Export stats, including records and records_per_second.
+        """
+        exporter = Exporter(self, format=format, batch_size=batch_size, sample_size=sample_size, fields=fields)
+        return await exporter.aexport(container_ids, path, on_batch=on_batch)
+
+    async def wait(self, container_id, polling=None, timeout=None, cancel=None):
+        """Wait for completion of a specific container by ID without blocking the event loop
+
+        Args:
+            container_id (str): Container ID to wait for
+            polling (Backoff): Polling strategy. Defaults to the one the client was built with.
+            timeout (float): Seconds to wait before raising `WaitTimeout`. Waits forever if not set.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+
+        Returns:
+            (dict): A dictionary containing the container's output after it has finished executing.
+        """
+        completion = self.webhook.expect(container_id) if self.webhook is not None else None
+        poller = self._poller(self.webhook_polling if completion is not None else polling, timeout, cancel)
+        outcome = None
+        try:
+            container = await self.poll(container_id, poller)
+            while not self.is_finished(container):
+                if completion is not None and not completion.done:
+                    await poller.asleep(wake=completion)
+                    if completion.done:
+                        poller.switch(polling or self.polling)  # Poll promptly until the API agrees
+                else:
+                    await poller.asleep()
+                container = await self.poll(container_id, poller)
+            return container
+        except WaitTimeout:
+            outcome = 'timeouts'
+            raise
+        except WaitCancelled:
+            outcome = 'cancelled'
+            raise
+        finally:
+            if completion is not None:
+                self.webhook.discard(completion)
+            self.record_wait(poller, outcome)
+
+    async def as_completed(self, container_ids, polling=None, timeout=None, cancel=None,
+                           max_concurrency=Container.MAX_CONCURRENCY, max_rate=Container.MAX_RATE):
+        """Wait for many containers at once, yielding each one as soon as it finishes
+
+        Polls are rate-paced like those of `Container.as_completed`.
+
+        Args:
+            container_ids (list): Container IDs to wait for
+            polling (Backoff): Polling strategy applied to every container.
+            timeout (float): Seconds to wait for all containers before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+            max_concurrency (int): Maximum number of requests in flight.
+            max_rate (float): Maximum number of polls per second, `MAX_RATE` by default. `None` disables pacing.
+
+        Yields:
+            (dict): Each container after it has finished executing, in completion order.
+        """
+        async for _, container in self._as_completed(container_ids, polling, timeout, cancel, max_concurrency, max_rate):
+            yield container
+
+    async def wait_many(self, container_ids, polling=None, timeout=None, cancel=None,
+                        max_concurrency=Container.MAX_CONCURRENCY, max_rate=Container.MAX_RATE):
+        """Wait for many containers to finish
+
+        Args:
+            container_ids (list): Container IDs to wait for
+            polling (Backoff): Polling strategy applied to every container.
+            timeout (float): Seconds to wait for all containers before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+            max_concurrency (int): Maximum number of requests in flight.
+            max_rate (float): Maximum number of polls per second, `MAX_RATE` by default. `None` disables pacing.
+
+        Returns:
+            (dict): Finished containers keyed by container ID.
+        """
+        return {cid: container async for cid, container in
+                self._as_completed(container_ids, polling, timeout, cancel, max_concurrency, max_rate)}
+
+    async def _as_completed(self, container_ids, polling, timeout, cancel, max_concurrency, max_rate):
+        """Scheduling loop behind `as_completed`, yielding (container_id, container) pairs."""
+        strategy = polling or self.polling
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        completions, resolved = self._expect_all(container_ids, lambda: loop.call_soon_threadsafe(wake.set))
+        schedule = PollScheduler(container_ids, self.webhook_polling if completions else strategy,
+                                 timeout=timeout, cancel=cancel, max_rate=max_rate)
+        in_flight = {}
+        outcome = None
+        try:
+            while schedule.scheduled or in_flight:
+                schedule.check(in_flight.values())
+                if completions:
+                    wake.clear()
+                    self._expedite(schedule, resolved, strategy)
+
+                while len(in_flight) < max_concurrency:
+                    cid = schedule.pop_due()
+                    if cid is None:
+                        break
+                    await asyncio.sleep(schedule.reserve())
+                    in_flight[asyncio.ensure_future(self.poll(cid, schedule.pollers[cid]))] = cid
+
+                if not in_flight:
+                    if completions:
+                        try:
+                            await asyncio.wait_for(wake.wait(), schedule.idle_time())
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await asyncio.sleep(schedule.idle_time())
+                    continue
+
+                idle = schedule.idle_time() if len(in_flight) < max_concurrency else schedule.remaining()
+                waiter = asyncio.ensure_future(wake.wait()) if completions else None
+                done, _ = await asyncio.wait(list(in_flight) + ([waiter] if waiter else []),
+                                             timeout=idle, return_when=asyncio.FIRST_COMPLETED)
+                if waiter is not None:
+                    waiter.cancel()
+                    done.discard(waiter)
+                for task in done:
+                    cid = in_flight.pop(task)
+                    container = task.result()
+                    if self.is_finished(container):
+                        self.record_wait(schedule.pollers.pop(cid))
+                        yield cid, container
+                    else:
+                        schedule.reschedule(cid)
+        except WaitTimeout:
+            outcome = 'timeouts'
+            raise
+        except WaitCancelled:
+            outcome = 'cancelled'
+            raise
+        finally:
+            for task in in_flight:
+                task.cancel()
+            for poller in schedule.pollers.values():
+                self.record_wait(poller, outcome)
+            for completion in completions.values():
+                self.webhook.discard(completion)
+
+    async def poll(self, container_id, poller):
+        """Awaitable version of `Container.poll`."""
+        poller.polls += 1
+        return await self.get(container_id)
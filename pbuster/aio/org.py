@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from pbuster.org import Org
+
+
+class AsyncOrg(Org):
+    """Awaitable version of `pbuster.org.Org`."""
+
+    async def info(self):
+        """Fetch all organizations
+
+        Returns:
+            (dict): A dictionary containing information about the organization."""
+        return await self._req.get(self.ORG)
+
+    async def usage(self):
+        """Fetch resources for the organization
+
+        Returns:
+            (dict): A dictionary containing the resources used by the organization.
+        """
+        return await self._req.get(self.ORG_RESOURCES)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from pbuster.phantombuster import PhantomBuster
+from pbuster.aio.utils import AsyncRequestHandler
+from pbuster.aio.org import AsyncOrg
+from pbuster.aio.script import AsyncScript
+from pbuster.aio.agent import AsyncAgent
+from pbuster.aio.container import AsyncContainer
+
+
+class AsyncPhantomBuster(PhantomBuster):
+    """
+    Asyncio PhantomBuster API client. Mirrors `PhantomBuster` but every API
+    method is a coroutine running over a non-blocking HTTP transport (httpx).
+
+    Attributes:
+        org (AsyncOrg): Organization management interface
+        script (AsyncScript): Script management interface
+        agent (AsyncAgent): Agent management interface
+        container (AsyncContainer): Container management interface
+    """
+
+    def _build(self, **pool):
+        self._req = AsyncRequestHandler(endpoint=self.BASE_URL, headers=self._headers, **pool)
+
+        self.org = AsyncOrg(self._req)
+        self.script = AsyncScript(self._req)
+        self.container = AsyncContainer(self._req)
+        self.agent = AsyncAgent(self._req, container=self.container, script_settings=self._script_settings)
+
+    async def close(self):
+        """Close the client and release every pooled HTTP connection."""
+        await self._req.close()
+
+    def __enter__(self):
+        raise TypeError("AsyncPhantomBuster must be used with 'async with'.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from pbuster.script import Script
+
+
+class AsyncScript(Script):
+    """Awaitable version of `pbuster.script.Script`."""
+
+    async def list(self, org_name="phantombuster"):
+        """Fetch all scripts (Phantoms)
+
+        Args:
+            org_name (str): Organization name to filter scripts by. Default is "phantombuster".
+
+        Returns:
+            (dict): A dictionary containing all scripts for the specified organization.
+        """
+        return await self._req.get(f'{self.SCRIPTS}?org={org_name}')
+
+    async def get(self, script_id):
+        """Fetch a specific script by ID
+
+        Args:
+            script_id (str): The ID of the script to fetch.
+
+        Returns:
+            (dict): A dictionary containing the script details.
+        """
+        return await self._req.get(self.SCRIPT.format(script_id))
+
+    async def args(self, script_id):
+        """Fetch the arguments of a specific script by ID
+
+        Args:
+            script_id (str): The ID of the script to fetch arguments for.
+
+        Returns:
+            (dict): A dictionary containing the script's arguments.
+        """
+        script = await self.get(script_id)
+        return script.get('argumentTypes', {})
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import time
+import asyncio
+from pbuster.codec import get_codec
+from pbuster.utils import RequestHandler, with_query
+from pbuster.metrics import Hooks
+from pbuster.coalesce import AsyncSingleFlight
+
+
+class AsyncRequestHandler(object):
+    """Non-blocking counterpart of `RequestHandler` built on `httpx.AsyncClient`.
+
+    The client is created on first use and keeps a pool of keep-alive connections
+    shared by every coroutine running on the same event loop.
+
+    Args:
+        endpoint (str): Base URL of the API.
+        headers (dict): Headers sent with every request.
+        pool_connections (int): Maximum number of concurrent connections.
+        pool_maxsize (int): Maximum number of idle keep-alive connections.
+        keepalive_timeout (float): Seconds an idle connection is kept before being dropped.
+        cache (ResponseCache): Optional cache for GET responses.
+        rate_limiter (RateLimiter): Rate limiter every request goes through. Disabled if not set.
+        retry_policy (RetryPolicy): Policy deciding which failed requests are retried. No retries if not set.
+        circuit_breaker (CircuitBreaker): Circuit breaker failing fast while the API is down. Disabled if not set.
+        codec (str): JSON codec name (see `pbuster.codec.CODECS`) or instance. The fastest installed one if not set.
+        transport (str): Only 'httpx', the transport of every async request.
+        hooks (Hooks): Instrumentation hooks (see `pbuster.metrics`). Empty ones if not set.
+        coalesce (bool): Share a single request between identical concurrent GETs. Disabled if not set.
+    """
+
+    _parse_response = RequestHandler._parse_response
+    _handle_response = RequestHandler._handle_response
+    _retry_delay = RequestHandler._retry_delay
+    _result = RequestHandler._result
+    _finish = RequestHandler._finish
+
+    def __init__(self, endpoint, headers={},
+                 pool_connections=RequestHandler.POOL_CONNECTIONS,
+                 pool_maxsize=RequestHandler.POOL_MAXSIZE,
+                 keepalive_timeout=RequestHandler.KEEPALIVE_TIMEOUT,
+                 cache=None, rate_limiter=None, retry_policy=None, circuit_breaker=None, codec=None, transport=None,
+                 hooks=None, coalesce=False):
+        if transport not in (None, 'httpx'):
+            raise ValueError("AsyncPhantomBuster only supports the httpx transport.")
+        self.endpoint = endpoint
+        self.headers = headers
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.codec = get_codec(codec)
+        self.hooks = hooks or Hooks()
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self._client = None
+
+    def _new_client(self):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("AsyncPhantomBuster requires httpx. Install it with `pip install pbuster[async]`.")
+        limits = httpx.Limits(
+            max_connections=max(self.pool_connections, self.pool_maxsize),
+            max_keepalive_connections=self.pool_maxsize,
+            keepalive_expiry=self.keepalive_timeout)
+        return httpx.AsyncClient(headers=self.headers, limits=limits)
+
+    @property
+    def client(self):
+        """httpx.AsyncClient: Pooled HTTP client."""
+        if self._client is None:
+            self._client = self._new_client()
+        return self._client
+
+    async def close(self):
+        """Close the client and every pooled connection."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method, route, payload=None):
+        if payload is not None and method in RequestHandler.QUERY_METHODS:
+            route, payload = with_query(route, payload), None
+        url = '{}{}'.format(self.endpoint, route)
+        content = self.codec.dumps(payload) if payload is not None else None
+
+        cached = None
+        cacheable = self.cache is not None and method == 'get' and self.cache.ttl(route) is not None
+        if cacheable:
+            cached = self.cache.lookup(route)
+            if cached is not None and cached.fresh:
+                return self.codec.loads(cached.content)
+
+        headers = self.cache.conditional_headers(cached) if cacheable else None
+
+        if method == 'get' and payload is None and self.single_flight is not None:
+            return await self.single_flight.do(route, lambda: self._call(method, route, url, None, None, headers, cached))
+        return await self._call(method, route, url, content, None, headers, cached)
+
+    async def _call(self, method, route, url, content=None, params=None, headers=None, cached=None):
+        """Send a request and decode its response, calling the hooks if any listener is registered."""
+        if not self.hooks.active:
+            res = await self._send_with_retries(method, route, url, content, params, headers)
+            return self._result(method, route, res, cached)
+
+        call = self.hooks.start(method, route, url, content)
+        started = time.perf_counter()
+        res = decode_started = None
+        try:
+            res = await self._send_with_retries(method, route, url, content, params, headers, call=call)
+            decode_started = time.perf_counter()
+            result = self._result(method, route, res, cached)
+        except Exception as ex:
+            self._finish(call, started, res, decode_started, error=ex)
+            raise
+        self._finish(call, started, res, decode_started)
+        return result
+
+    async def _send_with_retries(self, method, route, url, content=None, params=None, headers=None, call=None,
+                                 stream=False):
+        """Send a request, retrying it as the retry policy allows. Returns the last response."""
+        import httpx
+
+        attempt = 0
+        while True:
+            trial = self.circuit_breaker.before() if self.circuit_breaker is not None else False
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire(route)
+                request = self.client.build_request(method.upper(), url, content=content, params=params, headers=headers)
+                res = await self.client.send(request, stream=stream)
+            except httpx.TransportError as ex:
+                pre_send = isinstance(ex, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                delay = self._retry_delay(method, route, attempt, pre_send=pre_send)
+                if delay is None:
+                    if call is not None:
+                        self.hooks.error(call, error=ex)
+                    raise ConnectionError(url, str(ex))
+                if call is not None:
+                    self.hooks.retry(call, attempt, delay, error=ex)
+            except BaseException:
+                if trial:
+                    self.circuit_breaker.abandon()
+                raise
+            else:
+                delay = self._retry_delay(method, route, attempt, res)
+                if delay is None:
+                    if call is not None and res.status_code >= 400:
+                        self.hooks.error(call, res)
+                    return res
+                if call is not None:
+                    self.hooks.retry(call, attempt, delay, res)
+                if stream:
+                    await res.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def stream(self, route, chunk_size=65536):
+        """Make a GET request and yield the response body in chunks instead of decoding it
+
+        Args:
+            route (str): Route to fetch.
+            chunk_size (int): Size of the chunks, in bytes.
+
+        Yields:
+            (bytes): Chunks of the response body.
+        """
+        url = '{}{}'.format(self.endpoint, route)
+        call = self.hooks.start('get', route, url, None) if self.hooks.active else None
+        started = time.perf_counter()
+        res, received, error = None, 0, None
+        try:
+            res = await self._send_with_retries('get', route, url, call=call, stream=True)
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(route, res.status_code, res.headers)
+                if str(res.status_code)[0] != '2':
+                    await res.aread()
+                    self._parse_response(res)
+                async for chunk in res.aiter_bytes(chunk_size):
+                    received += len(chunk)
+                    yield chunk
+            finally:
+                await res.aclose()
+        except BaseException as ex:
+            error = ex
+            raise
+        finally:
+            if call is not None:
+                self._finish(call, started, res, error=error if isinstance(error, Exception) else None, bytes_in=received)
+
+    async def get(self, *args, **kwargs):
+        """Make a GET request"""
+        return await self._request('get', *args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        """Make a POST request"""
+        return await self._request('post', *args, **kwargs)
+
+    async def patch(self, *args, **kwargs):
+        """Make a PATCH request"""
+        return await self._request('patch', *args, **kwargs)
+
+    async def put(self, *args, **kwargs):
+        """Make a PUT request"""
+        return await self._request('put', *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        """Make a DELETE request"""
+        return await self._request('delete', *args, **kwargs)
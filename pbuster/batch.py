@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+
+def _id(request, *keys):
+    for key in ('id',) + keys:
+        if request.get(key) is not None:
+            return str(request[key])
+    raise ValueError("Missing 'id'.")
+
+
+# Operations a batch request may run, keyed by their `op` name
+OPS = {
+    'org.info': lambda pb, r: pb.org.info(),
+    'org.usage': lambda pb, r: pb.org.usage(),
+    'agent.list': lambda pb, r: pb.agent.list(),
+    'agent.get': lambda pb, r: pb.agent.get(_id(r, 'agentId')),
+    'agent.status': lambda pb, r: pb.agent.status(_id(r, 'agentId')),
+    'agent.output': lambda pb, r: pb.agent.output(_id(r, 'agentId')),
+    'agent.launch': lambda pb, r: pb.agent.launch(_id(r, 'agentId'), r.get('arguments')),
+    'agent.stop': lambda pb, r: pb.agent.stop(_id(r, 'agentId')),
+    'container.list': lambda pb, r: pb.container.list(_id(r, 'agentId')),
+    'container.get': lambda pb, r: pb.container.get(_id(r, 'containerId')),
+    'container.output': lambda pb, r: pb.container.output(_id(r, 'containerId'), raw=bool(r.get('raw'))),
+    'container.results': lambda pb, r: pb.container.results(_id(r, 'containerId')),
+    'script.list': lambda pb, r: pb.script.list(),
+    'script.get': lambda pb, r: pb.script.get(_id(r, 'scriptId')),
+    'script.args': lambda pb, r: pb.script.args(_id(r, 'scriptId')),
+}
+
+
+def error_info(ex):
+    """Describe an exception as a JSON-serializable dict, with the API error details when there are some."""
+    err = ex.args[0] if ex.args else None
+    info = {'type': type(ex).__name__}
+    if isinstance(err, dict):
+        info['code'] = err.get('code')
+        info['message'] = (err.get('content') or {}).get('error') or err.get('message') or str(err)
+    else:
+        info['message'] = str(ex)
+    return info
+
+
+class BatchRunner(object):
+    """Run many API operations concurrently over a single client.
+
+    Requests are dicts such as `{"op": "agent.status", "id": "123"}` (see `OPS`).
+    Responses echo the `op`, `id` and optional `ref` of their request, plus its
+    line number, and hold either `result` or `error`. A failing request never
+    stops the batch.
+
+    Args:
+        pb (PhantomBuster): Client shared by every request.
+        max_in_flight (int): Requests running at the same time.
+        ordered (bool): Yield responses in request order. As they complete otherwise.
+
+    Example:
+        for response in BatchRunner(pb).run(open('requests.ndjson')):
+            print(response)
+    """
+
+    MAX_IN_FLIGHT = 8
+
+    def __init__(self, pb, max_in_flight=MAX_IN_FLIGHT, ordered=True):
+        self.pb = pb
+        self.max_in_flight = max(1, max_in_flight)
+        self.ordered = ordered
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0}
+
+    def _parse(self, line):
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object.")
+        if request.get('op') not in OPS:
+            raise ValueError(f"Unknown op {request.get('op')!r}. Choose from: {', '.join(OPS)}")
+        return request
+
+    def _execute(self, number, line):
+        response = {'line': number}
+        try:
+            request = self._parse(line) if isinstance(line, str) else line
+            response.update({key: request[key] for key in ('op', 'id', 'ref') if key in request})
+            response['result'] = OPS[request['op']](self.pb, request)
+        except Exception as ex:
+            response['error'] = error_info(ex)
+        return response
+
+    def _count(self, response):
+        self.stats['ok' if 'result' in response else 'errors'] += 1
+        return response
+
+    def run(self, requests):
+        """Execute requests and yield their responses
+
+        Requests are read lazily, so a large file or an endless pipe never sits in memory.
+
+        Args:
+            requests (iterable): NDJSON lines or request dicts. Blank lines are skipped.
+
+        Yields:
+            (dict): One response per request.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for number, line in enumerate(requests, start=1):
+                if isinstance(line, str) and not line.strip():
+                    continue
+                self.stats['requests'] += 1
+                pending.append(executor.submit(self._execute, number, line))
+                if len(pending) >= self.max_in_flight:
+                    yield from self._drain(pending, self.max_in_flight - 1)
+            yield from self._drain(pending, 0)
+
+    def _drain(self, pending, keep):
+        """Yield completed responses until at most `keep` requests are pending."""
+        while len(pending) > keep:
+            if self.ordered:
+                yield self._count(pending.popleft().result())
+            else:
+                done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield self._count(future.result())
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CacheEntry(object):
+    """Cached response body and the validators needed to revalidate it."""
+
+    __slots__ = ('content', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, content, etag=None, last_modified=None, expires_at=0.0):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self):
+        return self.expires_at > time.time()
+
+
+class ResponseCache(object):
+    """Cache of GET responses with per-route TTLs, an in-memory LRU and an optional disk store.
+
+    Only routes listed in `ttls` are cached. Expired entries are revalidated with
+    `If-None-Match` / `If-Modified-Since` when the server sent an `ETag` or
+    `Last-Modified` header, and requests to a mutating route drop the entries of
+    the routes it affects.
+
+    Disk entries are stored in a folder of `disk_dir` private to the API key and
+    endpoint the cache is `bind`-ed to, so that clients of different organizations
+    sharing `disk_dir` never read each other's responses. Folders and files are
+    only readable by their owner.
+
+    Args:
+        ttls (dict): Seconds each route is cached, keyed by route path (without query string).
+        maxsize (int): Maximum number of entries kept in memory.
+        disk_dir (str): Directory where entries are also stored, shared between processes. Disabled if not set.
+    """
+
+    TTLS = {
+        'scripts/fetch-all': 3600,
+        'scripts/fetch': 3600,
+        'orgs/fetch': 300,
+        'agents/fetch-all': 60,
+        'agents/fetch': 60,
+    }
+
+    # Route prefixes whose cached entries are dropped when a mutating route is called
+    INVALIDATES = {
+        'agents/save': ('agents/fetch',),
+        'agents/delete': ('agents/fetch',),
+        'agents/launch': ('agents/fetch',),
+        'agents/stop': ('agents/fetch',),
+    }
+
+    def __init__(self, ttls=None, maxsize=512, disk_dir=None):
+        self.ttls = dict(self.TTLS, **(ttls or {}))
+        self.maxsize = maxsize
+        self.disk_dir = os.path.expanduser(disk_dir) if disk_dir else None
+        self.namespace = None
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bind(self, api_key, endpoint):
+        """Scope the cache to the API key and endpoint of the client using it.
+
+        Raises:
+            ValueError: If the cache is already bound to another API key or endpoint.
+        """
+        namespace = hashlib.sha256(f'{endpoint}\n{api_key}'.encode()).hexdigest()[:16]
+        if self.namespace not in (None, namespace):
+            raise ValueError("This ResponseCache is already used by a client with another API key or endpoint.")
+        self.namespace = namespace
+
+    @property
+    def _disk_root(self):
+        """str: Folder of the disk entries of the bound API key and endpoint."""
+        return os.path.join(self.disk_dir, self.namespace or 'unbound')
+
+    @staticmethod
+    def _path(route):
+        return route.split('?', 1)[0]
+
+    def ttl(self, route):
+        """Seconds a route is cached, or None if the route is not cacheable."""
+        return self.ttls.get(self._path(route))
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _disk_file(self, route):
+        folder = os.path.join(self._disk_root, self._path(route).replace('/', '_'))
+        return os.path.join(folder, hashlib.sha1(route.encode()).hexdigest() + '.json')
+
+    def _read_disk(self, route):
+        try:
+            with open(self._disk_file(route), 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(data['content'].encode(), data.get('etag'), data.get('last_modified'), data.get('expires_at', 0.0))
+
+    def _write_disk(self, route, entry):
+        path = self._disk_file(route)
+        for folder in (self.disk_dir, self._disk_root, os.path.dirname(path)):
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as file:
+            json.dump({'content': entry.content.decode(), 'etag': entry.etag,
+                       'last_modified': entry.last_modified, 'expires_at': entry.expires_at}, file)
+        os.replace(tmp, path)
+
+    def _put(self, route, entry):
+        with self._lock:
+            self._entries[route] = entry
+            self._entries.move_to_end(route)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def lookup(self, route):
+        """Return the cached entry of a route, from memory or disk, or None."""
+        with self._lock:
+            entry = self._entries.get(route)
+            if entry is not None:
+                self._entries.move_to_end(route)
+        if (entry is None or not entry.fresh) and self.disk_dir:
+            # Another process may have stored a fresher entry
+            stored = self._read_disk(route)
+            if stored is not None and (entry is None or stored.expires_at > entry.expires_at):
+                entry = stored
+                self._put(route, entry)
+        if entry is not None and entry.fresh:
+            self._count('hits')
+        else:
+            self._count('misses')
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Headers to revalidate a stale entry with the server."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def revalidated(self, route, entry):
+        """Extend the life of an entry after a `304 Not Modified` response."""
+        entry.expires_at = time.time() + self.ttl(route)
+        self._count('revalidated')
+        self._put(route, entry)
+        if self.disk_dir:
+            self._write_disk(route, entry)
+
+    def store(self, route, content, headers):
+        """Cache the body of a successful response.
+
+        Args:
+            route (str): Requested route, including query string.
+            content (bytes): Raw response body.
+            headers (dict): Response headers.
+        """
+        entry = CacheEntry(content, headers.get('ETag'), headers.get('Last-Modified'), time.time() + self.ttl(route))
+        self._put(route, entry)
+        self._count('stores')
+        if self.disk_dir:
+            self._write_disk(route, entry)
+
+    def invalidate(self, prefix=None):
+        """Drop every entry whose route starts with `prefix`, or every entry if not set."""
+        with self._lock:
+            for route in [route for route in self._entries if prefix is None or route.startswith(prefix)]:
+                del self._entries[route]
+            self.stats['invalidations'] += 1
+        if self.disk_dir and os.path.isdir(self._disk_root):
+            folder_prefix = (prefix or '').replace('/', '_')
+            for folder in os.listdir(self._disk_root):
+                if folder.startswith(folder_prefix):
+                    shutil.rmtree(os.path.join(self._disk_root, folder), ignore_errors=True)
+
+    def invalidate_for(self, route):
+        """Drop the entries affected by a call to a mutating route."""
+        for prefix in self.INVALIDATES.get(self._path(route), ()):
+            self.invalidate(prefix)
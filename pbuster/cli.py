@@ -0,0 +1,638 @@
+import os
+import sys
+import csv
+import json
+import threading
+from itertools import islice
+from contextlib import contextmanager
+from datetime import datetime
+
+_MISSING_EXTRA = "The pbuster command requires the cli extra. Install it with `pip install pbuster[cli]`."
+
+try:
+    import click
+except ImportError:
+    raise SystemExit(_MISSING_EXTRA)
+
+DATEFORMAT = '%Y-%m-%d %H:%M'
+
+
+class _Lazy(object):
+    """Proxy building its target on first use, so `--help` and argument errors never pay for it."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._target is None:
+            with self._lock:  # Batch workers may all get here first: build a single target
+                if self._target is None:
+                    try:
+                        self._target = self._factory()
+                    except click.ClickException as e:
+                        # Exit here: the commands report any other exception as an API error
+                        e.show()
+                        raise SystemExit(e.exit_code)
+        return getattr(self._target, name)
+
+def _client():
+    """Build the API client from the environment (and `.env`)."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        raise SystemExit(_MISSING_EXTRA)
+    from pbuster.phantombuster import PhantomBuster
+    from pbuster.cache import ResponseCache
+
+    load_dotenv()
+    api_key = os.getenv("PHANTOMBUSTER_API_KEY")
+    if not api_key:
+        raise click.UsageError("PHANTOMBUSTER_API_KEY is not set. Export it or add it to a .env file.")
+    cache_dir = os.getenv("PHANTOMBUSTER_CACHE_DIR")
+    return PhantomBuster(api_key=api_key,
+                         cache=ResponseCache(disk_dir=cache_dir) if cache_dir else None,
+                         transport=os.getenv("PHANTOMBUSTER_TRANSPORT") or None)
+
+def _console(stderr=False):
+    try:
+        from rich.console import Console
+    except ImportError:
+        raise SystemExit(_MISSING_EXTRA)
+    return Console(stderr=stderr)
+
+def _table(*args, **kwargs):
+    from rich.table import Table
+    return Table(*args, **kwargs)
+
+console = _Lazy(_console)
+pb = _Lazy(_client)
+
+
+def _args_to_dict(args):
+    """Convert a string of key=value pairs to a dictionary."""
+    if not args:
+        return {}
+    return dict(item.split('=') for item in args.split(','))
+
+def _error_message(e):
+    """Extract the API error message of an exception."""
+    err = e.args[0] if e.args else e
+    if isinstance(err, dict):
+        return (err.get('content') or {}).get('error') or err.get('message') or str(err)
+    return str(err)
+
+def _dict_to_default_table(data):
+    """Convert a dictionary to a Rich Table.
+    
+    Args:
+        data (dict): The dictionary to convert.
+        
+    Returns:
+        Table: A Rich Table containing the dictionary data.
+    """
+    table = _table()
+    table.add_column("Key", style="white")
+    table.add_column("Value", style="magenta", width=80)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            value = json.dumps(value, indent=2)
+        elif isinstance(value, list):
+            value = json.dumps(value)
+        table.add_row(key, str(value))
+    return table
+
+def _offline():
+    """Whether the command must read from the local mirror instead of the API."""
+    obj = click.get_current_context().obj
+    return bool(obj and obj.get('offline'))
+
+@contextmanager
+def _store():
+    """Open the local mirror, failing if it was never synced. Closed on exit."""
+    from pbuster.store import Store
+    with Store(pb) as store:
+        if store.synced_at is None:
+            raise click.ClickException("The local mirror is empty. Run `sync` first.")
+        yield store
+
+def _print_version(ctx, param, value):
+    """Print the installed version, or the one of the source tree."""
+    if not value or ctx.resilient_parsing:
+        return
+    try:
+        from importlib.metadata import version
+        click.echo(version('pbuster'))
+    except Exception:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'VERSION')) as f:
+            click.echo(f.read().strip())
+    ctx.exit()
+
+OUTPUT_FORMATS = ('table', 'json', 'ndjson', 'csv')
+
+def output_options(command):
+    """Add `--output` and `--fields` to a listing or show command."""
+    command = click.option('--fields', default=None, help='Comma-separated fields to output, e.g. id,status,exitCode.')(command)
+    return click.option('--output', '-o', default='table', type=click.Choice(OUTPUT_FORMATS),
+                        help='Output format. json, ndjson and csv are streamed as rows are fetched.')(command)
+
+def _emit(rows, output, fields, many=True):
+    """Write rows in a machine-readable format, one at a time and without rich.
+
+    Args:
+        rows (iterable): Dicts to write. A single dict for show commands.
+        output (str): One of `OUTPUT_FORMATS`.
+        fields (str): Comma-separated fields to keep.
+        many (bool): Whether `rows` is a listing. JSON output is then an array.
+
+    Returns:
+        (bool): False if the command must render its own table.
+    """
+    if output == 'table' and not fields:
+        return False
+    fields = fields.split(',') if fields else None
+    rows = (({field: row.get(field) for field in fields} if fields else row) for row in (rows if many else [rows]))
+    if output == 'table':
+        table = _table()
+        for field in fields:
+            table.add_column(field, style="white")
+        for row in rows:
+            table.add_row(*(json.dumps(value) if isinstance(value, (dict, list)) else str(value if value is not None else "")
+                            for value in row.values()))
+        console.print(table)
+        return True
+
+    out = sys.stdout
+    if output == 'ndjson':
+        for row in rows:
+            out.write(json.dumps(row, default=str) + '\n')
+    elif output == 'json' and not many:
+        out.write(json.dumps(next(rows), default=str, indent=2) + '\n')
+    elif output == 'json':
+        out.write('[')
+        for i, row in enumerate(rows):
+            out.write((',\n' if i else '\n') + json.dumps(row, default=str))
+        out.write('\n]\n')
+    elif output == 'csv':
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(out, fields or list(row), extrasaction='ignore', lineterminator='\n')
+                writer.writeheader()
+            writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value for key, value in row.items()})
+    return True
+
+@click.group()
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True, callback=_print_version, help='Show the version and exit.')
+@click.option('--offline', '--cached', 'offline', default=False, is_flag=True, envvar='PHANTOMBUSTER_OFFLINE',
+              help='Read listings and statuses from the local mirror (see `sync`) instead of the API.')
+@click.pass_context
+def cli(ctx, offline):
+    ctx.obj = {'offline': offline}
+
+@cli.command(name='sync')
+@click.option('--agent', '-a', 'agent_ids', multiple=True, help='Only sync the containers of this agent. Can be repeated.')
+def sync(agent_ids):
+    """Update the local mirror of agents, containers and scripts."""
+    from pbuster.store import Store
+    with Store(pb) as store:
+        stats = store.sync(agent_ids=list(agent_ids) or None)
+    console.print(f"[+] Synced {stats['agents']} agents, {stats['containers']} containers and {stats['scripts']} scripts "
+                  f"in {stats['seconds']:.2f}s. ({store.path})", style="green")
+
+@cli.command(name='batch')
+@click.argument('file', type=click.File('r'), default='-')
+@click.option('--max-in-flight', '-m', default=8, type=int, help='Maximum number of requests running at the same time.')
+@click.option('--unordered', '-u', default=False, is_flag=True, help='Write responses as they complete instead of in request order.')
+def batch(file, max_in_flight, unordered):
+    """Run NDJSON requests such as {"op": "agent.status", "id": "123"} from FILE (or stdin) and write NDJSON responses."""
+    from pbuster.batch import BatchRunner
+
+    runner = BatchRunner(pb, max_in_flight=max_in_flight, ordered=not unordered)
+    for response in runner.run(file):
+        click.echo(json.dumps(response, default=str))
+    if runner.stats['errors']:
+        raise SystemExit(1)
+
+# -------------------------- ORG --------------------------
+# ----------------------------------------------------------
+
+@cli.group()
+def org():
+    pass
+
+@org.command()
+def info():
+    """Display organization information."""
+    org_info = pb.org.info()
+    console.print(org_info)
+
+@org.command()
+def usage():
+    """Display organization usage statistics."""
+    org_usage = pb.org.usage()
+    console.print(org_usage)
+
+# --------------------- AGENT COMMANDS ---------------------
+# ----------------------------------------------------------
+
+@cli.group()
+def agent():
+    pass
+
+
+@agent.command(name='list')
+@output_options
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_list(output, fields, debug=False):
+    if _offline():
+        with _store() as store:
+            agents = store.agents()
+    else:
+        agents = pb.agent.list()
+    if _emit(agents, output, fields):
+        return
+    table = _table()
+    table.add_column("#", style="white")
+    table.add_column("Id", style="white")
+    table.add_column("Name", style="magenta")
+    table.add_column("Script ID", style="white")
+    table.add_column("Creation", style="white")
+    table.add_column("Launched", style="white")
+    for i, agent in enumerate(agents, start=1):
+        table.add_row(
+            str(i),
+            agent.get("id", ""),
+            agent.get("name", ""),
+            agent.get("scriptId", ""),
+            datetime.fromtimestamp(agent.get("createdAt", 0) / 1000).strftime(DATEFORMAT),
+            agent.get("launchType", ""))
+        
+    console.print(table) if not debug else console.print(agents)
+
+
+@agent.command(name='show')
+@click.argument('agent_id')
+@output_options
+@click.option('--debug', '-d', is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_show(agent_id, output, fields, debug):
+    agent = pb.agent.get(agent_id)
+    if _emit(agent, output, fields, many=False):
+        return
+    table = _dict_to_default_table(agent)
+    console.print(table) if not debug else console.print(agent)
+
+
+@agent.command(name='status')
+@click.argument('agent_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_status(agent_id, debug):
+    try:
+        if _offline():
+            with _store() as store:
+                status = store.agent_status(agent_id)
+            if status is None:
+                raise click.ClickException(f"Agent {agent_id} is not in the local mirror.")
+        else:
+            status = pb.agent.status(agent_id) # Finished, Running, Error, etc.
+        if not debug:
+            console.print(f"[+] Agent {agent_id} status: {status}", style="green")
+        else:
+            console.print({"status": status})
+    except click.ClickException:
+        raise
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+
+@agent.command(name='create')
+@click.option('--script', '-s', required=True, help='Script ID to associate with the agent.')
+@click.option('--name', '-n', default=None, help='Name of the agent.')
+@click.option('--org', '-o', default='phantombuster', help='Organization name to associate with the agent.')
+@click.option('--args', '-a', default='', help='Arguments to pass to the agent in key=value format.')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_create(script, name, org, args, debug):
+    try:
+        agent = pb.agent.create(script, name, org, args)
+        if debug:
+            console.print(agent)
+        else:
+            console.print(f"[+] Created agent with ID: {agent.get('id')}", style="green")
+    except Exception as e:
+        err = e.args[0].get('content', {}).get('error', 'Unknown error')
+        if err == 'Could not validate data':
+            console.print(f"[X] Script not found. Must include extension name.", style="red")
+        else:
+            console.print(f"[X] {err}", style="red")
+
+@agent.command(name='stop')
+@click.argument('agent_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_stop(agent_id, debug):
+    try:
+        rsp = pb.agent.stop(agent_id)
+        if not debug:
+            console.print(f"[+] Stopped agent {agent_id}.", style="green")
+        else:
+            console.print(rsp)
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+@agent.command(name='delete')
+@click.argument('agent_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_delete(agent_id, debug):
+    try:
+        rsp = pb.agent.delete(agent_id)
+        if not debug:
+            console.print(f"[+] Deleted.", style="green")
+        else:
+            console.print(rsp)
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+@agent.command(name='launch')
+@click.argument('agent_id')
+@click.option('--args', '-a', default='', help='Arguments to pass to the agent. (key1=value1,key2=value2)')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_run(agent_id, args, debug):
+    try:
+        arguments = _args_to_dict(args)
+        if not arguments:
+            console.print("[X] No arguments provided. Use --args to pass arguments in key=value format.", style="red")
+            return
+        
+        rsp = pb.agent.launch(agent_id, arguments)
+        if not debug:
+          console.print(f"[+] Agent {agent_id} launched successfully. (Container {rsp.get('containerId')})", style="green")
+        else:
+            console.print(rsp)
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+@agent.command(name='launch-many')
+@click.argument('file', type=click.File('r'))
+@click.option('--max-in-flight', '-m', default=8, type=int, help='Maximum number of launches running at the same time.')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_launch_many(file, max_in_flight, debug):
+    """Launch agents read from an NDJSON file ('-' for stdin), one {"id": ..., "arguments": {...}} per line."""
+    items = []
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            items.append((item.get('id') or item.get('agentId'), item.get('arguments') or {}))
+
+    for result in pb.agent.launch_many(items, max_in_flight=max_in_flight):
+        if debug:
+            console.print({**result, 'error': _error_message(result['error']) if result['error'] else None})
+        elif result['error']:
+            console.print(f"[X] Agent {result['agent_id']}: {_error_message(result['error'])}", style="red")
+        else:
+            console.print(f"[+] Agent {result['agent_id']} launched successfully. (Container {result['container_id']})", style="green")
+
+@agent.command(name='launch-and-wait')
+@click.argument('agent_id')
+@click.option('--args', '-a', default='', help='Arguments to pass to the agent. (key1=value1,key2=value2)')
+@click.option('--timeout', '-t', default=None, type=float, help='Seconds to wait before giving up.')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_launch_and_wait(agent_id, args, timeout, debug):
+    try:
+        arguments = _args_to_dict(args)
+        if not arguments:
+            console.print("[X] No arguments provided. Use --args to pass arguments in key=value format.", style="red")
+            return
+
+        results = pb.agent.launch_and_wait(agent_id, arguments, timeout=timeout)
+        if not debug:
+            console.print(f"[+] Agent {agent_id} launched successfully.", style="green")
+            table = _dict_to_default_table(results)
+            console.print(table)
+        else:
+            console.print(results)
+    except Exception as e:
+        console.print(f"[X] {e.args[0]}", style="red")
+
+@agent.command(name='wait')
+@click.argument('agent_id')
+@click.option('--timeout', '-t', default=None, type=float, help='Seconds to wait before giving up.')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def agent_wait(agent_id, timeout, debug):
+    try:
+        agent = pb.agent.wait(agent_id, timeout=timeout)
+        if not debug:
+            table = _dict_to_default_table(agent)
+            console.print(table)
+        else:
+            console.print(agent)
+    except Exception as e:
+        console.print(f"[X] {e.args[0]}", style="red")
+
+# ---------------------- SCRIPT COMMANDS ---------------------
+# ------------------------------------------------------------
+
+@cli.group()
+def script():
+    pass
+
+@script.command(name='list')
+@click.option('--filter', '-f', default=None, help='Filter scripts by name.')
+@output_options
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def script_list(filter, output, fields, debug):
+    scripts = pb.script.list()
+
+    if filter:
+        scripts = [script for script in scripts if filter.lower() in script.get("name", "").lower()]
+
+    # Sort by creation date inverted
+    if scripts:
+        scripts.sort(key=lambda x: x.get("created_at", 0), reverse=False)
+    if _emit(scripts, output, fields):
+        return
+
+    table = _table()
+    table.add_column("#", style="white")
+    table.add_column("Id", style="white")
+    table.add_column("Name", style="magenta")
+    table.add_column("Created At", style="white")
+    table.add_column("Updated At", style="white")
+
+    for i, script in enumerate(scripts, start=1):
+        table.add_row(
+            str(i),
+            script.get("id", ""),
+            script.get("name", ""),
+            datetime.fromtimestamp(script.get("created_at", 0) / 1000).strftime(DATEFORMAT),
+            datetime.fromtimestamp(script.get("updated_at", 0) / 1000).strftime(DATEFORMAT),
+        )
+
+    if not debug:
+        console.print(table)
+    else:
+        console.print(scripts)
+
+@script.command(name='show')
+@click.argument('script_id')
+@output_options
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def script_show(script_id, output, fields, debug):
+    script = pb.script.get(script_id)
+    if _emit(script, output, fields, many=False):
+        return
+    if not debug:
+        table = _dict_to_default_table(script)
+        console.print(table)
+    else:
+        console.print(script)
+
+
+@script.command(name='args')
+@click.argument('script_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw agent data.')
+def script_args(script_id, debug):
+    try:
+        args = pb.script.args(script_id)
+        if not debug:
+            table = _dict_to_default_table(args)
+            console.print(table)
+        else:
+            console.print(args)
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+# ---------------------- CONTAINER COMMANDS -------------------
+# ------------------------------------------------------------
+
+@cli.group()
+def container():
+    pass
+
+@container.command(name='list')
+@click.argument('agent_id', required=True)
+@click.option('--status', '-s', default=None, help='Only list containers with this status (e.g. running, finished).')
+@click.option('--since', default=None, type=click.DateTime(), help='Only list containers created after this date.')
+@click.option('--limit', '-l', default=None, type=int, help='Maximum number of containers to list.')
+@output_options
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw container data.')
+def container_list(agent_id, status, since, limit, output, fields, debug):
+    if _offline():
+        with _store() as store:
+            containers = store.containers(agent_id, status=status, since=since, limit=limit)
+    else:
+        containers = islice(pb.container.iter(agent_id, status=status, since=since), limit)
+    if _emit(containers, output, fields):
+        return
+    if not debug:
+        table = _table()
+        table.add_column("ID", style="white")
+        table.add_column("Status", style="white")
+        table.add_column("Created", style="white")
+        table.add_column("Launched", style="white")
+        table.add_column("ExitCode", style="white")
+        for container in containers:
+            table.add_row(
+                container.get("id", ""),
+                container.get("status", ""),
+                datetime.fromtimestamp(container.get("createdAt", 0) / 1000).strftime(DATEFORMAT),
+                container.get("launchType", ""),
+                str(container.get("exitCode", "")),
+            )
+        console.print(table)
+    else:
+        console.print(list(containers))
+
+@container.command(name='show')
+@click.argument('container_id')
+@output_options
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw container data.')
+def container_show(container_id, output, fields, debug):
+    container = pb.container.get(container_id)
+    if _emit(container, output, fields, many=False):
+        return
+    if not debug:
+        table = _dict_to_default_table(container)
+        console.print(table)
+    else:
+        console.print(container)
+
+@container.command(name='results')
+@click.argument('container_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw container data.')
+def container_results(container_id, debug):
+    results = pb.container.results(container_id)
+    if not debug:
+        table = _dict_to_default_table(results)
+        console.print(table)
+    else:
+        console.print(results)
+
+
+@container.command(name='export')
+@click.argument('container_ids', nargs=-1, required=True)
+@click.option('--format', '-f', 'fmt', default='ndjson', type=click.Choice(['ndjson', 'csv', 'parquet']), help='Output format.')
+@click.option('--output', '-o', default='-', help="Output file, '-' for stdout.")
+@click.option('--fields', default=None, help='Comma-separated fields to keep.')
+@click.option('--batch-size', '-b', default=1000, type=int, help='Records written at once.')
+def container_export(container_ids, fmt, output, fields, batch_size):
+    """Stream the results of one or more containers to a file."""
+    fields = fields.split(',') if fields else None
+    err_console = _console(stderr=True)
+    try:
+        stats = pb.container.export(list(container_ids), output, format=fmt, fields=fields, batch_size=batch_size)
+    except Exception as e:
+        err_console.print(f"[X] {_error_message(e)}", style="red")
+        return
+    err_console.print(f"[+] Exported {stats['records']} records from {stats['containers']} containers "
+                      f"in {stats['seconds']:.2f}s ({stats['records_per_second']:.0f} records/s).", style="green")
+    if stats.get('dropped_fields'):
+        err_console.print(f"[!] Fields missing from the sample were dropped: {', '.join(stats['dropped_fields'])}", style="yellow")
+    if stats.get('mismatched_fields'):
+        err_console.print(f"[!] Values not matching the sampled type were cast or nulled: {', '.join(stats['mismatched_fields'])}", style="yellow")
+
+@container.command(name='output')
+@click.argument('container_id')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw container data.')
+def container_output(container_id, debug):
+    output = pb.container.output(container_id, raw=True)
+    if not debug:
+        table = _table(show_header=False)
+        table.add_column("Output", style="magenta", overflow="fold")
+        # Print txt output
+        for line in output.splitlines():
+            table.add_row(line)
+        console.print(table)
+    else:
+        console.print({output})
+
+@container.command(name='tail')
+@click.argument('container_id')
+@click.option('--follow', '-f', default=False, is_flag=True, help='Keep streaming new output until the container finishes.')
+@click.option('--timeout', '-t', default=None, type=float, help='Seconds to follow before giving up.')
+def container_tail(container_id, follow, timeout):
+    try:
+        for line in pb.container.tail(container_id, follow=follow, timeout=timeout):
+            click.echo(line)
+    except TimeoutError as e:
+        console.print(f"[X] {e}", style="red")
+
+@container.command(name='wait')
+@click.argument('container_id')
+@click.option('--timeout', '-t', default=None, type=float, help='Seconds to wait before giving up.')
+@click.option('--debug', '-d', default=False, is_flag=True, help='Enable debug mode to print raw container data.')
+def container_wait(container_id, timeout, debug):
+    try:
+        container = pb.container.wait(container_id, timeout=timeout)
+
+        if not debug:
+            table = _dict_to_default_table(container)
+            console.print(table)
+        else:
+            console.print(container)
+    except TimeoutError as e:
+        console.print(f"[X] {e}", style="red")
+    except Exception as e:
+        console.print(f"[X] {e.args[0].get('content').get('error')}", style="red")
+
+if __name__ == "__main__":
+    cli()
\ No newline at end of file
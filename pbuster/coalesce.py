@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import copy
+import asyncio
+import threading
+
+
+class _Flight(object):
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+    """Coalesce identical concurrent calls into a single one.
+
+    The first caller of a key (the leader) runs the call; callers arriving while it
+    is in flight wait for it and receive its result, or its exception. Every caller
+    gets its own copy of the result, so callers may modify what they receive.
+
+    Attributes:
+        stats (dict): `calls` actually run and `coalesced` calls that shared one of them.
+
+    Example:
+        flight = SingleFlight()
+        agent = flight.do(route, lambda: fetch(route))
+    """
+
+    def __init__(self):
+        self.stats = {'calls': 0, 'coalesced': 0}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run `fn()`, or wait for the in-flight call of the same `key`, and return its result."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.stats['calls'] += 1
+                leader = True
+            else:
+                flight.followers += 1
+                self.stats['coalesced'] += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+        except BaseException as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                followers = flight.followers  # final: the flight can no longer be joined
+            flight.done.set()
+        return copy.deepcopy(flight.result) if followers else flight.result
+
+
+class AsyncSingleFlight(object):
+    """Asyncio counterpart of `SingleFlight`, for coroutines of a single event loop.
+
+    If the leader is cancelled, followers run the call again instead of being cancelled too.
+
+    Attributes:
+        stats (dict): `calls` actually run and `coalesced` calls that shared one of them.
+    """
+
+    def __init__(self):
+        self.stats = {'calls': 0, 'coalesced': 0}
+        self._flights = {}
+
+    async def do(self, key, factory):
+        """Await `factory()`, or the in-flight call of the same `key`, and return its result."""
+        while key in self._flights:
+            flight = self._flights[key]
+            flight[1] += 1
+            self.stats['coalesced'] += 1
+            try:
+                return copy.deepcopy(await asyncio.shield(flight[0]))
+            except asyncio.CancelledError:
+                if not flight[0].cancelled():
+                    raise  # This caller was cancelled
+                self.stats['coalesced'] -= 1
+
+        flight = self._flights[key] = [asyncio.get_running_loop().create_future(), 0]
+        future = flight[0]
+        self.stats['calls'] += 1
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as ex:
+            future.set_exception(ex)
+            future.exception()  # Retrieved: no warning if there were no followers
+            raise
+        else:
+            future.set_result(result)
+            return copy.deepcopy(result) if flight[1] else result
+        finally:
+            del self._flights[key]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import json
+
+
+class JsonCodec(object):
+    """JSON encoder/decoder used for request payloads and response bodies.
+
+    This is the standard library implementation. Faster ones are picked by
+    `get_codec` when installed. `dumps` may return `str` or `bytes`; both are
+    valid request bodies. Decoding errors are always a `ValueError`.
+    """
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by `orjson`."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by `ujson`."""
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        return self._ujson.dumps(obj, ensure_ascii=False)
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+# Codecs by name, fastest first
+CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': JsonCodec,
+}
+
+
+def get_codec(name=None):
+    """Return a JSON codec.
+
+    Args:
+        name (str): One of `CODECS`, or a codec instance. The fastest installed one if not set.
+
+    Raises:
+        ImportError: If the requested codec is not installed.
+
+    Returns:
+        (JsonCodec): Codec instance.
+    """
+    if isinstance(name, JsonCodec):
+        return name
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError(f"Unknown JSON codec '{name}'. Choose from: {', '.join(CODECS)}")
+        return CODECS[name]()
+    for codec in CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
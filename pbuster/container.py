@@ -1,23 +1,110 @@
 # -*- coding: utf-8 -*-
-import json
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+from pbuster.results import iter_records
+from pbuster.export import Exporter
+from pbuster.polling import Backoff, Poller, PollScheduler, WaitTimeout, WaitCancelled
+
+
+class ContainerPager(object):
+    """Cursor over the pages of `containers/fetch-all`, newest container first.
+
+    Holds no I/O so the sync and async clients share it: fetch `route`, pass the
+    response to `feed`, and repeat while `route` is not None.
+
+    Args:
+        route (str): Route template with `agentId` and `limit` placeholders.
+        agent_id (str): Agent ID to fetch containers for
+        status (str): Only keep containers with this status.
+        since (datetime|float): Stop at containers created before this date (datetime or epoch seconds).
+        page_size (int): Containers fetched per request.
+    """
+
+    # Server-side filters of `containers/fetch-all` for the statuses that map to one
+    STATUS_MODES = {'running': 'unfinalized', 'finished': 'finalized'}
+
+    def __init__(self, route, agent_id, status=None, since=None, page_size=100):
+        self.status = status
+        self.page_size = page_size
+        if since is not None and hasattr(since, 'timestamp'):
+            since = since.timestamp()
+        self.since = since * 1000 if since is not None else None  # createdAt is in milliseconds
+        self.pages = 0
+        self._base = route.format(agent_id, page_size)
+        if status in self.STATUS_MODES:
+            self._base += f'&mode={self.STATUS_MODES[status]}'
+        self._before = None
+        self._seen = set()
+        self.route = self._base
+
+    def feed(self, rsp):
+        """Consume a page and move the cursor to the next one.
+
+        Args:
+            rsp (dict): Response of `route`.
+
+        Returns:
+            (list): Containers of the page matching the filters.
+        """
+        containers = rsp.get('containers', []) if isinstance(rsp, dict) else rsp
+        self.pages += 1
+        self.route = None
+        matches = []
+        before = None
+        fresh = 0
+        for container in containers:
+            if container.get('id') in self._seen:
+                continue
+            self._seen.add(container.get('id'))
+            fresh += 1
+            if self.since is not None and container.get('createdAt', 0) < self.since:
+                return matches  # Older ones follow: nothing left to yield
+            if self.status is None or container.get('status') == self.status:
+                matches.append(container)
+            if container.get('endedAt') is not None:
+                before = container['endedAt'] if before is None else min(before, container['endedAt'])
+
+        # A short page, a page of already seen containers or no cursor means it was the last page
+        if fresh and len(containers) >= self.page_size and before is not None and before != self._before:
+            self._before = before
+            self.route = f'{self._base}&beforeEndedAt={before}'
+        return matches
+
 
 class Container(object):
 
     CONTAINERS = "containers/fetch-all?agentId={}"
+    CONTAINERS_PAGE = "containers/fetch-all?agentId={}&limit={}"
     CONTAINER = "containers/fetch?id={}&withResultObject=2&withOutput=true&withRuntimeEvents=true&withNewerAndOlderContainerId=false"
     CONTAINER_OUTPUT = "containers/fetch-output?id={}&raw={}"
+    CONTAINER_OUTPUT_FROM = "containers/fetch-output?id={}&raw=true&fromOutputPos={}"
     CONTAINER_RESULTS = "containers/fetch-result-object?id={}"
 
     WAIT_TIME = 2  # seconds
+    MAX_WAIT_TIME = 15  # seconds
+    MAX_CONCURRENCY = 8  # requests in flight when waiting for many containers
+    MAX_RATE = 50  # polls per second when waiting for many containers, first polls included
+    PAGE_SIZE = 100  # containers per request in iter
+    WEBHOOK_WAIT_TIME = 30  # seconds, safety-net polling while a webhook is expected
+    WEBHOOK_MAX_WAIT_TIME = 300  # seconds
 
-    def __init__(self, req):
+    def __init__(self, req, polling=None, webhook=None):
         """Initialize Container API client
         
         Args:
             req (RequestHandler): Request handler instance for making API requests
+            polling (Backoff): Default polling strategy for `wait`. Exponential backoff from `WAIT_TIME` to `MAX_WAIT_TIME` if not set.
+            webhook (WebhookReceiver): Receiver resolving waits as soon as the webhook of their container arrives.
+                Waits then only poll from `WEBHOOK_WAIT_TIME` to `WEBHOOK_MAX_WAIT_TIME`, against lost webhooks.
         """
         self.req = req
+        self.polling = polling or Backoff(min_interval=self.WAIT_TIME, max_interval=self.MAX_WAIT_TIME)
+        self.webhook = webhook
+        self.webhook_polling = Backoff(min_interval=self.WEBHOOK_WAIT_TIME, max_interval=self.WEBHOOK_MAX_WAIT_TIME)
+        self.poll_stats = {'waits': 0, 'polls': 0, 'timeouts': 0, 'cancelled': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
     
     
     def list(self, agent_id):
@@ -31,6 +118,25 @@ class Container(object):
         """
         return self.req.get(self.CONTAINERS.format(agent_id))['containers']
 
+    def iter(self, agent_id, status=None, since=None, page_size=PAGE_SIZE):
+        """Iterate over the containers of a specific agent, newest first, one page at a time
+
+        Pages are only fetched as the iteration goes on, so stopping early or passing
+        `since` avoids downloading the whole history of the agent.
+
+        Args:
+            agent_id (str): Agent ID to fetch containers for
+            status (str): Only yield containers with this status, e.g. 'running'. Filtered server-side when possible.
+            since (datetime|float): Stop at containers created before this date (datetime or epoch seconds).
+            page_size (int): Containers fetched per request.
+
+        Yields:
+            (dict): Containers of the agent.
+        """
+        pager = ContainerPager(self.CONTAINERS_PAGE, agent_id, status, since, page_size)
+        while pager.route is not None:
+            yield from pager.feed(self.req.get(pager.route))
+
     def get(self, container_id):
         """Fetch a specific container by ID with results and output
         
@@ -54,6 +160,60 @@ class Container(object):
         """
         return self.req.get(self.CONTAINER_OUTPUT.format(container_id, str(raw).lower()))['output']
     
+    def tail(self, container_id, follow=True, position=0, polling=None, timeout=None, cancel=None):
+        """Stream the output of a specific container line by line
+
+        Only the output produced after the current position is fetched on every poll,
+        and only the last incomplete line is kept in memory.
+
+        Args:
+            container_id (str): Container ID to tail
+            follow (bool): Keep polling until the container finishes. If False, stop after the first fetch.
+            position (int): Output position to start from. 0 streams the whole output.
+            polling (Backoff): Polling strategy used while following.
+            timeout (float): Seconds to follow before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to stop following with `WaitCancelled`.
+
+        Yields:
+            (str): Output lines, without trailing newline.
+        """
+        poller = self._poller(polling, timeout, cancel)
+        pending = ''
+        finished = False
+        while True:
+            rsp = self.req.get(self.CONTAINER_OUTPUT_FROM.format(container_id, position))
+            chunk, position = self._output_chunk(rsp, position)
+            lines = (pending + chunk).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line
+
+            if not follow or finished or self._output_finished(rsp):
+                break
+            if rsp.get('isAgentRunning') is None:
+                # No running flag in the response: check the container, then fetch the remaining output once more
+                finished = self.is_finished(self.get(container_id))
+                if finished:
+                    continue
+            poller.sleep()
+
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _output_chunk(rsp, position):
+        """Return the new output of a `fetch-output` response and the next cursor position."""
+        output = rsp.get('output') or ''
+        if rsp.get('outputPos') is not None:
+            # Server honored `fromOutputPos` and only sent the new output
+            return output, rsp['outputPos']
+        return output[position:], len(output)
+
+    @staticmethod
+    def _output_finished(rsp):
+        """Tell from a `fetch-output` response whether the container stopped producing output."""
+        return rsp.get('isAgentRunning') is False and rsp.get('status') != 'running'
+
     def results(self, container_id):
         """Fetch the results of a specific container by ID
         
@@ -64,33 +224,268 @@ class Container(object):
             (dict): A dictionary containing the container's results.
         """
         rsp = self.req.get(self.CONTAINER_RESULTS.format(container_id))
+        return self._parse_results(rsp)
+
+    def iter_results(self, container_id, fields=None):
+        """Stream the results of a specific container by ID, one record at a time
+
+        The response is parsed while it is downloaded, so memory stays bounded
+        whatever the size of the results.
+
+        Args:
+            container_id (str): Container ID to fetch results for
+            fields (list): Keep only these keys of every record. All keys if not set.
+
+        Yields:
+            (dict): Result records, in the order the script saved them.
+        """
+        return iter_records(self.req.stream(self.CONTAINER_RESULTS.format(container_id)), fields)
+
+    def export(self, container_ids, path, format='ndjson', fields=None, batch_size=Exporter.BATCH_SIZE,
+               sample_size=Exporter.SAMPLE_SIZE, on_batch=None):
+        """Stream the results of one or more containers to an NDJSON, CSV or Parquet file
+
+        Args:
+            container_ids (list): Container IDs whose results are exported, in order.
+            path (str): Output file, or '-' for stdout (text formats only).
+            format (str): 'ndjson', 'csv' or 'parquet'.
+            fields (list): Keep only these keys of every record. All keys if not set.
+            batch_size (int): Records written at once.
+            sample_size (int): Records used to infer the CSV columns or the Parquet schema.
+            on_batch (callable): Called with the running stats after every batch written.
+
+        Returns:
+            (dict): Export stats, including records and records_per_second.
+        """
+        exporter = Exporter(self, format=format, batch_size=batch_size, sample_size=sample_size, fields=fields)
+        return exporter.export(container_ids, path, on_batch=on_batch)
+
+    def _parse_results(self, rsp):
+        """Decode the last record of a `fetch-result-object` response."""
         try:
             if not rsp.get('resultObject'):
                 return {}
             else:
-                return json.loads(rsp.get('resultObject', {})).pop()
-        except json.JSONDecodeError:
+                return self.req.codec.loads(rsp.get('resultObject', {})).pop()
+        except ValueError:
             return rsp
 
-    def wait(self, container_id):
+    def wait(self, container_id, polling=None, timeout=None, cancel=None):
         """Wait for completion of a specific container by ID
 
         Args:
             container_id (str): Container ID to wait for
+            polling (Backoff): Polling strategy. Defaults to the one the client was built with.
+            timeout (float): Seconds to wait before raising `WaitTimeout`. Waits forever if not set.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
 
         Returns:
             (dict): A dictionary containing the container's output after it has finished executing.
         """
-        container = self.get(container_id)
-        exitCode = container.get('exitCode', None)
-        status = container.get('status')
+        completion = self.webhook.expect(container_id) if self.webhook is not None else None
+        poller = self._poller(self.webhook_polling if completion is not None else polling, timeout, cancel)
+        outcome = None
+        try:
+            container = self.poll(container_id, poller)
+            while not self.is_finished(container):
+                if completion is not None and not completion.done:
+                    poller.sleep(wake=completion)
+                    if completion.done:
+                        poller.switch(polling or self.polling)  # Poll promptly until the API agrees
+                else:
+                    poller.sleep()
+                container = self.poll(container_id, poller)
+            return container
+        except WaitTimeout:
+            outcome = 'timeouts'
+            raise
+        except WaitCancelled:
+            outcome = 'cancelled'
+            raise
+        finally:
+            if completion is not None:
+                self.webhook.discard(completion)
+            self.record_wait(poller, outcome)
+
+    def as_completed(self, container_ids, polling=None, timeout=None, cancel=None,
+                     max_concurrency=MAX_CONCURRENCY, max_rate=MAX_RATE):
+        """Wait for many containers at once, yielding each one as soon as it finishes
+
+        Every container is polled from a single scheduling loop, so the number of requests
+        in flight and the request rate stay bounded whatever the number of containers.
+        Polls are rate-paced, the first ones included: N containers take at least N / `max_rate`
+        seconds to all be polled once, so raise `max_rate` to wait for thousands of short runs.
+
+        Args:
+            container_ids (list): Container IDs to wait for
+            polling (Backoff): Polling strategy applied to every container.
+            timeout (float): Seconds to wait for all containers before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+            max_concurrency (int): Maximum number of requests in flight.
+            max_rate (float): Maximum number of polls per second, `MAX_RATE` by default. `None` disables pacing.
+
+        Yields:
+            (dict): Each container after it has finished executing, in completion order.
+        """
+        for _, container in self._as_completed(container_ids, polling, timeout, cancel, max_concurrency, max_rate):
+            yield container
+
+    def wait_many(self, container_ids, polling=None, timeout=None, cancel=None,
+                  max_concurrency=MAX_CONCURRENCY, max_rate=MAX_RATE):
+        """Wait for many containers to finish
+
+        Polls are rate-paced, see `as_completed`.
+
+        Args:
+            container_ids (list): Container IDs to wait for
+            polling (Backoff): Polling strategy applied to every container.
+            timeout (float): Seconds to wait for all containers before raising `WaitTimeout`.
+            cancel (CancellationToken): Token to abort the wait with `WaitCancelled`.
+            max_concurrency (int): Maximum number of requests in flight.
+            max_rate (float): Maximum number of polls per second, `MAX_RATE` by default. `None` disables pacing.
+
+        Returns:
+            (dict): Finished containers keyed by container ID.
+        """
+        return dict(self._as_completed(container_ids, polling, timeout, cancel, max_concurrency, max_rate))
+
+    def _as_completed(self, container_ids, polling, timeout, cancel, max_concurrency, max_rate):
+        """Scheduling loop behind `as_completed`, yielding (container_id, container) pairs."""
+        strategy = polling or self.polling
+        wake = threading.Event()
+        completions, resolved = self._expect_all(container_ids, wake.set)
+        schedule = PollScheduler(container_ids, self.webhook_polling if completions else strategy,
+                                 timeout=timeout, cancel=cancel, max_rate=max_rate)
+        in_flight = {}
+        outcome = None
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            try:
+                while schedule.scheduled or in_flight:
+                    schedule.check(in_flight.values())
+                    if completions:
+                        wake.clear()
+                        self._expedite(schedule, resolved, strategy)
+
+                    while len(in_flight) < max_concurrency:
+                        cid = schedule.pop_due()
+                        if cid is None:
+                            break
+                        time.sleep(schedule.reserve())
+                        in_flight[executor.submit(self.poll, cid, schedule.pollers[cid])] = cid
+
+                    if not in_flight:
+                        if completions:
+                            self._idle(wake, schedule.idle_time(), cancel)
+                        elif cancel is not None:
+                            cancel.wait(schedule.idle_time())
+                        else:
+                            time.sleep(schedule.idle_time())
+                        continue
+
+                    idle = schedule.idle_time() if len(in_flight) < max_concurrency else schedule.remaining()
+                    if completions:
+                        idle = min(idle, self.webhook.CANCEL_CHECK) if idle is not None else self.webhook.CANCEL_CHECK
+                    done, _ = wait_futures(in_flight, timeout=idle, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        cid = in_flight.pop(future)
+                        container = future.result()
+                        if self.is_finished(container):
+                            self.record_wait(schedule.pollers.pop(cid))
+                            yield cid, container
+                        else:
+                            schedule.reschedule(cid)
+            except WaitTimeout:
+                outcome = 'timeouts'
+                raise
+            except WaitCancelled:
+                outcome = 'cancelled'
+                raise
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                for poller in schedule.pollers.values():
+                    self.record_wait(poller, outcome)
+                for completion in completions.values():
+                    self.webhook.discard(completion)
+
+    def _expect_all(self, container_ids, notify):
+        """Expect the webhooks of many containers.
+
+        Args:
+            container_ids (list): Container IDs to expect webhooks for.
+            notify (callable): Called without arguments, from the receiver's thread, when a webhook arrives.
 
+        Returns:
+            (tuple): Completions keyed by container ID (empty without webhook receiver),
+                and a queue receiving the IDs of the containers whose webhook arrived.
+        """
+        completions, resolved = {}, queue.SimpleQueue()
+        if self.webhook is None:
+            return completions, resolved
+
+        def on_done(cid):
+            resolved.put(cid)
+            notify()
+
+        for cid in dict.fromkeys(container_ids):
+            completions[cid] = self.webhook.expect(cid)
+            completions[cid].add_done_callback(lambda _, cid=cid: on_done(cid))
+        return completions, resolved
+
+    @staticmethod
+    def _expedite(schedule, resolved, strategy):
+        """Poll the containers whose webhook arrived right away, then with the regular strategy."""
+        while not resolved.empty():
+            cid = resolved.get()
+            if cid in schedule.pollers:
+                schedule.pollers[cid].switch(strategy)
+                schedule.expedite(cid)
+
+    def _idle(self, wake, idle, cancel):
+        """Sleep until the next poll is due or a webhook arrives, checking `cancel` regularly."""
+        deadline = time.monotonic() + idle if idle is not None else None
+        while not wake.is_set() and not (cancel is not None and cancel.cancelled):
+            remaining = deadline - time.monotonic() if deadline is not None else self.webhook.CANCEL_CHECK
+            if remaining <= 0:
+                break
+            wake.wait(min(remaining, self.webhook.CANCEL_CHECK))
+
+    def _poller(self, polling=None, timeout=None, cancel=None):
+        return Poller(polling or self.polling, timeout=timeout, cancel=cancel)
+
+    def poll(self, container_id, poller):
+        """Fetch a container once on behalf of a wait, counting the poll in `poller`
+
+        Meant for loops watching containers themselves, such as `LaunchScheduler`.
+
+        Args:
+            container_id (str): Container ID to fetch
+            poller (Poller): State of the wait.
+
+        Returns:
+            (dict): The container, finished or not (see `is_finished`).
+        """
+        poller.polls += 1
+        return self.get(container_id)
+
+    def record_wait(self, poller, outcome=None):
+        """Add the polls of a finished wait to `poll_stats`
+
+        Args:
+            poller (Poller): State of the wait.
+            outcome (str): 'timeouts', 'cancelled' or 'failed' if the wait did not end with a finished container.
+        """
+        with self._stats_lock:
+            self.poll_stats['waits'] += 1
+            self.poll_stats['polls'] += poller.polls
+            if outcome:
+                self.poll_stats[outcome] += 1
+        if self.req.hooks.active:
+            self.req.hooks.emit('wait', {'polls': poller.polls, 'outcome': outcome})
+
+    @staticmethod
+    def is_finished(container):
+        """Tell whether a container reached a terminal state."""
         # [!] Checking exitCode instead of status because
         #     it changes to 'finished' before the container is actually done.
-        while exitCode is None or status == "running":
-            container = self.get(container_id)
-            exitCode = container.get('exitCode')
-            status = container.get('status')
-            time.sleep(self.WAIT_TIME)
-
-        return container
\ No newline at end of file
+        return container.get('exitCode') is not None and container.get('status') != "running"
\ No newline at end of file
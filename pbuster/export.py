@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+import io
+import csv
+import sys
+import json
+import time
+
+
+def _scalar(value):
+    """Nested values are written as JSON text in tabular formats."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _row(record):
+    """Records that are not objects are written in a single `value` column."""
+    return record if isinstance(record, dict) else {'value': record}
+
+
+class NdjsonWriter(object):
+    """Write records as one JSON document per line."""
+
+    binary = False
+
+    def __init__(self, file, sample_size=None):
+        self.file = file
+
+    def write(self, records):
+        self.file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+
+    def close(self):
+        pass
+
+
+class CsvWriter(object):
+    """Write records as CSV, with the columns inferred from the first `sample_size` records.
+
+    Keys first seen after the sample are not written; they are counted in `dropped_fields`.
+    """
+
+    binary = False
+
+    def __init__(self, file, sample_size=100):
+        self.file = file
+        self.sample_size = sample_size
+        self.columns = None
+        self.dropped_fields = set()
+        self._sample = []
+        self._writer = None
+
+    def _start(self):
+        columns = {}
+        for record in self._sample:
+            columns.update(dict.fromkeys(_row(record)))
+        self.columns = list(columns)
+        self._writer = csv.DictWriter(self.file, self.columns, extrasaction='ignore')
+        self._writer.writeheader()
+        sample, self._sample = self._sample, []
+        self._write(sample)
+
+    def _write(self, records):
+        for record in map(_row, records):
+            if record.keys() - self.columns:
+                self.dropped_fields.update(record.keys() - self.columns)
+            self._writer.writerow({key: _scalar(value) for key, value in record.items()})
+
+    def write(self, records):
+        if self._writer is None:
+            self._sample.extend(records)
+            if len(self._sample) >= self.sample_size:
+                self._start()
+        else:
+            self._write(records)
+
+    def close(self):
+        if self._writer is None:
+            self._start()
+
+
+class ParquetWriter(object):
+    """Write records as Parquet row groups, one per batch. Requires `pyarrow`.
+
+    The schema is inferred from the first `sample_size` records. Nested values are
+    stored as JSON text, and columns that are always null or of mixed types in the
+    sample as strings. The schema cannot change once the first row group is written:
+    later keys are counted in `dropped_fields`, and values that do not fit the type of
+    their column are written as JSON text in string columns and as null in the others,
+    counted in `mismatched_fields`.
+    """
+
+    binary = True
+
+    def __init__(self, file, sample_size=100):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet export requires the pyarrow package (the parquet extra).")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.file = file
+        self.sample_size = sample_size
+        self.schema = None
+        self.dropped_fields = set()
+        self.mismatched_fields = set()
+        self._sample = []
+        self._writer = None
+
+    @staticmethod
+    def _rows(records):
+        return [{key: _scalar(value) for key, value in _row(record).items()} for record in records]
+
+    def _array(self, values, type=None):
+        """Arrow array of `values`, None if they do not fit `type` (or a single inferred type)."""
+        try:
+            return self.pa.array(values, type=type)
+        except (self.pa.ArrowInvalid, self.pa.ArrowTypeError, OverflowError):
+            return None
+
+    def _infer(self, rows):
+        columns = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        fields = []
+        for name in columns:
+            array = self._array([row.get(name) for row in rows])
+            if array is None or self.pa.types.is_null(array.type):
+                fields.append(self.pa.field(name, self.pa.string()))
+            else:
+                fields.append(self.pa.field(name, array.type))
+        return self.pa.schema(fields)
+
+    def _column(self, field, values):
+        array = self._array(values, field.type)
+        if array is not None:
+            return array
+        self.mismatched_fields.add(field.name)
+        if self.pa.types.is_string(field.type):
+            values = [value if value is None or isinstance(value, str) else json.dumps(value) for value in values]
+        else:
+            values = [value if self._array([value], field.type) is not None else None for value in values]
+        return self.pa.array(values, type=field.type)
+
+    def _table(self, rows):
+        for row in rows:
+            if row.keys() - self.schema.names:
+                self.dropped_fields.update(row.keys() - self.schema.names)
+        columns = [self._column(field, [row.get(field.name) for row in rows]) for field in self.schema]
+        return self.pa.Table.from_arrays(columns, schema=self.schema)
+
+    def _start(self):
+        sample, self._sample = self._rows(self._sample), []
+        self.schema = self._infer(sample)
+        self._writer = self.pq.ParquetWriter(self.file, self.schema)
+        self._writer.write_table(self._table(sample))
+
+    def write(self, records):
+        if self._writer is None:
+            self._sample.extend(records)
+            if len(self._sample) >= self.sample_size:
+                self._start()
+        else:
+            self._writer.write_table(self._table(self._rows(records)))
+
+    def close(self):
+        if self._writer is None:
+            self._start()
+        self._writer.close()
+
+
+class Exporter(object):
+    """Stream container results to a file without holding them in memory.
+
+    Records are pulled from `Container.iter_results` and written in batches, so
+    peak memory depends on `batch_size`, not on the size of the results.
+
+    Args:
+        container (Container): Container client used to fetch the results.
+        format (str): Output format, one of `FORMATS`.
+        batch_size (int): Records written at once.
+        sample_size (int): Records used to infer the CSV columns or the Parquet schema.
+        fields (list): Keep only these keys of every record. All keys if not set.
+
+    Example:
+        stats = Exporter(pb.container, format='csv').export(['123', '456'], 'results.csv')
+        print(stats['records_per_second'])
+    """
+
+    FORMATS = {
+        'ndjson': NdjsonWriter,
+        'csv': CsvWriter,
+        'parquet': ParquetWriter,
+    }
+    BATCH_SIZE = 1000
+    SAMPLE_SIZE = 100
+
+    def __init__(self, container, format='ndjson', batch_size=BATCH_SIZE, sample_size=SAMPLE_SIZE, fields=None):
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown export format '{format}'. Choose from: {', '.join(self.FORMATS)}")
+        self.container = container
+        self.format = format
+        self.batch_size = batch_size
+        self.sample_size = sample_size
+        self.fields = fields
+
+    def _open(self, path):
+        binary = self.FORMATS[self.format].binary
+        if path == '-':
+            if binary:
+                raise ValueError(f"Cannot write {self.format} to stdout.")
+            return sys.stdout, False
+        if binary:
+            return open(path, 'wb'), True
+        return io.open(path, 'w', encoding='utf-8', newline=''), True
+
+    def export(self, container_ids, path, on_batch=None):
+        """Export the results of one or more containers to a single file
+
+        Args:
+            container_ids (list): Container IDs whose results are exported, in order.
+            path (str): Output file, or '-' for stdout (text formats only).
+            on_batch (callable): Called with the running stats after every batch written.
+
+        Returns:
+            (dict): Export stats: containers, records, seconds and records_per_second, plus the
+                `dropped_fields` and `mismatched_fields` of the CSV and Parquet writers when there are any.
+        """
+        if isinstance(container_ids, str):
+            container_ids = [container_ids]
+        stats, writer, file, owned = self._start(path)
+        try:
+            batch = []
+            for container_id in container_ids:
+                for record in self.container.iter_results(container_id, self.fields):
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        self._flush(writer, batch, stats, on_batch)
+                        batch = []
+                stats['containers'] += 1
+            self._flush(writer, batch, stats, on_batch)
+            writer.close()
+        finally:
+            if owned:
+                file.close()
+        return self._finish(writer, stats)
+
+    async def aexport(self, container_ids, path, on_batch=None):
+        """Asyncio version of `export()`, for containers of `AsyncPhantomBuster`."""
+        if isinstance(container_ids, str):
+            container_ids = [container_ids]
+        stats, writer, file, owned = self._start(path)
+        try:
+            batch = []
+            for container_id in container_ids:
+                async for record in self.container.iter_results(container_id, self.fields):
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        self._flush(writer, batch, stats, on_batch)
+                        batch = []
+                stats['containers'] += 1
+            self._flush(writer, batch, stats, on_batch)
+            writer.close()
+        finally:
+            if owned:
+                file.close()
+        return self._finish(writer, stats)
+
+    def _start(self, path):
+        """Open the output. Returns the stats, the writer, the file and whether to close it."""
+        stats = {'format': self.format, 'path': path, 'containers': 0, 'records': 0,
+                 'seconds': 0.0, 'records_per_second': 0.0}
+        self._started = time.monotonic()
+        file, owned = self._open(path)
+        try:
+            writer = self.FORMATS[self.format](file, self.sample_size)
+        except BaseException:
+            if owned:
+                file.close()
+            raise
+        return stats, writer, file, owned
+
+    def _flush(self, writer, batch, stats, on_batch):
+        writer.write(batch)
+        stats['records'] += len(batch)
+        stats['seconds'] = time.monotonic() - self._started
+        stats['records_per_second'] = stats['records'] / stats['seconds'] if stats['seconds'] else 0.0
+        if on_batch is not None:
+            on_batch(stats)
+
+    @staticmethod
+    def _finish(writer, stats):
+        if getattr(writer, 'dropped_fields', None):
+            stats['dropped_fields'] = sorted(writer.dropped_fields)
+        if getattr(writer, 'mismatched_fields', None):
+            stats['mismatched_fields'] = sorted(writer.mismatched_fields)
+        return stats
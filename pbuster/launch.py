@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import threading
+
+
+class LaunchPlan(object):
+    """Everything needed to build the launch payload of an agent without fetching it again.
+
+    Attributes:
+        script_id (str): ID of the script run by the agent.
+        arguments (dict): Default arguments of the script.
+        required (frozenset): Arguments required by the script.
+        updated_at (int): `updatedAt` of the agent when the plan was built.
+        expires_at (float): Monotonic time after which the plan must be rebuilt.
+    """
+
+    __slots__ = ('script_id', 'arguments', 'required', 'updated_at', 'expires_at', '_source')
+
+    def __init__(self, script_id, settings, updated_at, expires_at, source):
+        self.script_id = script_id
+        self.arguments = dict(settings.get('arguments', {}))
+        self.required = frozenset(settings.get('required', []))
+        self.updated_at = updated_at
+        self.expires_at = expires_at
+        self._source = source
+
+    def payload(self, agent_id, arguments=None):
+        """Build the launch payload merging the script defaults and user arguments.
+
+        Args:
+            agent_id (str): Agent ID to launch
+            arguments (dict): Arguments to send with the launch request.
+
+        Raises:
+            ValueError: If any argument required by the script is missing.
+
+        Returns:
+            (dict): Payload for `agents/launch`.
+        """
+        merged = dict(self.arguments)
+        merged.update(arguments or {})
+
+        # Ensure sessionCookie is set, either from arguments or environment variable
+        if 'sessionCookie' not in merged:
+            merged['sessionCookie'] = os.getenv('PHANTOMBUSTER_LINKEDIN_COOKIE')
+
+        # Raise exception if required_args are missing.
+        if not self.required.issubset(merged.keys()):
+            raise ValueError(f"Missing required arguments: {sorted(self.required)}")
+
+        return {'id': agent_id, 'arguments': merged}
+
+
+class LaunchPlanCache(object):
+    """Thread-safe cache of `LaunchPlan` keyed by agent ID.
+
+    A plan is rebuilt when its TTL expires, when the agent `updatedAt` seen in a
+    fresher agent payload changes, or when the script settings files are reloaded.
+
+    Args:
+        script_settings (ScriptSettingsRegistry): Registry providing the script defaults.
+        ttl (float): Seconds a plan is valid. `None` keeps plans until invalidated.
+    """
+
+    def __init__(self, script_settings, ttl=300):
+        self.script_settings = script_settings
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0}
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_id):
+        """Return the valid plan of an agent, or None if it must be (re)built."""
+        plan = self._plans.get(str(agent_id))
+        valid = plan is not None \
+            and (plan.expires_at is None or plan.expires_at > time.monotonic()) \
+            and plan._source is self.script_settings.scripts
+        with self._lock:
+            self.stats['hits' if valid else 'misses'] += 1
+        return plan if valid else None
+
+    def put(self, agent_id, agent):
+        """Build and store the plan of an agent from its `agents/fetch` payload.
+
+        Args:
+            agent_id (str): Agent ID
+            agent (dict): Agent details, at least `scriptId` and optionally `updatedAt`.
+
+        Returns:
+            (LaunchPlan): The plan, reused as is if the agent did not change since it was built.
+        """
+        agent_id = str(agent_id)
+        source = self.script_settings.scripts
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            plan = self._plans.get(agent_id)
+            if plan is not None and plan._source is source and plan.updated_at is not None \
+                    and plan.updated_at == agent.get('updatedAt') and plan.script_id == agent.get('scriptId'):
+                plan.expires_at = expires_at
+                return plan
+            script_id = agent.get('scriptId')
+            plan = LaunchPlan(script_id, source.get(str(script_id), {}), agent.get('updatedAt'), expires_at, source)
+            self._plans[agent_id] = plan
+            return plan
+
+    def invalidate(self, agent_id=None):
+        """Drop the plan of an agent, or every plan if no agent ID is given."""
+        with self._lock:
+            if agent_id is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(str(agent_id), None)
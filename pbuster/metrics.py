@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+import bisect
+import threading
+from collections import Counter
+
+
+class Hooks(object):
+    """Instrumentation hooks of a `RequestHandler`.
+
+    Listeners are called with a `call` dict shared by every event of the same API call,
+    so a listener may keep its own state in it (use a key of your own). Events:
+
+        before_request  Once per call: `method`, `route`, `url`, `bytes_out`.
+        retry           Before every retry: `attempt`, `delay`, and `status_code` or `error`.
+        error           When the last attempt fails, before `after_request`: the transport `error`,
+                        or the `status_code` of an error response (4xx/5xx).
+        after_request   Once per call, last: `status_code` (None without response), `seconds`,
+                        `bytes_in`, `decode_seconds`, `retries` and `error` (the exception raised, or None).
+        wait            Once per finished `Container.wait`: `polls` and `outcome`.
+
+    Responses served fresh from the response cache send no request and trigger no event.
+    While no listener is registered, requests only pay a single attribute check.
+
+    Example:
+        pb.hooks.add('after_request', lambda call: print(call['route'], call['seconds']))
+    """
+
+    EVENTS = ('before_request', 'retry', 'error', 'after_request', 'wait')
+
+    def __init__(self):
+        self._listeners = {event: () for event in self.EVENTS}
+        self.active = False
+
+    def add(self, event, listener):
+        """Call `listener(call)` on every `event`."""
+        if event not in self._listeners:
+            raise ValueError(f"Unknown event {event!r}. Choose from: {', '.join(self.EVENTS)}")
+        self._listeners[event] += (listener,)
+        self.active = True
+
+    def remove(self, event, listener):
+        self._listeners[event] = tuple(fn for fn in self._listeners[event] if fn != listener)  # Bound methods are equal, not identical
+        self.active = any(self._listeners.values())
+
+    def emit(self, event, call):
+        for listener in self._listeners[event]:
+            listener(call)
+
+    # Helpers used by the request handlers once `active` was checked
+
+    def start(self, method, route, url, body):
+        call = {'method': method, 'route': route.split('?', 1)[0], 'url': url,
+                'bytes_out': len(body) if body else 0, 'retries': 0}
+        self.emit('before_request', call)
+        return call
+
+    def retry(self, call, attempt, delay, res=None, error=None):
+        call['retries'] += 1
+        call.update(attempt=attempt, delay=delay, status_code=res.status_code if res is not None else None, error=error)
+        self.emit('retry', call)
+
+    def error(self, call, res=None, error=None):
+        call.update(status_code=res.status_code if res is not None else None, error=error)
+        self.emit('error', call)
+
+    def finish(self, call, seconds, res=None, error=None, decode_seconds=0.0, bytes_in=None):
+        if bytes_in is None:
+            bytes_in = len(res.content or b'') if res is not None else 0
+        call.update(status_code=res.status_code if res is not None else None, seconds=seconds,
+                    bytes_in=bytes_in, decode_seconds=decode_seconds, error=error)
+        self.emit('after_request', call)
+
+
+class Histogram(object):
+    """Cumulative latency histogram, as exposed by Prometheus.
+
+    Args:
+        buckets (tuple): Upper bounds of the buckets, in seconds, increasing.
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(list): `(upper_bound, count)` pairs, the last bound being `float('inf')`."""
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket. None if empty."""
+        if not self.count:
+            return None
+        rank, lower = q * self.count, 0.0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float('inf'):
+                    return self.buckets[-1]
+                previous = total - self.counts[self.buckets.index(bound)]
+                return lower + (bound - lower) * ((rank - previous) / (total - previous) if total > previous else 0)
+            lower = bound
+        return self.buckets[-1]
+
+
+class _RouteMetrics(object):
+
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.status_codes = Counter()
+        self.errors = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.decode_seconds = 0.0
+
+    def snapshot(self):
+        return {'requests': self.latency.count, 'errors': self.errors, 'retries': self.retries,
+                'status_codes': dict(self.status_codes), 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                'seconds': self.latency.sum, 'decode_seconds': self.decode_seconds,
+                'p50': self.latency.quantile(0.5), 'p99': self.latency.quantile(0.99)}
+
+
+class MetricsCollector(object):
+    """Built-in collector of request metrics, fed by `Hooks`.
+
+    Records per route (query string stripped) and method the latency histogram of
+    API calls (retries included), status codes, errors, retries, bytes sent and
+    received and the time spent decoding responses, plus the polls of every
+    `Container.wait`.
+
+    Args:
+        buckets (tuple): Upper bounds of the latency histogram buckets, in seconds.
+
+    Example:
+        pb = PhantomBuster(metrics=True)
+        ...
+        print(pb.stats()['requests'])
+        print(pb.metrics.prometheus())
+    """
+
+    def __init__(self, buckets=Histogram.BUCKETS):
+        self.buckets = buckets
+        self._routes = {}
+        self._waits = Counter()
+        self._polls = Histogram(buckets=(1, 2, 3, 5, 10, 20, 50, 100))
+        self._lock = threading.Lock()
+
+    def attach(self, hooks):
+        """Start collecting the calls of a `Hooks` instance."""
+        hooks.add('after_request', self._after_request)
+        hooks.add('wait', self._wait)
+        return self
+
+    def detach(self, hooks):
+        hooks.remove('after_request', self._after_request)
+        hooks.remove('wait', self._wait)
+
+    def _after_request(self, call):
+        key = (call['method'], call['route'])
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = _RouteMetrics(self.buckets)
+            metrics.latency.observe(call['seconds'])
+            metrics.status_codes[call['status_code'] or 'error'] += 1
+            metrics.errors += call['error'] is not None
+            metrics.retries += call['retries']
+            metrics.bytes_in += call['bytes_in']
+            metrics.bytes_out += call['bytes_out']
+            metrics.decode_seconds += call['decode_seconds']
+
+    def _wait(self, call):
+        with self._lock:
+            self._waits[call['outcome'] or 'finished'] += 1
+            self._polls.observe(call['polls'])
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._waits.clear()
+            self._polls = Histogram(self._polls.buckets)
+
+    def snapshot(self):
+        """Collected metrics
+
+        Returns:
+            (dict): `requests` keyed by 'METHOD route' (count, errors, retries, status codes, bytes,
+                seconds, decode seconds, estimated p50/p99 latency) and `waits` (outcomes and polls).
+        """
+        with self._lock:
+            requests = {f'{method.upper()} {route}': metrics.snapshot()
+                        for (method, route), metrics in sorted(self._routes.items())}
+            waits = dict(self._waits, polls=int(self._polls.sum),
+                         polls_per_wait=self._polls.sum / self._polls.count if self._polls.count else None)
+        return {'requests': requests, 'waits': waits}
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in samples:
+                rendered = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f'{name}{suffix}{{{rendered}}} {_number(value)}' if rendered else f'{name}{suffix} {_number(value)}')
+
+        with self._lock:
+            routes = sorted(self._routes.items())
+            latency = []
+            for (method, route), metrics in routes:
+                labels = {'method': method.upper(), 'route': route}
+                for bound, total in metrics.latency.cumulative():
+                    latency.append(('_bucket', dict(labels, le='+Inf' if bound == float('inf') else _number(bound)), total))
+                latency.append(('_sum', labels, metrics.latency.sum))
+                latency.append(('_count', labels, metrics.latency.count))
+            metric('pbuster_request_duration_seconds', 'histogram', 'Duration of API calls, retries included.', latency)
+            metric('pbuster_requests_total', 'counter', 'API calls by final status code.',
+                   [('', {'method': m.upper(), 'route': r, 'status': str(code)}, count)
+                    for (m, r), metrics in routes for code, count in sorted(metrics.status_codes.items(), key=str)])
+            for name, attr, help_text in (
+                    ('pbuster_request_errors_total', 'errors', 'API calls that raised an error.'),
+                    ('pbuster_request_retries_total', 'retries', 'Retried attempts.'),
+                    ('pbuster_request_bytes_sent_total', 'bytes_out', 'Request body bytes sent.'),
+                    ('pbuster_response_bytes_received_total', 'bytes_in', 'Response body bytes received.'),
+                    ('pbuster_decode_seconds_total', 'decode_seconds', 'Time spent decoding responses.')):
+                metric(name, 'counter', help_text,
+                       [('', {'method': m.upper(), 'route': r}, getattr(metrics, attr)) for (m, r), metrics in routes])
+            metric('pbuster_container_waits_total', 'counter', 'Finished container waits by outcome.',
+                   [('', {'outcome': outcome}, count) for outcome, count in sorted(self._waits.items())])
+            metric('pbuster_container_polls_total', 'counter', 'Polls made while waiting for containers.',
+                   [('', {}, int(self._polls.sum))])
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9464, addr='127.0.0.1'):
+        """Expose `prometheus()` over HTTP from a background thread, for Prometheus to scrape
+
+        Args:
+            port (int): Port to listen on.
+            addr (str): Address to bind.
+
+        Returns:
+            (ThreadingHTTPServer): The running server; call `shutdown()` to stop it.
+        """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = collector.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='pbuster-metrics', daemon=True).start()
+        return server
+
+
+class OpenTelemetryTracer(object):
+    """Open an OpenTelemetry client span for every API call, fed by `Hooks`.
+
+    Spans are named after the method and route (`GET agents/fetch`) and carry the
+    HTTP method, URL, status code and retry count. Calls that raise are marked as errors.
+
+    Args:
+        tracer (opentelemetry.trace.Tracer): Tracer to use. The one of the global tracer provider if not set.
+    """
+
+    SPAN = '_otel_span'
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("Tracing requires the opentelemetry-api package (the otel extra).")
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('pbuster')
+
+    def attach(self, hooks):
+        """Start tracing the calls of a `Hooks` instance."""
+        hooks.add('before_request', self._before_request)
+        hooks.add('after_request', self._after_request)
+        return self
+
+    def detach(self, hooks):
+        hooks.remove('before_request', self._before_request)
+        hooks.remove('after_request', self._after_request)
+
+    def _before_request(self, call):
+        call[self.SPAN] = self.tracer.start_span(
+            f"{call['method'].upper()} {call['route']}", kind=self._trace.SpanKind.CLIENT,
+            attributes={'http.request.method': call['method'].upper(), 'url.full': call['url'],
+                        'pbuster.route': call['route']})
+
+    def _after_request(self, call):
+        span = call.pop(self.SPAN, None)
+        if span is None:
+            return
+        if call['status_code'] is not None:
+            span.set_attribute('http.response.status_code', call['status_code'])
+        span.set_attribute('pbuster.retries', call['retries'])
+        if call['error'] is not None:
+            span.record_exception(call['error'])
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(call['error'])))
+        span.end()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
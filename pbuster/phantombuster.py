@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 import os
-from pbuster.utils import RequestHandler
+from pbuster.utils import RequestHandler, ScriptSettingsRegistry
+from pbuster.cache import ResponseCache
+from pbuster.ratelimit import RateLimiter
+from pbuster.retry import RetryPolicy, CircuitBreaker
+from pbuster.metrics import MetricsCollector, OpenTelemetryTracer
 from pbuster.org import Org
 from pbuster.script import Script
 from pbuster.agent import Agent
@@ -15,6 +19,14 @@ class PhantomBuster(object):
     Attributes:
         apikey (str): PhantomBuster API key
         headers (dict): Headers for API requests
+        cache (ResponseCache): GET response cache, if enabled
+        rate_limiter (RateLimiter): Rate limiter shared by every request
+        retry_policy (RetryPolicy): Retry policy shared by every request
+        circuit_breaker (CircuitBreaker): Circuit breaker shared by every request, if enabled
+        hooks (Hooks): Instrumentation hooks called around every request
+        metrics (MetricsCollector): Request metrics collector, if enabled
+        tracing (OpenTelemetryTracer): OpenTelemetry tracer, if enabled
+        webhook (WebhookReceiver): Webhook receiver resolving container waits, if enabled
         org (Org): Organization management interface
         script (Script): Script management interface
         agent (Agent): Agent management interface
@@ -23,11 +35,41 @@ class PhantomBuster(object):
 
     BASE_URL = "https://api.phantombuster.com/api/v2/"
 
-    def __init__(self, api_key: str=""):
+    def __init__(self, api_key: str="",
+                 pool_connections: int=RequestHandler.POOL_CONNECTIONS,
+                 pool_maxsize: int=RequestHandler.POOL_MAXSIZE,
+                 keepalive_timeout: float=RequestHandler.KEEPALIVE_TIMEOUT,
+                 script_overlays: list=None,
+                 cache: ResponseCache=None,
+                 rate_limiter: RateLimiter=None,
+                 retry_policy: RetryPolicy=None,
+                 circuit_breaker: CircuitBreaker=None,
+                 codec: str=None,
+                 transport=None,
+                 metrics: MetricsCollector=None,
+                 tracing=None,
+                 coalesce: bool=False,
+                 webhook=None):
         """Initialize PhantomBuster API client
         
         Args:
             api_key (str): PhantomBuster API key
+            pool_connections (int): Number of host connection pools to cache.
+            pool_maxsize (int): Maximum number of keep-alive connections per host.
+            keepalive_timeout (float): Seconds idle connections are kept before being dropped.
+            script_overlays (list): Paths of YAML files with script settings merged on top of the packaged defaults.
+            cache (ResponseCache): Cache for GET responses. `True` uses an in-memory cache with default TTLs. Disabled if not set.
+            rate_limiter (RateLimiter): Client-side rate limiter. Defaults to one following the API rate-limit headers.
+            retry_policy (RetryPolicy): Retry policy for failed requests. Defaults to 3 retries of idempotent requests.
+            circuit_breaker (CircuitBreaker): Circuit breaker failing fast with `CircuitOpenError` while the API is down. `True` uses one with default thresholds. Disabled if not set.
+            codec (str): JSON codec, 'orjson', 'ujson' or 'json'. The fastest installed one if not set.
+            transport (str|Transport): HTTP transport, 'requests', 'httpx', 'http2' (httpx over HTTP/2), 'urllib3', or a `Transport` instance such as `InMemoryTransport`. 'requests' if not set.
+            metrics (MetricsCollector): Collector of per-route request metrics. `True` uses a new one. Disabled if not set.
+            tracing (OpenTelemetryTracer): Opens an OpenTelemetry span per API call. `True` uses the global tracer provider. Disabled if not set.
+            coalesce (bool): Share a single request between identical concurrent GETs (e.g. many threads fetching the same agent).
+                Off by default: a caller joining a request already in flight may get a state read just before its call.
+            webhook (WebhookReceiver): Receiver of the agents' webhooks. Container waits return as soon as the webhook of their
+                container arrives and only poll slowly, as a safety net. Disabled if not set.
 
         Raises:
             ValueError: If API key is not provided or not found in environment variables.
@@ -40,9 +82,73 @@ class PhantomBuster(object):
             "X-Phantombuster-Key-1": self._api_key,
             "Content-Type": "application/json"
         }
-        self._req = RequestHandler(endpoint=self.BASE_URL, headers=self._headers)
+        self._script_settings = ScriptSettingsRegistry(overlays=script_overlays) if script_overlays else None
+        self.cache = ResponseCache() if cache is True else cache or None
+        if self.cache is not None:
+            self.cache.bind(self._api_key, self.BASE_URL)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is True else circuit_breaker or None
+        self._build(pool_connections=pool_connections,
+                    pool_maxsize=pool_maxsize,
+                    keepalive_timeout=keepalive_timeout,
+                    cache=self.cache,
+                    rate_limiter=self.rate_limiter,
+                    retry_policy=self.retry_policy,
+                    circuit_breaker=self.circuit_breaker,
+                    codec=codec,
+                    transport=transport,
+                    coalesce=coalesce)
+        self.hooks = self._req.hooks
+        self.metrics = MetricsCollector() if metrics is True else metrics or None
+        if self.metrics is not None:
+            self.metrics.attach(self.hooks)
+        self.tracing = OpenTelemetryTracer() if tracing is True else tracing or None
+        if self.tracing is not None:
+            self.tracing.attach(self.hooks)
+        self.webhook = webhook
+        self.container.webhook = webhook
+
+    def _build(self, **pool):
+        """Create the request handler and the API interfaces sharing it."""
+        self._req = RequestHandler(endpoint=self.BASE_URL, headers=self._headers, **pool)
 
         self.org = Org(self._req)
         self.script = Script(self._req)
-        self.agent = Agent(self._req)
-        self.container = Container(self._req)
\ No newline at end of file
+        self.container = Container(self._req)
+        self.agent = Agent(self._req, container=self.container, script_settings=self._script_settings)
+
+    def stats(self):
+        """Counters of the client and its components
+
+        Returns:
+            (dict): Polls of container waits, launch plan cache, rate limiter, retry policy, circuit breaker,
+                response cache, GET coalescing and webhook counters, plus per-route `requests` metrics and `waits` when `metrics` is enabled.
+        """
+        stats = {
+            'polls': dict(self.container.poll_stats),
+            'launch_plans': dict(self.agent.plans.stats),
+            'rate_limiter': dict(self.rate_limiter.stats),
+            'retries': dict(self.retry_policy.stats),
+        }
+        if self.circuit_breaker is not None:
+            stats['circuit_breaker'] = dict(self.circuit_breaker.stats)
+        if self.cache is not None:
+            stats['cache'] = dict(self.cache.stats)
+        if self._req.single_flight is not None:
+            stats['coalescing'] = dict(self._req.single_flight.stats)
+        if self.metrics is not None:
+            stats.update(self.metrics.snapshot())
+        if self.webhook is not None:
+            stats['webhook'] = dict(self.webhook.stats)
+        return stats
+
+    def close(self):
+        """Close the client and release every pooled HTTP connection."""
+        self._req.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+import time
+import heapq
+import random
+import asyncio
+import threading
+
+
+class WaitTimeout(TimeoutError):
+    """Raised when a container does not finish before the wait deadline."""
+
+
+class WaitCancelled(Exception):
+    """Raised when a wait is cancelled through its `CancellationToken`."""
+
+
+class CancellationToken(object):
+    """Flag shared between a waiter and whoever may want to abort the wait.
+
+    Calling `cancel()` wakes up any thread sleeping in `Poller.sleep()` immediately.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request the cancellation of every wait using this token."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """bool: Whether `cancel()` has been called."""
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds. Returns True if cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+
+class Backoff(object):
+    """Exponential backoff polling strategy with jitter.
+
+    Args:
+        min_interval (float): First delay between polls, in seconds.
+        max_interval (float): Upper bound for the delay between polls, in seconds.
+        factor (float): Multiplier applied to the delay after every poll.
+        jitter (float): Random +/- fraction applied to every delay to spread polls of concurrent waits.
+    """
+
+    def __init__(self, min_interval=2, max_interval=15, factor=1.5, jitter=0.1):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval.")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def delays(self):
+        """Yield the successive delays between polls, in seconds."""
+        delay = self.min_interval
+        while True:
+            spread = delay * self.jitter
+            yield max(0.0, delay + random.uniform(-spread, spread))
+            delay = min(delay * self.factor, self.max_interval)
+
+
+class Fixed(Backoff):
+    """Polling strategy with a constant delay between polls.
+
+    Args:
+        interval (float): Delay between polls, in seconds.
+    """
+
+    def __init__(self, interval=2):
+        super().__init__(min_interval=interval, max_interval=interval, factor=1, jitter=0)
+
+
+class Poller(object):
+    """State of a single wait: delay sequence, deadline, cancellation and poll count.
+
+    Args:
+        strategy (Backoff): Polling strategy providing the delays.
+        timeout (float): Seconds before giving up with `WaitTimeout`. `None` waits forever.
+        cancel (CancellationToken): Optional token to abort the wait.
+    """
+
+    def __init__(self, strategy, timeout=None, cancel=None):
+        self._delays = strategy.delays()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.cancel = cancel
+        self.polls = 0
+
+    def _check_cancelled(self):
+        if self.cancel is not None and self.cancel.cancelled:
+            raise WaitCancelled("Wait cancelled.")
+
+    def next_delay(self):
+        """Return how long to sleep before the next poll.
+
+        Raises:
+            WaitCancelled: If the token was cancelled.
+            WaitTimeout: If the deadline has passed.
+        """
+        self._check_cancelled()
+        delay = next(self._delays)
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise WaitTimeout(f"Wait timed out after {self.polls} polls.")
+            delay = min(delay, remaining)
+        return delay
+
+    def switch(self, strategy):
+        """Take the next delays from another polling strategy."""
+        self._delays = strategy.delays()
+
+    def sleep(self, wake=None):
+        """Sleep until the next poll, waking up early on cancellation or when `wake` (a webhook `Completion`) is set."""
+        delay = self.next_delay()
+        if wake is not None:
+            wake.wait(delay, self.cancel)
+        elif self.cancel is not None:
+            self.cancel.wait(delay)
+        else:
+            time.sleep(delay)
+        self._check_cancelled()
+
+    async def asleep(self, wake=None):
+        """Asyncio version of `sleep()`."""
+        if wake is not None:
+            await wake.wait_async(self.next_delay())
+        else:
+            await asyncio.sleep(self.next_delay())
+        self._check_cancelled()
+
+
+class PollScheduler(object):
+    """Single polling schedule shared by many containers.
+
+    Keeps a heap of next poll times so one loop can poll every container when it is
+    due, and paces dispatches so the overall request rate never exceeds `max_rate`.
+
+    Args:
+        ids (list): Container IDs to poll.
+        strategy (Backoff): Polling strategy used for every container.
+        timeout (float): Seconds before giving up with `WaitTimeout`. `None` waits forever.
+        cancel (CancellationToken): Optional token to abort the whole schedule.
+        max_rate (float): Maximum number of polls per second. `None` disables pacing.
+    """
+
+    def __init__(self, ids, strategy, timeout=None, cancel=None, max_rate=None):
+        now = time.monotonic()
+        self.pollers = {cid: Poller(strategy) for cid in dict.fromkeys(ids)}
+        self._heap = [(now, i, cid) for i, cid in enumerate(self.pollers)]
+        self._seq = len(self._heap)
+        self._scheduled = {cid: i for _, i, cid in self._heap}  # cid -> sequence of its live heap entry
+        self.deadline = now + timeout if timeout is not None else None
+        self.cancel = cancel
+        self._interval = 1.0 / max_rate if max_rate else 0.0
+        self._next_slot = now
+
+    def add(self, cid, strategy):
+        """Start polling one more container right away."""
+        self.pollers[cid] = Poller(strategy)
+        self._push(cid, time.monotonic())
+
+    def _push(self, cid, at):
+        heapq.heappush(self._heap, (at, self._seq, cid))
+        self._scheduled[cid] = self._seq
+        self._seq += 1
+
+    def _drop_stale(self):
+        """Pop heap entries superseded by `expedite`."""
+        while self._heap and self._scheduled.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    @property
+    def scheduled(self):
+        """int: Number of containers waiting for their next poll."""
+        return len(self._scheduled)
+
+    def check(self, in_flight=()):
+        """Raise if the schedule was cancelled or its deadline has passed.
+
+        Args:
+            in_flight (list): IDs being polled right now, reported as pending on timeout.
+        """
+        if self.cancel is not None and self.cancel.cancelled:
+            raise WaitCancelled("Wait cancelled.")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            pending = ', '.join(list(in_flight) + list(self._scheduled))
+            raise WaitTimeout(f"Wait timed out. Pending containers: {pending}")
+
+    def pop_due(self):
+        """Pop the next container whose poll is due, or return None."""
+        self._drop_stale()
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            cid = heapq.heappop(self._heap)[2]
+            del self._scheduled[cid]
+            return cid
+        return None
+
+    def reserve(self):
+        """Reserve the next dispatch slot. Returns the seconds to wait before using it."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        return slot - now
+
+    def reschedule(self, cid):
+        """Schedule the next poll of a container that is still running."""
+        delay = next(self.pollers[cid]._delays)
+        self._push(cid, time.monotonic() + delay)
+
+    def expedite(self, cid):
+        """Make the next poll of a scheduled container due right away. No-op if it is being polled."""
+        if cid in self._scheduled:
+            self._push(cid, time.monotonic())
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def idle_time(self):
+        """Seconds until the next poll is due, bounded by the deadline. None if nothing is scheduled."""
+        wait = None
+        self._drop_stale()
+        if self._heap:
+            wait = max(0.0, self._heap[0][0] - time.monotonic())
+        remaining = self.remaining()
+        if remaining is not None:
+            wait = remaining if wait is None else min(wait, remaining)
+        return wait
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the API answers `429 Too Many Requests`.
+
+    `args[0]` is the same error dictionary as any other API error.
+
+    Attributes:
+        retry_after (float): Seconds the API asked to wait, if it said so.
+    """
+
+    def __init__(self, err, retry_after=None):
+        super().__init__(err)
+        self.retry_after = retry_after
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket handing out reservations.
+
+    Callers reserve a token and sleep for the returned delay, so threads and
+    asyncio tasks can share the same bucket.
+
+    Args:
+        rate (float): Tokens added per second. `None` disables the limit.
+        capacity (float): Maximum burst size. Defaults to one second worth of tokens.
+    """
+
+    def __init__(self, rate=None, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def _capacity(self):
+        if self.capacity is not None:
+            return self.capacity
+        return max(1.0, self.rate or 1.0)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self):
+        """Take a token. Returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate is None:
+                return pause
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, pause)
+
+    def set_rate(self, rate):
+        """Change the refill rate, keeping the tokens already earned."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self._tokens = min(self._tokens, self._capacity)
+
+    def pause(self, seconds):
+        """Hand out no token for the next `seconds` seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter(object):
+    """Client-side rate limiter every request goes through.
+
+    A global bucket bounds the overall request rate and optional per-route buckets
+    bound endpoint classes (e.g. polling `containers/fetch` vs `agents/launch`).
+    The global budget adapts to the `X-RateLimit-*` / `RateLimit-*` headers of the
+    responses, and `Retry-After` pauses every request for the given time.
+
+    Args:
+        rate (float): Maximum requests per second. `None` only follows the API headers.
+        limits (dict): Maximum requests per second keyed by route path, on top of the global rate.
+        burst (float): Maximum burst size of the buckets. One second worth of requests if not set.
+    """
+
+    def __init__(self, rate=None, limits=None, burst=None):
+        self.max_rate = rate
+        self.bucket = TokenBucket(rate, burst)
+        self.buckets = {route: TokenBucket(limit, burst) for route, limit in (limits or {}).items()}
+        self.stats = {'requests': 0, 'throttled': 0, 'waited': 0.0, 'rate_limited': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path(route):
+        return route.split('?', 1)[0]
+
+    def reserve(self, route):
+        """Reserve a slot for a request. Returns the seconds to wait before sending it."""
+        wait = self.bucket.reserve()
+        bucket = self.buckets.get(self._path(route))
+        if bucket is not None:
+            wait = max(wait, bucket.reserve())
+        with self._lock:
+            self.stats['requests'] += 1
+            if wait > 0:
+                self.stats['throttled'] += 1
+                self.stats['waited'] += wait
+        return wait
+
+    def acquire(self, route):
+        """Block until a request to `route` may be sent."""
+        wait = self.reserve(route)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, route):
+        """Wait without blocking the event loop until a request to `route` may be sent."""
+        wait = self.reserve(route)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _seconds(value):
+        """Parse a delay header given in seconds, as an epoch timestamp or as an HTTP date."""
+        if value is None:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+        if seconds > 1e9:
+            seconds -= time.time()
+        return max(0.0, seconds)
+
+    @staticmethod
+    def _header(headers, *names):
+        for name in names:
+            if headers.get(name) is not None:
+                return headers.get(name)
+        return None
+
+    def retry_after(self, headers):
+        """Seconds asked by a `Retry-After` header, or None."""
+        return self._seconds(headers.get('Retry-After'))
+
+    def update(self, route, status_code, headers):
+        """Adapt the budget to the rate-limit headers of a response.
+
+        Args:
+            route (str): Requested route.
+            status_code (int): Response status code.
+            headers (dict): Response headers.
+        """
+        retry_after = self.retry_after(headers)
+        if status_code == 429:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            self.bucket.pause(retry_after if retry_after is not None else 1.0)
+        elif retry_after is not None:
+            self.bucket.pause(retry_after)
+
+        remaining = self._header(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        reset = self._seconds(self._header(headers, 'X-RateLimit-Reset', 'RateLimit-Reset'))
+        if remaining is None or not reset:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        if remaining <= 0:
+            self.bucket.pause(reset)
+            return
+        # Spread the remaining budget over the window, never above the configured rate
+        rate = remaining / reset
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        self.bucket.set_rate(rate)
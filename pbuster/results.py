@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import re
+import json
+import codecs
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Body of a JSON string: anything but quotes and backslashes, or escape sequences
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+# Escape sequence cut at the end of a chunk: incomplete \uXXXX or high surrogate waiting for its pair
+_TRAILING_ESCAPE = re.compile(
+    r'(?:^|[^\\])(?:\\\\)*((?:\\u[dD][89abAB][0-9a-fA-F]{2})?(?:\\(?:u[0-9a-fA-F]{0,3})?)?)$')
+
+# Characters that may follow a complete array element
+_NUMBER_DELIMITERS = frozenset(',] \t\n\r')
+
+
+class _RecordSplitter(object):
+    """Incrementally split a JSON array (or single value) into its elements."""
+
+    def __init__(self):
+        self.buffer = ''
+        self.mode = None  # 'array', 'value' or 'done'
+        self._retry_at = 0
+
+    def feed(self, text, final=False):
+        self.buffer += text
+        records = []
+        if len(self.buffer) < self._retry_at and not final:
+            return records
+
+        pos = _WHITESPACE.match(self.buffer).end()
+        if self.mode is None:
+            if pos == len(self.buffer):
+                self.buffer = ''
+                return records
+            if self.buffer[pos] == '[':
+                self.mode = 'array'
+                pos += 1
+            else:
+                self.mode = 'value'
+
+        while self.mode != 'done':
+            if self.mode == 'array':
+                pos = _WHITESPACE.match(self.buffer, pos).end()
+                if pos < len(self.buffer) and self.buffer[pos] == ',':
+                    pos = _WHITESPACE.match(self.buffer, pos + 1).end()
+                if pos < len(self.buffer) and self.buffer[pos] == ']':
+                    self.mode = 'done'
+                    pos += 1
+                    break
+            if pos >= len(self.buffer):
+                break
+            try:
+                record, end = _decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # Incomplete record: try again once the buffer doubled, so decoding stays linear
+                self._retry_at = 2 * (len(self.buffer) - pos)
+                break
+            if isinstance(record, (int, float)) and not final and (
+                    end == len(self.buffer) or self.buffer[end] not in _NUMBER_DELIMITERS):
+                break  # A number not followed by a delimiter may continue in the next chunk (`-1.` then `5`)
+            records.append(record)
+            pos = end
+            if self.mode == 'value':
+                self.mode = 'done'
+
+        self.buffer = self.buffer[pos:]
+        if len(self.buffer) < self._retry_at // 2:
+            self._retry_at = 0
+        if final and self.mode == 'array':
+            raise json.JSONDecodeError("Unterminated array", self.buffer, 0)
+        return records
+
+
+class ResultObjectParser(object):
+    """Push parser yielding the records of a `fetch-result-object` response body.
+
+    The `resultObject` value is a JSON document embedded as a string. It is unescaped
+    and split into records chunk by chunk, so only one record and one chunk are held
+    in memory whatever the size of the results.
+
+    Args:
+        fields (list): Keep only these keys of every record. All keys if not set.
+    """
+
+    KEY = '"resultObject"'
+
+    def __init__(self, fields=None):
+        self.fields = list(fields) if fields else None
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._state = 'key'  # key -> colon -> value -> string|raw -> done
+        self._pending = ''
+        self._records = _RecordSplitter()
+
+    def _project(self, records):
+        if self.fields is None:
+            return records
+        return [{field: record.get(field) for field in self.fields} if isinstance(record, dict) else record
+                for record in records]
+
+    def feed(self, data):
+        """Parse a chunk of the response body.
+
+        Args:
+            data (bytes): Next chunk of the body.
+
+        Returns:
+            (list): Records completed by this chunk.
+        """
+        return self._project(self._feed(self._pending + self._utf8.decode(data)))
+
+    def close(self):
+        """Signal the end of the body.
+
+        Raises:
+            json.JSONDecodeError: If the body ended in the middle of the results.
+
+        Returns:
+            (list): Remaining records.
+        """
+        text = self._pending + self._utf8.decode(b'', final=True)
+        records = self._feed(text, final=True)
+        if self._state in ('string', 'raw'):
+            records += self._records.feed('', final=True)
+        return self._project(records)
+
+    def _feed(self, text, final=False):
+        self._pending = ''
+        pos = 0
+        records = []
+        while pos < len(text) and self._state != 'done':
+            if self._state == 'key':
+                found = text.find(self.KEY, pos)
+                if found < 0:
+                    self._pending = text[max(pos, len(text) - len(self.KEY)):]
+                    return records
+                pos = found + len(self.KEY)
+                self._state = 'colon'
+            elif self._state == 'colon':
+                pos = _WHITESPACE.match(text, pos).end()
+                if pos < len(text):
+                    # Not followed by a colon: the text was a string value, not the key
+                    self._state = 'value' if text[pos] == ':' else 'key'
+                    pos += 1
+            elif self._state == 'value':
+                pos = _WHITESPACE.match(text, pos).end()
+                if pos >= len(text):
+                    break
+                char = text[pos]
+                if char == '"':
+                    self._state = 'string'
+                    pos += 1
+                elif char in '[{':
+                    self._state = 'raw'
+                else:
+                    self._state = 'done'  # null or empty results
+            elif self._state == 'string':
+                end = _STRING_BODY.match(text, pos).end()
+                closed = end < len(text) and text[end] == '"'
+                segment = text[pos:end]
+                if not closed and not final:
+                    # Only the tail can hold a cut escape; start on a non-backslash so escapes pair up
+                    start = max(0, pos - 1, len(text) - 16)
+                    while start > max(0, pos - 1) and text[start] == '\\':
+                        start -= 1
+                    trailing = _TRAILING_ESCAPE.search(text, start)
+                    if trailing:
+                        cut = trailing.start(1)
+                        segment = text[pos:cut]
+                        self._pending = text[cut:]
+                records += self._records.feed(json.loads(f'"{segment}"'), final=closed)
+                if closed:
+                    self._state = 'done'
+                return records
+            elif self._state == 'raw':
+                records += self._records.feed(text[pos:])
+                if self._records.mode == 'done':
+                    self._state = 'done'
+                return records
+        return records
+
+
+def iter_records(chunks, fields=None):
+    """Yield the records of a `fetch-result-object` response body given as byte chunks.
+
+    Args:
+        chunks (iterable): Chunks of the response body.
+        fields (list): Keep only these keys of every record.
+
+    Yields:
+        (dict): Result records, one at a time.
+    """
+    parser = ResultObjectParser(fields)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import time
+import random
+import threading
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without sending the request while the circuit breaker is open."""
+
+
+class RetryPolicy(object):
+    """Decide whether a failed request is retried and how long to wait before.
+
+    Idempotent requests (every GET, plus `idempotent_routes`) are retried on
+    connection errors and on `retry_statuses`. Any other request, such as
+    `agents/launch`, is only retried when the failure provably happened before
+    the request was sent (connection refused, DNS or connect timeout) or when the
+    API refused it with `429 Too Many Requests`.
+
+    Args:
+        retries (int): Maximum number of retries per request.
+        backoff (float): Delay before the first retry, in seconds. Doubled on every retry.
+        max_backoff (float): Upper bound for the delay between retries, in seconds.
+        jitter (float): Random +/- fraction applied to every delay.
+        retry_statuses (tuple): Status codes retried for idempotent requests.
+        idempotent_routes (tuple): Non-GET route paths safe to send twice.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=10, jitter=0.1,
+                 retry_statuses=RETRY_STATUSES, idempotent_routes=('agents/stop',)):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_routes = frozenset(idempotent_routes)
+        self.stats = {'retries': 0, 'gave_up': 0}
+        self._lock = threading.Lock()
+
+    def is_idempotent(self, method, route):
+        return method == 'get' or route.split('?', 1)[0] in self.idempotent_routes
+
+    def should_retry(self, method, route, attempt, status_code=None, pre_send=False):
+        """Tell whether a failed attempt must be retried.
+
+        Args:
+            method (str): HTTP method.
+            route (str): Requested route.
+            attempt (int): Number of retries already made.
+            status_code (int): Status code of the response, None on connection errors.
+            pre_send (bool): Whether the connection failed before the request was sent.
+        """
+        if status_code is not None and status_code not in self.retry_statuses:
+            return False
+        safe = pre_send or status_code == 429 or self.is_idempotent(method, route)
+        if not safe:
+            return False
+        if attempt >= self.retries:
+            with self._lock:
+                self.stats['gave_up'] += 1
+            return False
+        with self._lock:
+            self.stats['retries'] += 1
+        return True
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        delay += random.uniform(-delay * self.jitter, delay * self.jitter)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return max(0.0, delay)
+
+
+class CircuitBreaker(object):
+    """Fail fast while the API is down.
+
+    After `failure_threshold` consecutive failures (connection errors or 5xx
+    responses) the circuit opens and requests raise `CircuitOpenError` without
+    being sent. After `reset_timeout` seconds a single trial request is let
+    through: the circuit closes again if it succeeds. A trial request that ends
+    without a response or a connection error (cancelled, or failing in the client)
+    is `abandon`ed so that the next request becomes the trial.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial request.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.stats = {'failures': 0, 'opened': 0, 'rejected': 0}
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self):
+        """Raise `CircuitOpenError` if the request must not be sent.
+
+        Returns:
+            (bool): Whether the request is the trial request of a half-open circuit.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial = False
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.stats['rejected'] += 1
+        raise CircuitOpenError(f"Circuit breaker open after {self._failures} consecutive failures. Retry in a few seconds.")
+
+    def abandon(self):
+        """Let another trial request through, the current one having ended without an outcome."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial = False
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            self.stats['failures'] += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.stats['opened'] += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+import time
+import heapq
+import threading
+from concurrent.futures import Future
+from pbuster.polling import PollScheduler
+
+
+class LaunchScheduler(object):
+    """Local launch queue that never launches past the organization parallelism.
+
+    Launches are kept in a priority queue and dispatched from a background thread
+    only when a parallel slot is free and execution time remains. Slots are freed
+    when the launched containers finish, which the scheduler learns by polling them
+    from a single loop. Quotas come from `Org.usage()` (`orgs/fetch-resources`),
+    refreshed at most every `usage_ttl` seconds.
+
+    Failures never leave a future pending: queued launches fail with the last error
+    once the usage could not be fetched `MAX_USAGE_FAILURES` times in a row (or right
+    away during `shutdown`), and a launched container fails after `MAX_POLL_ERRORS`
+    consecutive errors polling it.
+
+    Args:
+        pb (PhantomBuster): Client used to launch agents and poll containers.
+        usage_ttl (float): Seconds the organization usage is cached.
+        polling (Backoff): Polling strategy used to watch running containers.
+        parallelism (int): Maximum parallel launches. Read from the organization usage if not set.
+
+    Example:
+        with LaunchScheduler(pb) as scheduler:
+            futures = [scheduler.submit(agent_id, args, priority=1) for agent_id, args in jobs]
+            containers = [future.result() for future in futures]
+    """
+
+    USAGE_TTL = 60  # seconds
+    USAGE_RETRY = 2  # seconds before fetching the usage again after a failure
+    MAX_USAGE_FAILURES = 5  # consecutive usage failures before failing the queued launches
+    MAX_POLL_ERRORS = 5  # consecutive poll errors before failing a launched container
+
+    def __init__(self, pb, usage_ttl=USAGE_TTL, polling=None, parallelism=None):
+        self.pb = pb
+        self.usage_ttl = usage_ttl
+        self.polling = polling or pb.container.polling
+        self.parallelism = parallelism
+        self.stats = {'submitted': 0, 'launched': 0, 'completed': 0, 'failed': 0, 'usage_refreshes': 0,
+                      'usage_failures': 0}
+
+        self._queue = []
+        self._seq = 0
+        self._running = {}
+        self._polls = PollScheduler([], self.polling)
+        self._quota = None
+        self._quota_at = 0.0
+        self._usage_failures = 0
+        self._poll_errors = {}
+        self._stopping = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    # -------------------------- quotas --------------------------
+
+    @staticmethod
+    def _read_quota(usage):
+        """Extract (parallelism, running containers, remaining execution time) from `orgs/fetch-resources`.
+
+        Values the API does not return are None.
+        """
+        plan = usage.get('plan') or {}
+        current = usage.get('current') or {}
+        remaining = usage.get('remaining') or {}
+
+        parallelism = plan.get('parallelism', usage.get('parallelism'))
+        running = current.get('parallelism', current.get('runningContainers', usage.get('runningContainers')))
+        execution_time = remaining.get('executionTime')
+        if execution_time is None and plan.get('executionTime') is not None:
+            execution_time = plan['executionTime'] - current.get('executionTime', 0)
+        return parallelism, running, execution_time
+
+    def _refresh_quota(self, force=False):
+        if not force and self._quota is not None and time.monotonic() - self._quota_at < self.usage_ttl:
+            return self._quota
+        try:
+            usage = self.pb.org.usage()
+        except Exception:
+            self._usage_failures += 1
+            self.stats['usage_failures'] += 1
+            raise
+        self._usage_failures = 0
+        parallelism, running, execution_time = self._read_quota(usage)
+        # Containers running on the server that this scheduler did not launch
+        external = max(0, (running or 0) - len(self._running))
+        self._quota = (self.parallelism or parallelism or 1, external, execution_time)
+        self._quota_at = time.monotonic()
+        self.stats['usage_refreshes'] += 1
+        return self._quota
+
+    def free_slots(self):
+        """int: Launches that can be dispatched right now."""
+        parallelism, external, execution_time = self._refresh_quota()
+        if execution_time is not None and execution_time <= 0:
+            return 0
+        return max(0, parallelism - external - len(self._running))
+
+    # -------------------------- queue --------------------------
+
+    def submit(self, agent_id, arguments=None, priority=0):
+        """Queue a launch
+
+        Args:
+            agent_id (str): Agent ID to launch
+            arguments (dict): Arguments to send with the launch request.
+            priority (int): Launches with a higher priority are dispatched first.
+
+        Returns:
+            (Future): Resolves to the finished container, or to the launch error.
+        """
+        future = Future()
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler is shut down.")
+            heapq.heappush(self._queue, (-priority, self._seq, agent_id, arguments, future))
+            self._seq += 1
+            self.stats['submitted'] += 1
+            self._cond.notify()
+        self.start()
+        return future
+
+    @property
+    def pending(self):
+        """int: Launches waiting for a free slot."""
+        return len(self._queue)
+
+    @property
+    def running(self):
+        """int: Containers launched by the scheduler that did not finish yet."""
+        return len(self._running)
+
+    def start(self):
+        """Start the dispatching thread if it is not running."""
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pbuster-launch-scheduler', daemon=True)
+                self._thread.start()
+
+    def shutdown(self, wait=True):
+        """Stop accepting launches. With `wait`, block until every queued launch finished."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+
+    # -------------------------- loop --------------------------
+
+    def _dispatch(self):
+        """Launch queued agents while slots are free."""
+        while self._queue and self.free_slots() > 0:
+            with self._cond:
+                _, _, agent_id, arguments, future = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                container_id = self.pb.agent.launch(agent_id, arguments).get('containerId')
+                if not container_id:
+                    raise ValueError("Failed to launch agent: No container ID returned.")
+            except Exception as ex:
+                self.stats['failed'] += 1
+                future.set_exception(ex)
+                # The server may know better than our count, e.g. slots taken by other clients
+                self._refresh_quota(force=True)
+                continue
+            self.stats['launched'] += 1
+            self._running[container_id] = future
+            self._polls.add(container_id, self.polling)
+
+    def _fail_queued(self, error):
+        """Fail every queued launch with `error`."""
+        with self._cond:
+            queued, self._queue = self._queue, []
+        for item in queued:
+            future = item[-1]
+            if future.set_running_or_notify_cancel():
+                self.stats['failed'] += 1
+                future.set_exception(error)
+
+    def _poll_due(self):
+        """Poll running containers that are due, freeing the slot of finished ones.
+
+        Returns:
+            (int): Number of containers that finished.
+        """
+        completed = 0
+        while True:
+            cid = self._polls.pop_due()
+            if cid is None:
+                return completed
+            future = self._running[cid]
+            try:
+                container = self.pb.container.poll(cid, self._polls.pollers[cid])
+            except Exception as ex:
+                self._poll_errors[cid] = self._poll_errors.get(cid, 0) + 1
+                if self._poll_errors[cid] < self.MAX_POLL_ERRORS:
+                    self._polls.reschedule(cid)
+                    continue
+                del self._running[cid], self._poll_errors[cid]
+                self.pb.container.record_wait(self._polls.pollers.pop(cid), 'failed')
+                self.stats['failed'] += 1
+                completed += 1
+                future.set_exception(ex)
+                continue
+            self._poll_errors.pop(cid, None)
+            if self.pb.container.is_finished(container):
+                del self._running[cid]
+                self.pb.container.record_wait(self._polls.pollers.pop(cid))
+                self.stats['completed'] += 1
+                completed += 1
+                future.set_result(container)
+            else:
+                self._polls.reschedule(cid)
+
+    def _run(self):
+        while True:
+            usage_failed = False
+            try:
+                self._dispatch()
+            except Exception as ex:
+                # Usage could not be fetched: retry shortly, unless it keeps failing or nobody waits for it
+                usage_failed = True
+                if self._stopping or self._usage_failures >= self.MAX_USAGE_FAILURES:
+                    self._fail_queued(ex)
+            if self._poll_due():
+                continue  # Slots were freed: dispatch right away
+
+            with self._cond:
+                if self._stopping and not self._queue and not self._running:
+                    return
+                idle = self._polls.idle_time()
+                if self._queue and not self._running:
+                    # Waiting for quota: check again once the cached usage expires
+                    retry = self.USAGE_RETRY if usage_failed else self.usage_ttl
+                    idle = retry if idle is None else min(idle, retry)
+                self._cond.wait(idle)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+class Store(object):
+    """Local SQLite mirror of agents, containers and scripts.
+
+    `sync` writes only what changed since the last sync: agents and scripts that
+    differ from their mirrored version (their lists are fetched in full, the API
+    cannot filter them by `updatedAt`), and containers created after the newest one
+    already stored (plus the ones that were still running). Queries then run locally, without any
+    API request.
+
+    Args:
+        pb (PhantomBuster): Client used to sync. Not needed to only query the mirror.
+        path (str): SQLite database file. `PHANTOMBUSTER_STORE` or `~/.cache/pbuster/mirror.db` if not set.
+
+    Example:
+        store = Store(pb)
+        store.sync()
+        for container in store.failed_since(hours=24):
+            print(container['id'], container['exitCode'])
+    """
+
+    PATH = os.path.join('~', '.cache', 'pbuster', 'mirror.db')
+    UNFINISHED = ('running', 'starting', 'queued')
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS agents (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        script_id TEXT,
+        last_end_type TEXT,
+        created_at INTEGER,
+        updated_at INTEGER,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS containers (
+        id TEXT PRIMARY KEY,
+        agent_id TEXT NOT NULL,
+        status TEXT,
+        exit_code INTEGER,
+        created_at INTEGER,
+        ended_at INTEGER,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS scripts (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        updated_at INTEGER,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value REAL
+    );
+    CREATE INDEX IF NOT EXISTS agents_updated_at ON agents (updated_at);
+    CREATE INDEX IF NOT EXISTS containers_agent_created ON containers (agent_id, created_at);
+    CREATE INDEX IF NOT EXISTS containers_status_created ON containers (status, created_at);
+    CREATE INDEX IF NOT EXISTS containers_created ON containers (created_at);
+    """
+
+    def __init__(self, pb=None, path=None):
+        self.pb = pb
+        self.path = os.path.expanduser(path or os.getenv('PHANTOMBUSTER_STORE') or self.PATH)
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(self.SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------- sync --------------------------
+
+    def _fetch(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _state(self, key):
+        rows = self._fetch("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_state(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _changed(self, table, items):
+        """Items that are new or differ from their mirrored version, serialized, with the IDs that disappeared."""
+        known = dict(self._fetch(f"SELECT id, data FROM {table}"))
+        changed = []
+        for item in items:
+            data = json.dumps(item, sort_keys=True)
+            if known.get(str(item.get('id'))) != data:
+                changed.append((item, data))
+        deleted = known.keys() - {str(item.get('id')) for item in items}
+        return changed, [(item_id,) for item_id in deleted]
+
+    def sync(self, agents=True, containers=True, scripts=True, agent_ids=None):
+        """Bring the mirror up to date
+
+        Args:
+            agents (bool): Sync agents.
+            containers (bool): Sync the containers of the agents.
+            scripts (bool): Sync scripts.
+            agent_ids (list): Only sync the containers of these agents. All mirrored agents if not set.
+
+        Returns:
+            (dict): Number of rows written per table and the duration of the sync.
+        """
+        if self.pb is None:
+            raise ValueError("A PhantomBuster client is required to sync the store.")
+        started = time.monotonic()
+        stats = {'agents': 0, 'containers': 0, 'scripts': 0}
+        if scripts:
+            stats['scripts'] = self.sync_scripts()
+        if agents:
+            stats['agents'] = self.sync_agents()
+        if containers:
+            if agent_ids is None:
+                agent_ids = [row[0] for row in self._fetch("SELECT id FROM agents")]
+            for agent_id in agent_ids:
+                stats['containers'] += self.sync_containers(agent_id)
+        stats['seconds'] = time.monotonic() - started
+        with self._lock, self._db:
+            self._set_state('synced_at', time.time())
+        return stats
+
+    def sync_scripts(self):
+        """Mirror scripts that changed. Returns the number of scripts written.
+
+        The API has no `updatedAt` filter on `scripts/fetch-all`, so the whole list is
+        fetched; only scripts that differ from their mirrored version are written.
+        """
+        changed, _ = self._changed('scripts', self.pb.script.list())
+        rows = [(str(script.get('id')), script.get('name'), script.get('updatedAt'), data) for script, data in changed]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO scripts (id, name, updated_at, data) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def sync_agents(self):
+        """Mirror agents that changed and drop deleted ones. Returns the number of agents written.
+
+        The API has no `updatedAt` filter on `agents/fetch-all`, so the whole list is
+        fetched (it is also the only way to notice deleted agents); only agents that
+        differ from their mirrored version are written.
+        """
+        changed, deleted = self._changed('agents', self.pb.agent.list())
+        rows = [(str(agent.get('id')), agent.get('name'), agent.get('scriptId'), agent.get('lastEndType'),
+                 agent.get('createdAt'), agent.get('updatedAt'), data) for agent, data in changed]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO agents (id, name, script_id, last_end_type, created_at, updated_at, data) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM agents WHERE id = ?", deleted)
+            self._db.executemany("DELETE FROM containers WHERE agent_id = ?", deleted)
+        return len(rows)
+
+    def sync_containers(self, agent_id):
+        """Mirror the containers of an agent created since the last sync. Returns the number of containers written.
+
+        Pages are fetched newest first down to the newest container already stored, or
+        to the oldest one that was still running so its final status is recorded.
+        """
+        agent_id = str(agent_id)
+        newest, oldest_unfinished = self._fetch(
+            "SELECT MAX(created_at), (SELECT MIN(created_at) FROM containers WHERE agent_id = ? AND status IN ({})) "
+            "FROM containers WHERE agent_id = ?".format(','.join('?' * len(self.UNFINISHED))),
+            (agent_id, *self.UNFINISHED, agent_id))[0]
+        since = min(value for value in (newest, oldest_unfinished) if value is not None) / 1000 if newest else None
+
+        rows = [(str(container.get('id')), agent_id, container.get('status'), container.get('exitCode'),
+                 container.get('createdAt'), container.get('endedAt'), json.dumps(container, sort_keys=True))
+                for container in self.pb.container.iter(agent_id, since=since)]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO containers (id, agent_id, status, exit_code, created_at, ended_at, data) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    @property
+    def synced_at(self):
+        """float: Epoch time of the last sync, None if never synced."""
+        return self._state('synced_at')
+
+    # -------------------------- queries --------------------------
+
+    def _query(self, sql, params=()):
+        return [json.loads(row['data']) for row in self._fetch(sql, params)]
+
+    def agents(self):
+        """(list): Mirrored agents, as returned by `Agent.list`."""
+        return self._query("SELECT data FROM agents ORDER BY created_at")
+
+    def agent(self, agent_id):
+        """(dict): Mirrored agent, or None if unknown."""
+        rows = self._query("SELECT data FROM agents WHERE id = ?", (str(agent_id),))
+        return rows[0] if rows else None
+
+    def agent_status(self, agent_id):
+        """(str): `lastEndType` of a mirrored agent, like `Agent.status`. None if unknown."""
+        rows = self._fetch("SELECT last_end_type FROM agents WHERE id = ?", (str(agent_id),))
+        return (rows[0][0] or "") if rows else None
+
+    def scripts(self):
+        """(list): Mirrored scripts, as returned by `Script.list`."""
+        return self._query("SELECT data FROM scripts ORDER BY name")
+
+    def containers(self, agent_id=None, status=None, since=None, limit=None):
+        """Mirrored containers, newest first
+
+        Args:
+            agent_id (str): Only containers of this agent.
+            status (str): Only containers with this status.
+            since (datetime|float): Only containers created after this date (datetime or epoch seconds).
+            limit (int): Maximum number of containers.
+
+        Returns:
+            (list): Containers, as returned by `Container.list`.
+        """
+        clauses, params = [], []
+        if agent_id is not None:
+            clauses.append("agent_id = ?")
+            params.append(str(agent_id))
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append((since.timestamp() if hasattr(since, 'timestamp') else since) * 1000)
+        sql = "SELECT data FROM containers"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def running_containers(self):
+        """(list): Containers that were running at the last sync."""
+        return self.containers(status='running')
+
+    def failed_since(self, hours=24):
+        """(list): Containers that exited with a non-zero code in the last `hours` hours."""
+        since = (time.time() - hours * 3600) * 1000
+        return self._query("SELECT data FROM containers WHERE exit_code IS NOT NULL AND exit_code != 0 AND created_at >= ? "
+                           "ORDER BY created_at DESC", (since,))
+
+    def average_duration(self):
+        """Average run duration per agent, over finished containers
+
+        Returns:
+            (dict): Seconds keyed by agent ID.
+        """
+        rows = self._fetch("SELECT agent_id, AVG(ended_at - created_at) / 1000.0 FROM containers "
+                           "WHERE ended_at IS NOT NULL AND created_at IS NOT NULL GROUP BY agent_id")
+        return {agent_id: duration for agent_id, duration in rows}
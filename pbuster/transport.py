@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+from http.client import responses
+from urllib.parse import urlsplit, parse_qsl
+import urllib3
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TransportError(ConnectionError):
+    """A request that got no response: connection refused, reset or timed out.
+
+    Args:
+        message (str): Description of the failure.
+        pre_send (bool): Whether the failure happened before the request was sent, so that it is safe to retry.
+    """
+
+    def __init__(self, message, pre_send=False):
+        super().__init__(message)
+        self.pre_send = pre_send
+
+
+class Headers(dict):
+    """Response headers with case-insensitive `get`, as returned by `InMemoryTransport`."""
+
+    def __init__(self, headers=None):
+        super().__init__((key.lower(), value) for key, value in (headers or {}).items())
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class Response(object):
+    """Transport-neutral HTTP response.
+
+    Exposes the attributes `RequestHandler` reads from a `requests.Response`, so every
+    transport returns the same kind of object.
+
+    Args:
+        status_code (int): HTTP status code.
+        content (bytes): Response body. Read from `chunks` on first access if not set.
+        headers (dict): Response headers, with case-insensitive `get`.
+        reason (str): HTTP reason phrase.
+        chunks (callable): Called with a chunk size, yields the body of a streamed response.
+        release (callable): Called once the response is closed, to give its connection back to the pool.
+    """
+
+    def __init__(self, status_code, content=None, headers=None, reason='', chunks=None, release=None):
+        self.status_code = status_code
+        self.headers = headers if headers is not None else Headers()
+        self.reason = reason
+        self._content = content
+        self._chunks = chunks
+        self._release = release
+
+    @property
+    def content(self):
+        """bytes: Response body, read at once."""
+        if self._content is None:
+            self._content = b''.join(self._chunks(65536)) if self._chunks is not None else b''
+        return self._content
+
+    def iter_content(self, chunk_size=65536):
+        """Yield the body in chunks of at most `chunk_size` bytes."""
+        if self._content is not None or self._chunks is None:
+            for start in range(0, len(self.content), chunk_size):
+                yield self.content[start:start + chunk_size]
+        else:
+            yield from self._chunks(chunk_size)
+
+    def close(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Transport(object):
+    """Sends HTTP requests for `RequestHandler`.
+
+    Subclasses implement `send`, turn network failures into `TransportError` and
+    return a response with `status_code`, `headers`, `reason`, `content`,
+    `iter_content()` and `close()`.
+
+    Args:
+        headers (dict): Headers sent with every request. `RequestHandler` adds its own ones.
+    """
+
+    name = None
+
+    def __init__(self, headers=None):
+        self.headers = dict(headers or {})
+
+    def send(self, method, url, body=None, headers=None, stream=False):
+        """Send a request
+
+        Args:
+            method (str): HTTP method, lower case.
+            url (str): Absolute URL, query string included.
+            body (bytes|str): Encoded request body, if any.
+            headers (dict): Headers added to the default ones for this request.
+            stream (bool): Return before the body is downloaded; read it with `iter_content`.
+
+        Returns:
+            (Response): The response, whatever its status code.
+
+        Raises:
+            TransportError: If no response was received.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release every pooled connection."""
+
+
+class RequestsTransport(Transport):
+    """Transport built on a pooled `requests.Session`, the default one.
+
+    The session is recycled once it stayed idle for `keepalive_timeout` seconds: no
+    request in flight, streamed responses included, since the last one ended.
+
+    Args:
+        headers (dict): Headers sent with every request.
+        pool_connections (int): Number of host connection pools to cache.
+        pool_maxsize (int): Maximum number of connections kept alive per host.
+        keepalive_timeout (float): Seconds a pool may stay idle before its connections are dropped. `None` keeps them forever.
+    """
+
+    name = 'requests'
+
+    def __init__(self, headers=None, pool_connections=10, pool_maxsize=10, keepalive_timeout=60):
+        super().__init__(headers)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._last_used = 0.0
+        self._active = 0  # requests in flight, until their response is read or closed
+
+    def _new_session(self):
+        """Build a session with a pooled adapter mounted for http and https."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def session(self):
+        """requests.Session: Pooled session, recycled after `keepalive_timeout` seconds idle."""
+        with self._session_lock:
+            return self._current_session()
+
+    def _current_session(self):
+        now = time.monotonic()
+        idle = now - self._last_used
+        if (self._session is not None and self.keepalive_timeout is not None and not self._active
+                and idle > self.keepalive_timeout):
+            self._session.close()
+            self._session = None
+        if self._session is None:
+            self._session = self._new_session()
+        self._last_used = now
+        return self._session
+
+    def _checkout(self):
+        """Return the session for a new request, which must be `_checkin`ed once done with it."""
+        with self._session_lock:
+            session = self._current_session()
+            self._active += 1
+            return session
+
+    def _checkin(self):
+        with self._session_lock:
+            self._active -= 1
+            self._last_used = time.monotonic()
+
+    def send(self, method, url, body=None, headers=None, stream=False):
+        session = self._checkout()
+        try:
+            res = session.request(method.upper(), url, data=body, headers=dict(self.headers, **(headers or {})),
+                                  stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as ex:
+            self._checkin()
+            reason = getattr(ex.args[0], 'reason', None) if ex.args else None
+            pre_send = isinstance(ex, requests.ConnectTimeout) or isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+            raise TransportError(str(ex), pre_send=pre_send) from ex
+        except BaseException:
+            self._checkin()
+            raise
+        if not stream:
+            self._checkin()
+            return res
+
+        def release():
+            res.close()
+            self._checkin()
+
+        # Streamed: the session stays in use until the body is read and the response closed
+        return Response(res.status_code, headers=res.headers, reason=res.reason or '',
+                        chunks=lambda size: res.iter_content(size), release=release)
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class Urllib3Transport(Transport):
+    """Lean transport built directly on a `urllib3.PoolManager`, without the `requests` layer.
+
+    Args:
+        headers (dict): Headers sent with every request.
+        pool_connections (int): Number of host connection pools to cache.
+        pool_maxsize (int): Maximum number of connections kept alive per host.
+        keepalive_timeout (float): Unused, urllib3 keeps idle connections until the server drops them.
+    """
+
+    name = 'urllib3'
+
+    def __init__(self, headers=None, pool_connections=10, pool_maxsize=10, keepalive_timeout=None):
+        super().__init__(headers)
+        self._pool = urllib3.PoolManager(num_pools=pool_connections, maxsize=pool_maxsize, block=False, retries=False)
+
+    def send(self, method, url, body=None, headers=None, stream=False):
+        try:
+            res = self._pool.request(method.upper(), url, body=body, headers=dict(self.headers, **(headers or {})),
+                                     preload_content=not stream, redirect=False)
+        except urllib3.exceptions.HTTPError as ex:
+            pre_send = isinstance(ex, (urllib3.exceptions.ConnectTimeoutError, urllib3.exceptions.NewConnectionError))
+            raise TransportError(str(ex), pre_send=pre_send) from ex
+        if not stream:
+            return Response(res.status, res.data, res.headers, res.reason or '')
+        return Response(res.status, headers=res.headers, reason=res.reason or '',
+                        chunks=lambda size: res.stream(size), release=res.release_conn)
+
+    def close(self):
+        self._pool.clear()
+
+
+class HttpxTransport(Transport):
+    """Transport built on `httpx.Client`, optionally multiplexing requests over HTTP/2.
+
+    Args:
+        headers (dict): Headers sent with every request.
+        pool_connections (int): Maximum number of concurrent connections.
+        pool_maxsize (int): Maximum number of idle keep-alive connections.
+        keepalive_timeout (float): Seconds an idle connection is kept before being dropped.
+        http2 (bool): Negotiate HTTP/2, sending concurrent requests over a single connection. Requires the `h2` package.
+    """
+
+    name = 'httpx'
+
+    def __init__(self, headers=None, pool_connections=10, pool_maxsize=10, keepalive_timeout=60, http2=False):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The httpx transport requires httpx. Install it with `pip install pbuster[async]`.")
+
+        super().__init__(headers)
+        limits = httpx.Limits(max_connections=max(pool_connections, pool_maxsize),
+                              max_keepalive_connections=pool_maxsize, keepalive_expiry=keepalive_timeout)
+        self._client = httpx.Client(limits=limits, http2=http2)
+
+    def send(self, method, url, body=None, headers=None, stream=False):
+        import httpx
+
+        try:
+            request = self._client.build_request(method.upper(), url, content=body,
+                                                 headers=dict(self.headers, **(headers or {})))
+            res = self._client.send(request, stream=stream)
+        except httpx.TransportError as ex:
+            pre_send = isinstance(ex, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            raise TransportError(str(ex), pre_send=pre_send) from ex
+        if not stream:
+            return Response(res.status_code, res.content, res.headers, res.reason_phrase)
+        return Response(res.status_code, headers=res.headers, reason=res.reason_phrase,
+                        chunks=res.iter_bytes, release=res.close)
+
+    def close(self):
+        self._client.close()
+
+
+class InMemoryTransport(Transport):
+    """Transport answering requests from a Python callable, without any socket.
+
+    Meant for tests and benchmarks: the handler receives every request and returns
+    its response. Sent requests are recorded in `requests`.
+
+    Args:
+        handler (callable): Called with `(method, route, query, body)`, where `route` is the URL path relative
+            to `/api/v2/`, `query` a dict of query parameters and `body` the decoded JSON body (or None).
+            Returns a JSON-serializable body, or a `(status_code, body)` or `(status_code, body, headers)` tuple.
+        headers (dict): Headers sent with every request, recorded with them.
+
+    Example:
+        def handler(method, route, query, body):
+            if route == 'agents/fetch':
+                return {'id': query['id'], 'name': 'My agent'}
+            return 404, {'error': 'Not found'}
+
+        pb = PhantomBuster(api_key='test', transport=InMemoryTransport(handler))
+    """
+
+    name = 'memory'
+
+    def __init__(self, handler, headers=None):
+        super().__init__(headers)
+        self.handler = handler
+        self.requests = []
+
+    def send(self, method, url, body=None, headers=None, stream=False):
+        parts = urlsplit(url)
+        route = parts.path.split('/api/v2/', 1)[-1]
+        query = dict(parse_qsl(parts.query))
+        payload = json.loads(body) if body else None
+        self.requests.append({'method': method, 'route': route, 'query': query, 'body': payload,
+                              'headers': dict(self.headers, **(headers or {}))})
+
+        result = self.handler(method, route, query, payload)
+        status_code, content, extra = 200, result, {}
+        if isinstance(result, tuple):
+            status_code, content = result[:2]
+            extra = result[2] if len(result) > 2 else {}
+        if content is None:
+            content = b''
+        elif not isinstance(content, (bytes, str)):
+            content = json.dumps(content)
+        if isinstance(content, str):
+            content = content.encode()
+        return Response(status_code, content, Headers(dict({'Content-Type': 'application/json'}, **extra)),
+                        responses.get(status_code, ''))
+
+
+# Transports selectable by name, from `PhantomBuster(transport=...)`
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'httpx': HttpxTransport,
+    'urllib3': Urllib3Transport,
+}
+
+
+def get_transport(transport=None, headers=None, **pool):
+    """Resolve a transport
+
+    Args:
+        transport (str|Transport): Transport name (see `TRANSPORTS`), 'http2' for httpx over HTTP/2,
+            or instance. 'requests' if not set.
+        headers (dict): Headers sent with every request, for transports built here.
+        **pool: `pool_connections`, `pool_maxsize` and `keepalive_timeout` of transports built here.
+
+    Returns:
+        (Transport): The transport.
+    """
+    if transport is None:
+        transport = 'requests'
+    if not isinstance(transport, str):
+        return transport
+    if transport == 'http2':
+        return HttpxTransport(headers, http2=True, **pool)
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {transport!r}. Choose from: {', '.join(TRANSPORTS)}, http2")
+    return TRANSPORTS[transport](headers, **pool)
@@ -1,7 +1,105 @@
 import os
-import json
+import time
+import threading
 import yaml
-import requests
+from urllib.parse import urlencode
+from pbuster.codec import get_codec
+from pbuster.transport import TransportError, get_transport
+from pbuster.metrics import Hooks
+from pbuster.coalesce import SingleFlight
+from pbuster.ratelimit import RateLimiter, RateLimitExceeded
+
+try:
+    YamlLoader = yaml.CSafeLoader
+except AttributeError:
+    YamlLoader = yaml.SafeLoader
+
+
+class ScriptSettingsRegistry(object):
+    """Default script settings indexed by script ID.
+
+    The packaged `config/scripts.yaml` and any overlay files are parsed once and
+    merged into a dict keyed by script ID. Files are parsed again only when
+    their modification time changes. Overlay entries are merged on top of the
+    packaged defaults: their `arguments` update the default ones and any other
+    key replaces the default value.
+
+    Args:
+        overlays (list): Paths of user YAML files merged on top of the packaged defaults, in order.
+        check_interval (float): Minimum seconds between two checks of the files modification time.
+    """
+
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'config', 'scripts.yaml')
+
+    def __init__(self, overlays=None, check_interval=1.0):
+        self.paths = [self.DEFAULT_PATH] + list(overlays or [])
+        self.check_interval = check_interval
+        self._scripts = None
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def add_overlay(self, path):
+        """Merge a user YAML file on top of the current settings."""
+        with self._lock:
+            self.paths.append(path)
+            self._mtimes = None
+
+    def _stat(self):
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Configuration file {path} not found.")
+        return mtimes
+
+    def _load(self):
+        scripts = {}
+        for path in self.paths:
+            with open(path, 'r') as file:
+                for script in yaml.load(file, Loader=YamlLoader) or []:
+                    script_id = str(script.get('id'))
+                    merged = dict(scripts.get(script_id, {}))
+                    arguments = dict(merged.get('arguments', {}))
+                    arguments.update(script.get('arguments') or {})
+                    merged.update(script)
+                    merged['arguments'] = arguments
+                    scripts[script_id] = merged
+        return scripts
+
+    @property
+    def scripts(self):
+        """dict: Script settings keyed by script ID, reloaded if any file changed."""
+        now = time.monotonic()
+        if self._scripts is not None and now - self._checked_at < self.check_interval:
+            return self._scripts
+        with self._lock:
+            mtimes = self._stat()
+            if self._scripts is None or mtimes != self._mtimes:
+                self._scripts = self._load()
+                self._mtimes = mtimes
+            self._checked_at = now
+            return self._scripts
+
+    def get(self, script_id):
+        """Return the settings of a script.
+
+        Args:
+            script_id (str): The ID of the script to load settings for.
+
+        Raises:
+            FileNotFoundError: If a configuration file is not found.
+
+        Returns:
+            dict: The script settings, or an empty dictionary if not found.
+        """
+        return self.scripts.get(str(script_id), {})
+
+
+script_settings = ScriptSettingsRegistry(
+    overlays=[path for path in os.getenv('PHANTOMBUSTER_SCRIPTS_CONFIG', '').split(os.pathsep) if path])
+
 
 def script_settings_loader(script_id):
     """Load default script settings from a YAML file.
@@ -12,69 +110,262 @@ def script_settings_loader(script_id):
     Returns:
         dict: The script settings for the specified script ID, or an empty dictionary if not found.
     """
-    try:
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'scripts.yaml')
-        with open(config_path, 'r') as file:
-            scripts = yaml.safe_load(file)
+    return script_settings.get(script_id)
+
 
-        # Return script settings if script_id exists, otherwise return an empty dict
-        for script in scripts:
-            if str(script.get('id')) == str(script_id):
-                return script
-        return {}
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file {config_path} not found.")
+def with_query(route, params):
+    """Append `params` to the query string of `route`. GET and DELETE payloads are sent this way."""
+    return '{}{}{}'.format(route, '&' if '?' in route else '?', urlencode(params, doseq=True))
 
 
 class RequestHandler(object):
-    def __init__(self, endpoint, headers={}, key=None, secret=None):
+    """HTTP client shared by every API interface of a `PhantomBuster` instance.
+
+    Requests go through a single transport (see `pbuster.transport`), a pooled
+    `requests.Session` by default, so TCP/TLS connections are kept alive and
+    reused between calls. Transports are safe to share across threads.
+
+    Args:
+        endpoint (str): Base URL of the API.
+        headers (dict): Headers sent with every request.
+        pool_connections (int): Number of host connection pools to cache.
+        pool_maxsize (int): Maximum number of connections kept alive per host.
+        keepalive_timeout (float): Seconds a pool may stay idle before its connections are dropped. `None` keeps them forever.
+        cache (ResponseCache): Optional cache for GET responses.
+        rate_limiter (RateLimiter): Rate limiter every request goes through. Disabled if not set.
+        retry_policy (RetryPolicy): Policy deciding which failed requests are retried. No retries if not set.
+        circuit_breaker (CircuitBreaker): Circuit breaker failing fast while the API is down. Disabled if not set.
+        codec (str): JSON codec name (see `pbuster.codec.CODECS`) or instance. The fastest installed one if not set.
+        transport (str|Transport): Transport name (see `pbuster.transport.TRANSPORTS`) or instance. 'requests' if not set.
+        hooks (Hooks): Instrumentation hooks (see `pbuster.metrics`). Empty ones if not set.
+        coalesce (bool): Share a single request between identical concurrent GETs. Disabled if not set.
+
+    Attributes:
+        hooks (Hooks): Instrumentation hooks called around every request.
+        single_flight (SingleFlight): Coalescer of concurrent GETs, None if disabled. Its `stats` count the requests saved.
+    """
+
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 10
+    KEEPALIVE_TIMEOUT = 60  # seconds
+    QUERY_METHODS = ('get', 'delete')  # payloads sent as query parameters
+
+    def __init__(self, endpoint, headers={},
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                 cache=None, rate_limiter=None, retry_policy=None, circuit_breaker=None, codec=None, transport=None,
+                 hooks=None, coalesce=False):
         self.endpoint = endpoint
         self.headers = headers
-        self.key = key or ''
-        self.secret = secret or ''
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.codec = get_codec(codec)
+        self.transport = get_transport(transport, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                       keepalive_timeout=keepalive_timeout)
+        self.transport.headers = dict(headers, **self.transport.headers)
+        self.hooks = hooks or Hooks()
+        self.single_flight = SingleFlight() if coalesce else None
+
+    def close(self):
+        """Close the transport and every pooled connection."""
+        self.transport.close()
+
+    def _send(self, method, url, payload, headers=None, stream=False):
+        return self.transport.send(method, url, payload, headers=headers, stream=stream)
 
     def _request(self, method, route, payload=None):
-        res = url = err = jsonObject = None
-        _payload = json.dumps(payload)
+        if payload is not None and method in self.QUERY_METHODS:
+            route, payload = with_query(route, payload), None
+        _payload = self.codec.dumps(payload) if payload is not None else None
         url = '{}{}'.format(self.endpoint, route)
 
+        cached = None
+        cacheable = self.cache is not None and method == 'get' and self.cache.ttl(route) is not None
+        if cacheable:
+            cached = self.cache.lookup(route)
+            if cached is not None and cached.fresh:
+                return self.codec.loads(cached.content)
+        headers = self.cache.conditional_headers(cached) if cacheable else None
+
+        if method == 'get' and payload is None and self.single_flight is not None:
+            return self.single_flight.do(route, lambda: self._call(method, route, url, None, headers, cached))
+        return self._call(method, route, url, _payload, headers, cached)
+
+    def _call(self, method, route, url, body, headers=None, cached=None):
+        """Send a request and decode its response, calling the hooks if any listener is registered."""
+        if not self.hooks.active:
+            res = self._send_with_retries(method, route, url, body, headers)
+            return self._result(method, route, res, cached)
+
+        call = self.hooks.start(method, route, url, body)
+        started = time.perf_counter()
+        res = decode_started = None
         try:
-            if method == 'get':
-                res = requests.get(
-                    url=url, params=_payload, headers=self.headers, auth=(self.key, self.secret))
-            elif method == 'post':
-                res = requests.post(
-                    url=url, data=_payload, headers=self.headers, auth=(self.key, self.secret))
-            elif method == 'patch':
-                res = requests.patch(
-                    url=url, json=_payload, headers=self.headers, auth=(self.key, self.secret))
-            elif method == 'put':
-                res = requests.put(
-                    url=url, data=_payload, headers=self.headers, auth=(self.key, self.secret))
-            elif method == 'delete':
-                res = requests.delete(
-                    url=url, params=_payload, headers=self.headers, auth=(self.key, self.secret))
-                return bool(res.status_code == 204)
-        except requests.ConnectionError as ex:
-            raise ConnectionError(url, ex.args[0])
+            res = self._send_with_retries(method, route, url, body, headers, call=call)
+            decode_started = time.perf_counter()
+            result = self._result(method, route, res, cached)
+        except Exception as ex:
+            self._finish(call, started, res, decode_started, error=ex)
+            raise
+        self._finish(call, started, res, decode_started)
+        return result
+
+    def _send_with_retries(self, method, route, url, body, headers=None, call=None, stream=False):
+        """Send a request, retrying it as the retry policy allows. Returns the last response."""
+        attempt = 0
+        while True:
+            trial = self.circuit_breaker.before() if self.circuit_breaker is not None else False
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(route)
+                res = self._send(method, url, body, headers, stream=stream)
+            except TransportError as ex:
+                delay = self._retry_delay(method, route, attempt, pre_send=ex.pre_send)
+                if delay is None:
+                    if call is not None:
+                        self.hooks.error(call, error=ex)
+                    raise ConnectionError(url, str(ex))
+                if call is not None:
+                    self.hooks.retry(call, attempt, delay, error=ex)
+            except BaseException:
+                if trial:
+                    self.circuit_breaker.abandon()
+                raise
+            else:
+                delay = self._retry_delay(method, route, attempt, res)
+                if delay is None:
+                    if call is not None and res.status_code >= 400:
+                        self.hooks.error(call, res)
+                    return res
+                if call is not None:
+                    self.hooks.retry(call, attempt, delay, res)
+                if stream:
+                    res.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _result(self, method, route, res, cached=None):
+        if method == 'delete':
+            return bool(res.status_code == 204)
+        return self._handle_response(method, route, res, cached)
+
+    def _finish(self, call, started, res, decode_started=None, error=None, bytes_in=None):
+        """Emit the `after_request` hook of a call."""
+        now = time.perf_counter()
+        self.hooks.finish(call, now - started, res, error, now - decode_started if decode_started else 0.0, bytes_in)
+
+    def _retry_delay(self, method, route, attempt, res=None, pre_send=False):
+        """Record the outcome of an attempt in the circuit breaker.
 
+        Returns:
+            (float): Seconds to wait before retrying the request, or None if it must not be retried.
+        """
+        status_code = res.status_code if res is not None else None
+        if self.circuit_breaker is not None:
+            if status_code is None or status_code >= 500:
+                self.circuit_breaker.failure()
+            else:
+                self.circuit_breaker.success()
+        if status_code is not None and status_code < 400:
+            return None
+        if self.retry_policy is None or not self.retry_policy.should_retry(method, route, attempt, status_code, pre_send):
+            return None
+
+        retry_after = None
+        if res is not None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.update(route, status_code, res.headers)
+            retry_after = RateLimiter._seconds(res.headers.get('Retry-After'))
+        return self.retry_policy.delay(attempt, retry_after)
+
+    def _handle_response(self, method, route, res, cached=None):
+        """Parse a response, keeping the rate limiter and the response cache up to date."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(route, res.status_code, res.headers)
+        if self.cache is None:
+            return self._parse_response(res)
+        if method != 'get':
+            self.cache.invalidate_for(route)
+            return self._parse_response(res)
+        if res.status_code == 304 and cached is not None:
+            self.cache.revalidated(route, cached)
+            return self.codec.loads(cached.content)
+
+        jsonObject = self._parse_response(res)
+        if self.cache.ttl(route) is not None and res.content:
+            self.cache.store(route, res.content, res.headers)
+        return jsonObject
+
+    def _parse_response(self, res):
+        """Decode a response body as JSON, raising on non-2xx status codes."""
+        err = jsonObject = None
+        reason = getattr(res, 'reason', None) or getattr(res, 'reason_phrase', '')
         if str(res.status_code)[0] == '2':
             try:
                 if res.content:
                     try:
-                        jsonObject = res.json()
-                    except json.JSONDecodeError:
+                        jsonObject = self.codec.loads(res.content)
+                    except ValueError:
                         jsonObject = {'content': res.content}
             except Exception as ex:
-                err = {'code': res.status_code, 'message': getattr(ex, 'message', ''), 'content': json.loads(res.content)}
+                err = {'code': res.status_code, 'message': getattr(ex, 'message', ''), 'content': self.codec.loads(res.content)}
+        elif res.status_code == 429:
+            try:
+                content = self.codec.loads(res.content)
+            except ValueError:
+                content = {'error': reason}
+            err = {'code': res.status_code, 'message': reason, 'content': content}
+            raise RateLimitExceeded(err, RateLimiter._seconds(res.headers.get('Retry-After')))
         else:
-            # Return as dict
-            err = {'code': res.status_code, 'message': res.reason, 'content': json.loads(res.content)}
+            # Return as dict. Gateways and proxies answer with HTML or plain text,
+            # keep the start of it rather than hiding the status behind a decode error
+            try:
+                content = self.codec.loads(res.content)
+            except ValueError:
+                content = res.content[:200]
+            err = {'code': res.status_code, 'message': reason, 'content': content}
 
         if err:
             raise Exception(err)
         return jsonObject
 
+    def stream(self, route, chunk_size=65536):
+        """Make a GET request and yield the response body in chunks instead of decoding it
+
+        Failures before the body starts are retried like any GET. The response cache is bypassed.
+
+        Args:
+            route (str): Route to fetch.
+            chunk_size (int): Size of the chunks, in bytes.
+
+        Yields:
+            (bytes): Chunks of the response body.
+        """
+        url = '{}{}'.format(self.endpoint, route)
+        call = self.hooks.start('get', route, url, None) if self.hooks.active else None
+        started = time.perf_counter()
+        res, received, error = None, 0, None
+        try:
+            res = self._send_with_retries('get', route, url, None, call=call, stream=True)
+            with res:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(route, res.status_code, res.headers)
+                if str(res.status_code)[0] != '2':
+                    self._parse_response(res)
+                for chunk in res.iter_content(chunk_size):
+                    received += len(chunk)
+                    yield chunk
+        except BaseException as ex:
+            error = ex
+            raise
+        finally:
+            if call is not None:
+                self._finish(call, started, res, error=error if isinstance(error, Exception) else None, bytes_in=received)
+
     def get(self, *args, **kwargs):
         """Make a GET request"""
         return self._request('get', *args, **kwargs)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+import hmac
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class Completion(object):
+    """Completion event of a container, set when its webhook arrives.
+
+    Attributes:
+        container_id (str): Container waited for.
+        payload (dict): Webhook payload, None until it arrived.
+    """
+
+    def __init__(self, container_id):
+        self.container_id = container_id
+        self.payload = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        """bool: Whether the webhook arrived."""
+        return self._event.is_set()
+
+    def set(self, payload):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.payload = payload
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """Call `callback(completion)` once the webhook arrived, right away if it already did."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None, cancel=None):
+        """Block until the webhook arrives, `timeout` seconds pass or `cancel` is cancelled. Returns `done`."""
+        if cancel is None:
+            return self._event.wait(timeout)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self._event.is_set() and not cancel.cancelled:
+            remaining = deadline - time.monotonic() if deadline is not None else WebhookReceiver.CANCEL_CHECK
+            if remaining <= 0:
+                break
+            self._event.wait(min(remaining, WebhookReceiver.CANCEL_CHECK))
+        return self.done
+
+    async def wait_async(self, timeout=None):
+        """Asyncio version of `wait()`."""
+        if self.done:
+            return True
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake(_):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        self.add_done_callback(wake)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.done
+
+
+class WebhookReceiver(object):
+    """Receive PhantomBuster webhooks and resolve the container waits they complete.
+
+    Point the webhook of your agents to `url`. While a receiver is attached to the
+    client (`PhantomBuster(webhook=receiver)`), `Container.wait`, `Agent.launch_and_wait`
+    and `Container.as_completed` return as soon as the webhook of a container arrives,
+    and only poll slowly (see `Container.WEBHOOK_WAIT_TIME`) as a safety net against
+    lost webhooks.
+
+    The receiver runs its own HTTP listener on a background thread (`start()`), or
+    can be fed from an existing web application with `handle()`.
+
+    Webhooks are authenticated when `secret` or `token` is set:
+
+    - `secret`: the raw body must be signed with HMAC-SHA256, the hex digest being sent in the
+      `SIGNATURE_HEADER` header (optionally prefixed with `sha256=`).
+    - `token`: the webhook URL must carry it as a `token` query parameter (`url` includes it).
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on. A free one if 0.
+        path (str): URL path webhooks are posted to.
+        secret (str): HMAC secret of signed webhooks.
+        token (str): Token expected in the `token` query parameter.
+        public_url (str): URL the API posts to, when the listener is behind a tunnel or proxy. Used by `url`.
+        max_events (int): Completions remembered for waits starting after their webhook arrived.
+
+    Example:
+        with WebhookReceiver(port=8080, token="s3cret", public_url="https://hooks.example.com/") as receiver:
+            pb = PhantomBuster(webhook=receiver)
+            pb.agent.launch_and_wait(agent_id)
+    """
+
+    SIGNATURE_HEADER = 'X-Phantombuster-Signature'
+    CANCEL_CHECK = 0.5  # seconds between cancellation checks of a wait blocked on a webhook
+    BACKLOG = 128  # pending connections, as many agents may finish at once
+
+    def __init__(self, host='127.0.0.1', port=0, path='/', secret=None, token=None, public_url=None, max_events=1024):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.token = token
+        self.public_url = public_url
+        self.max_events = max_events
+        self.stats = {'received': 0, 'rejected': 0, 'resolved': 0}
+        self._pending = {}  # container id -> [Completion]
+        self._recent = OrderedDict()  # container id -> payload
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -------------------------- listener --------------------------
+
+    @property
+    def url(self):
+        """str: URL to configure as the webhook of the agents, token included."""
+        if self.public_url:
+            base = self.public_url
+        else:
+            port = self._server.server_address[1] if self._server is not None else self.port
+            base = f'http://{self.host}:{port}{self.path}'
+        if self.token:
+            base += ('&' if '?' in base else '?') + f'token={self.token}'
+        return base
+
+    def start(self):
+        """Start listening on a background thread."""
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                parts = urlsplit(self.path)
+                if parts.path != receiver.path:
+                    status, message = 404, 'Not found'
+                else:
+                    status, message = receiver.handle(self.rfile.read(length), self.headers, dict(parse_qsl(parts.query)))
+                body = json.dumps({'message': message}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = type('Server', (ThreadingHTTPServer,), {'request_queue_size': self.BACKLOG})
+        self._server = server((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='pbuster-webhook', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -------------------------- webhooks --------------------------
+
+    def verify(self, body, headers=None, query=None):
+        """Tell whether a webhook carries the expected signature and token."""
+        if self.token is not None and not hmac.compare_digest(str((query or {}).get('token', '')), self.token):
+            return False
+        if self.secret is not None:
+            name = self.SIGNATURE_HEADER.lower()
+            signature = next((value for key, value in (headers or {}).items() if key.lower() == name), None) or ''
+            if signature.startswith('sha256='):
+                signature = signature[len('sha256='):]
+            expected = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(signature, expected):
+                return False
+        return True
+
+    def handle(self, body, headers=None, query=None):
+        """Process a webhook request
+
+        Args:
+            body (bytes): Raw request body.
+            headers (dict): Request headers, for the signature.
+            query (dict): Query parameters, for the token.
+
+        Returns:
+            (tuple): HTTP status code and message to answer with.
+        """
+        if not self.verify(body, headers, query):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return 401, 'Invalid signature'
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or not payload.get('containerId'):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return 400, "Expected a JSON object with a 'containerId'"
+        self.receive(payload)
+        return 200, 'OK'
+
+    def receive(self, payload):
+        """Resolve the waits of the container a verified webhook payload is about."""
+        container_id = str(payload['containerId'])
+        with self._lock:
+            self.stats['received'] += 1
+            self._recent[container_id] = payload
+            self._recent.move_to_end(container_id)
+            while len(self._recent) > self.max_events:
+                self._recent.popitem(last=False)
+            completions = self._pending.pop(container_id, [])
+            self.stats['resolved'] += len(completions)
+            listeners = list(self._listeners)
+        for completion in completions:
+            completion.set(payload)
+        for listener in listeners:
+            listener(payload)
+
+    def on_event(self, listener):
+        """Call `listener(payload)` on every verified webhook."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    # -------------------------- waits --------------------------
+
+    def expect(self, container_id):
+        """Completion of a container, already set if its webhook arrived recently."""
+        container_id = str(container_id)
+        completion = Completion(container_id)
+        with self._lock:
+            payload = self._recent.get(container_id)
+            if payload is None:
+                self._pending.setdefault(container_id, []).append(completion)
+        if payload is not None:
+            completion.set(payload)
+        return completion
+
+    def discard(self, completion):
+        """Stop tracking a completion whose wait ended."""
+        with self._lock:
+            completions = self._pending.get(completion.container_id)
+            if completions and completion in completions:
+                completions.remove(completion)
+                if not completions:
+                    del self._pending[completion.container_id]
+
+
+def payload(container_id, agent_id=None, exit_code=0, exit_message='finished', **fields):
+    """Build a webhook payload shaped like the ones PhantomBuster posts when an agent finishes."""
+    return dict({'agentId': agent_id, 'agentName': f'agent {agent_id}', 'containerId': str(container_id),
+                 'script': 'script.js', 'scriptOrg': 'phantombuster', 'branch': 'master',
+                 'launchDuration': 1000, 'runDuration': 60000, 'resultObject': None,
+                 'exitMessage': exit_message, 'exitCode': exit_code}, **fields)
+
+
+def simulate(url, container_id, agent_id=None, exit_code=0, secret=None, **fields):
+    """Post a PhantomBuster-like webhook to a receiver, as the API does when an agent finishes
+
+    Meant to test webhook-driven waits locally, without exposing the receiver.
+
+    Args:
+        url (str): Webhook URL, such as `WebhookReceiver.url`.
+        container_id (str): Container that finished.
+        agent_id (str): Agent of the container.
+        exit_code (int): Exit code of the container.
+        secret (str): Signs the body with this HMAC secret.
+        **fields: Extra payload fields.
+
+    Returns:
+        (int): HTTP status code of the receiver's answer.
+    """
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+
+    body = json.dumps(payload(container_id, agent_id, exit_code, **fields)).encode()
+    headers = {'Content-Type': 'application/json'}
+    if secret is not None:
+        headers[WebhookReceiver.SIGNATURE_HEADER] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    try:
+        with urlopen(Request(url, data=body, headers=headers, method='POST'), timeout=10) as res:
+            return res.status
+    except HTTPError as ex:
+        return ex.code
@@ -19,9 +19,23 @@ setup(
     },
     url='https://github.com/davidmoremad/phantombuster-python',
     packages=find_packages(),
+    entry_points={
+        'console_scripts': [
+            'pbuster=pbuster.cli:cli',
+            'phantombuster=pbuster.cli:cli',
+        ],
+    },
     license='MIT',
     include_package_data=True,  # Include files specified in MANIFEST.in
     install_requires=read_file('requirements.txt').splitlines(),
+    extras_require={
+        'async': ['httpx'],
+        'http2': ['httpx[http2]'],
+        'parquet': ['pyarrow'],
+        'fast': ['orjson'],
+        'otel': ['opentelemetry-api'],
+        'cli': ['click', 'rich', 'python-dotenv'],
+    },
     classifiers=[
         'Development Status :: 1 - Planning',
         'Environment :: Console',
@@ -37,5 +51,5 @@ setup(
         'Topic :: Software Development :: Libraries',
         'Topic :: Software Development :: Libraries :: Application Frameworks',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.8',
 )
\ No newline at end of file
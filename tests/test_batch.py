@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+from pbuster.batch import BatchRunner, error_info
+from pbuster.phantombuster import PhantomBuster
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+
+
+def api(method, route, query, body):
+    if route == 'agents/fetch':
+        if query['id'] == '404':
+            return 404, {'error': 'Agent not found'}
+        return {'id': query['id'], 'lastEndType': 'finished'}
+    return 404, {'error': 'Not found'}
+
+
+def client():
+    return PhantomBuster(api_key='test', transport=InMemoryTransport(api), retry_policy=RetryPolicy(retries=0), coalesce=False)
+
+
+LINES = [
+    '{"op": "agent.status", "id": "1", "ref": "first"}\n',
+    '\n',
+    'not json\n',
+    '{"op": "agent.explode", "id": "1"}\n',
+    '{"op": "agent.status", "id": "404"}\n',
+    '{"op": "agent.status"}\n',
+    '[1, 2]\n',
+    '{"op": "agent.status", "agentId": 2}\n',
+]
+
+
+def test_every_line_gets_a_response():
+    runner = BatchRunner(client(), max_in_flight=3)
+    responses = list(runner.run(LINES))
+    assert [r['line'] for r in responses] == [1, 3, 4, 5, 6, 7, 8]
+    assert responses[0] == {'line': 1, 'op': 'agent.status', 'id': '1', 'ref': 'first', 'result': 'finished'}
+    assert responses[1]['error']['type'] == 'JSONDecodeError'
+    assert responses[2]['error']['message'].startswith("Unknown op 'agent.explode'")
+    assert responses[3]['error'] == {'type': 'Exception', 'code': 404, 'message': 'Agent not found'}
+    assert responses[4]['error'] == {'type': 'ValueError', 'message': "Missing 'id'."}
+    assert responses[5]['error']['message'] == 'Request must be a JSON object.'
+    assert responses[6]['result'] == 'finished'
+    assert runner.stats == {'requests': 7, 'ok': 2, 'errors': 5}
+    json.dumps(responses)  # Responses are written as NDJSON
+
+
+def test_unordered_responses_cover_every_request():
+    requests = [{'op': 'agent.get', 'id': str(n)} for n in range(20)]
+    responses = list(BatchRunner(client(), max_in_flight=4, ordered=False).run(requests))
+    assert sorted(r['line'] for r in responses) == list(range(1, 21))
+    assert all(r['result']['id'] == r['id'] for r in responses)
+
+
+def test_error_info_without_api_details():
+    assert error_info(RuntimeError()) == {'type': 'RuntimeError', 'message': ''}
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+import time
+import pytest
+from pbuster.cache import ResponseCache
+from pbuster.utils import RequestHandler
+from pbuster.transport import InMemoryTransport
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+class Agents(object):
+    """API serving versioned agents, answering 304 to requests carrying the current ETag."""
+
+    def __init__(self):
+        self.version = 1
+        self.transport = InMemoryTransport(self)
+
+    def __call__(self, method, route, query, body):
+        if method != 'get':
+            self.version += 1
+            return {'containerId': 'c1'} if route == 'agents/launch' else {'id': body['id']}
+        etag = f'"v{self.version}"'
+        if self.transport.requests[-1]['headers'].get('If-None-Match') == etag:
+            return 304, None, {'ETag': etag}
+        return 200, {'id': query.get('id'), 'version': self.version}, {'ETag': etag}
+
+
+def client(cache, api=None):
+    api = api or Agents()
+    cache.bind('key', ENDPOINT)
+    return RequestHandler(ENDPOINT, {}, cache=cache, transport=api.transport, coalesce=False), api
+
+
+def test_fresh_entries_are_served_from_memory():
+    req, api = client(ResponseCache())
+    assert req.get('agents/fetch?id=1') == req.get('agents/fetch?id=1') == {'id': '1', 'version': 1}
+    assert len(api.transport.requests) == 1
+    assert req.cache.stats['hits'] == 1
+
+
+def test_uncached_routes_always_hit_the_api():
+    req, api = client(ResponseCache())
+    req.get('containers/fetch?id=1')
+    req.get('containers/fetch?id=1')
+    assert len(api.transport.requests) == 2
+
+
+def test_expired_entry_is_revalidated_with_etag():
+    req, api = client(ResponseCache(ttls={'agents/fetch': 0.05}))
+    req.get('agents/fetch?id=1')
+    time.sleep(0.1)
+    assert req.get('agents/fetch?id=1') == {'id': '1', 'version': 1}
+    assert api.transport.requests[-1]['headers']['If-None-Match'] == '"v1"'
+    assert req.cache.stats['revalidated'] == 1
+    assert req.get('agents/fetch?id=1') == {'id': '1', 'version': 1}  # Fresh again after the 304
+    assert len(api.transport.requests) == 2
+
+
+@pytest.mark.parametrize('route, payload', [('agents/launch', {'id': '1'}), ('agents/save', {'id': '1'})])
+def test_mutating_routes_invalidate_agents(route, payload):
+    req, api = client(ResponseCache())
+    req.get('agents/fetch?id=1')
+    req.post(route, payload=payload)
+    assert req.get('agents/fetch?id=1') == {'id': '1', 'version': 2}
+    assert len(api.transport.requests) == 3
+
+
+def test_disk_entries_are_shared_per_key_and_private(tmp_path):
+    first, api = client(ResponseCache(disk_dir=str(tmp_path)))
+    first.get('agents/fetch?id=1')
+    second, _ = client(ResponseCache(disk_dir=str(tmp_path)), api)
+    assert second.get('agents/fetch?id=1') == {'id': '1', 'version': 1}
+    assert len(api.transport.requests) == 1  # Read from disk
+    for folder, _, files in os.walk(tmp_path):
+        if folder != str(tmp_path):
+            assert stat.S_IMODE(os.stat(folder).st_mode) == 0o700
+        for name in files:
+            assert stat.S_IMODE(os.stat(os.path.join(folder, name)).st_mode) == 0o600
+
+
+def test_disk_entries_not_shared_between_api_keys(tmp_path):
+    req, api = client(ResponseCache(disk_dir=str(tmp_path)))
+    req.get('agents/fetch?id=1')
+    other = ResponseCache(disk_dir=str(tmp_path))
+    other.bind('another key', ENDPOINT)
+    assert other.lookup('agents/fetch?id=1') is None
+    with pytest.raises(ValueError):
+        req.cache.bind('another key', ENDPOINT)
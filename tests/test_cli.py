@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+
+cli = pytest.importorskip('pbuster.cli')
+from click.testing import CliRunner
+from pbuster.phantombuster import PhantomBuster
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+
+
+AGENTS = [{'id': '1', 'name': 'Scraper', 'scriptId': '3112', 'createdAt': 0, 'tags': ['a', 'b']},
+          {'id': '2', 'name': 'Mailer, weekly', 'scriptId': '9136', 'createdAt': 0}]
+CONTAINERS = [{'id': 'c2', 'status': 'running', 'createdAt': 2000}, {'id': 'c1', 'status': 'finished', 'createdAt': 1000}]
+
+
+def api(method, route, query, body):
+    if route == 'agents/fetch-all':
+        return AGENTS
+    if route == 'containers/fetch-all':
+        return {'containers': CONTAINERS}
+    if route == 'agents/fetch':
+        if query['id'] == '404':
+            return 404, {'error': 'Agent not found'}
+        return {'id': query['id'], 'lastEndType': 'finished'}
+    return 404, {'error': 'Not found'}
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """Invoke the CLI against `api`. Returns the click result."""
+    pb = PhantomBuster(api_key='test', transport=InMemoryTransport(api), retry_policy=RetryPolicy(retries=0), coalesce=False)
+    monkeypatch.setattr(cli, 'pb', pb)
+    return lambda *args, input=None: CliRunner().invoke(cli.cli, list(args), input=input)
+
+
+def test_missing_api_key_is_a_usage_error(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # No .env to load
+    monkeypatch.delenv('PHANTOMBUSTER_API_KEY', raising=False)
+    monkeypatch.setattr(cli, 'pb', cli._Lazy(cli._client))
+    result = CliRunner().invoke(cli.cli, ['agent', 'status', '1'])
+    assert result.exit_code == 2
+    assert result.output.strip().splitlines() == ['Error: PHANTOMBUSTER_API_KEY is not set. Export it or add it to a .env file.']
+
+
+def test_batch_writes_one_response_per_line(run):
+    result = run('batch', '-m', '2', input='{"op": "agent.status", "id": "1"}\n\n{"op": "agent.status", "id": "2"}\n')
+    assert result.exit_code == 0
+    responses = [json.loads(line) for line in result.output.splitlines()]
+    assert [(r['line'], r['result']) for r in responses] == [(1, 'finished'), (3, 'finished')]
+
+
+def test_batch_exits_with_1_when_a_request_fails(run):
+    result = run('batch', input='{"op": "agent.status", "id": "404"}\nnot json\n{"op": "agent.status", "id": "1"}\n')
+    assert result.exit_code == 1
+    responses = [json.loads(line) for line in result.output.splitlines()]
+    assert [r['line'] for r in responses] == [1, 2, 3]
+    assert responses[0]['error']['code'] == 404 and 'error' in responses[1] and responses[2]['result'] == 'finished'
+
+
+def test_output_json(run):
+    result = run('agent', 'list', '-o', 'json')
+    assert result.exit_code == 0 and json.loads(result.output) == AGENTS
+    result = run('agent', 'show', '1', '-o', 'json', '--fields', 'id,lastEndType')
+    assert json.loads(result.output) == {'id': '1', 'lastEndType': 'finished'}
+
+
+def test_output_ndjson_with_fields(run):
+    result = run('agent', 'list', '--output', 'ndjson', '--fields', 'id,name,missing')
+    assert [json.loads(line) for line in result.output.splitlines()] == [
+        {'id': '1', 'name': 'Scraper', 'missing': None}, {'id': '2', 'name': 'Mailer, weekly', 'missing': None}]
+    result = run('container', 'list', 'a1', '-o', 'ndjson', '--fields', 'id', '--limit', '1')
+    assert result.output == '{"id": "c2"}\n'
+
+
+def test_output_csv(run):
+    result = run('agent', 'list', '-o', 'csv', '--fields', 'id,name,tags')
+    assert result.output.splitlines() == ['id,name,tags', '1,Scraper,"[""a"", ""b""]"', '2,"Mailer, weekly",']
+    assert run('container', 'list', 'a1', '-o', 'csv').output.splitlines() == ['id,status,createdAt', 'c2,running,2000', 'c1,finished,1000']
+
+
+def test_fields_in_a_table(run):
+    result = run('agent', 'list', '--fields', 'id,name')
+    assert result.exit_code == 0
+    assert 'id' in result.output and 'Mailer, weekly' in result.output and 'scriptId' not in result.output
+    assert run('agent', 'list', '-o', 'yaml').exit_code == 2
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import time
+import asyncio
+import threading
+import pytest
+from pbuster.coalesce import SingleFlight, AsyncSingleFlight
+from pbuster.utils import RequestHandler
+from pbuster.phantombuster import PhantomBuster
+from pbuster.transport import InMemoryTransport
+
+
+def run_threads(n, target):
+    results = [None] * n
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    def fetch():
+        runs.append(1)
+        time.sleep(0.1)
+        return {'id': '1', 'tags': []}
+
+    results = run_threads(8, lambda: flight.do('agents/fetch?id=1', fetch))
+    assert len(runs) == 1 and flight.stats == {'calls': 1, 'coalesced': 7}
+    assert all(result == {'id': '1', 'tags': []} for result in results)
+    results[0]['tags'].append('mine')
+    assert results[1]['tags'] == []  # Every caller gets its own copy
+
+
+def test_followers_receive_the_error():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError('down')
+
+    def call():
+        try:
+            flight.do('key', fail)
+        except ValueError as ex:
+            return str(ex)
+
+    assert run_threads(4, call) == ['down'] * 4
+
+
+def test_request_handler_coalesces_gets_only():
+    def handler(method, route, query, body):
+        time.sleep(0.1)
+        return {'id': query.get('id')}
+
+    transport = InMemoryTransport(handler)
+    req = RequestHandler('https://api.phantombuster.com/api/v2/', {}, transport=transport, coalesce=True)
+    run_threads(6, lambda: req.get('agents/fetch?id=1'))
+    assert len(transport.requests) == 1
+    run_threads(3, lambda: req.post('agents/launch', payload={'id': '1'}))
+    assert len(transport.requests) == 4
+
+
+def test_async_followers_retry_when_leader_is_cancelled():
+    flight = AsyncSingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return len(runs)
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == 2
+    assert flight.stats == {'calls': 2, 'coalesced': 0}
+
+
+def test_coalescing_is_opt_in():
+    def handler(method, route, query, body):
+        time.sleep(0.05)
+        return {'id': query.get('id')}
+
+    transport = InMemoryTransport(handler)
+    pb = PhantomBuster(api_key='test', transport=transport)
+    assert pb._req.single_flight is None and 'coalescing' not in pb.stats()
+    run_threads(4, lambda: pb.agent.get('1'))
+    assert len(transport.requests) == 4
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+import types
+
+import pytest
+from pbuster.codec import JsonCodec, UjsonCodec, get_codec
+from pbuster.utils import RequestHandler
+from pbuster.transport import InMemoryTransport
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+def fake_ujson():
+    """Stand-in `ujson` module, so the fallback order does not depend on what is installed."""
+    module = types.ModuleType('ujson')
+    module.dumps = lambda obj, ensure_ascii=True: json.dumps(obj, ensure_ascii=ensure_ascii)
+    module.loads = json.loads
+    return module
+
+
+def test_prefers_orjson():
+    pytest.importorskip('orjson')
+    assert get_codec().name == 'orjson'
+
+
+def test_falls_back_to_ujson(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    monkeypatch.setitem(sys.modules, 'ujson', fake_ujson())
+    codec = get_codec()
+    assert isinstance(codec, UjsonCodec)
+    assert codec.loads(codec.dumps({'name': 'é'})) == {'name': 'é'}
+
+
+def test_falls_back_to_stdlib_json(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    monkeypatch.setitem(sys.modules, 'ujson', None)
+    codec = get_codec()
+    assert type(codec) is JsonCodec
+    assert codec.loads(codec.dumps([1, 'a'])) == [1, 'a']
+
+
+def test_named_codec(monkeypatch):
+    codec = JsonCodec()
+    assert get_codec(codec) is codec
+    assert type(get_codec('json')) is JsonCodec
+    with pytest.raises(ValueError):
+        get_codec('yaml')
+    monkeypatch.setitem(sys.modules, 'ujson', None)
+    with pytest.raises(ImportError):
+        get_codec('ujson')
+
+
+@pytest.mark.parametrize('codec', ['json', 'orjson'])
+def test_non_json_error_body_keeps_status(codec):
+    if codec == 'orjson':
+        pytest.importorskip('orjson')
+    page = '<html><body>' + 'Bad Gateway ' * 40 + '</body></html>'
+    transport = InMemoryTransport(lambda method, route, query, body: (502, page))
+    req = RequestHandler(ENDPOINT, {}, codec=codec, transport=transport)
+    with pytest.raises(Exception) as error:
+        req.get('agents/fetch?id=1')
+    err = error.value.args[0]
+    assert err['code'] == 502
+    assert len(err['content']) == 200 and err['content'].startswith(b'<html>')
+
+
+def test_non_json_success_body_is_kept():
+    transport = InMemoryTransport(lambda method, route, query, body: (200, 'plain text'))
+    req = RequestHandler(ENDPOINT, {}, codec='json', transport=transport)
+    assert req.get('agents/fetch?id=1') == {'content': b'plain text'}
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import asyncio
+import pytest
+from pbuster.export import Exporter
+
+RESULTS = {'1': [{'name': 'a', 'n': 1}, {'name': 'b', 'n': 2}], '2': [{'name': 'c', 'n': 3, 'extra': True}]}
+
+
+class FakeContainer(object):
+    def iter_results(self, container_id, fields=None):
+        return iter(RESULTS[container_id])
+
+
+class FakeAsyncContainer(object):
+    async def iter_results(self, container_id, fields=None):
+        for record in RESULTS[container_id]:
+            yield record
+
+
+def test_export_ndjson(tmp_path):
+    path = tmp_path / 'out.ndjson'
+    stats = Exporter(FakeContainer(), batch_size=2).export(['1', '2'], str(path))
+    assert [json.loads(line) for line in path.read_text().splitlines()] == RESULTS['1'] + RESULTS['2']
+    assert stats['containers'] == 2 and stats['records'] == 3
+
+
+def test_aexport_csv(tmp_path):
+    path = tmp_path / 'out.csv'
+    batches = []
+    stats = asyncio.run(Exporter(FakeAsyncContainer(), format='csv', batch_size=1, sample_size=2)
+                        .aexport(['1', '2'], str(path), on_batch=lambda s: batches.append(s['records'])))
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['name'] for row in rows] == ['a', 'b', 'c']
+    assert stats['records'] == 3 and stats['dropped_fields'] == ['extra']
+    assert batches == [1, 2, 3, 3]
+
+
+def test_parquet_keeps_exporting_past_type_mismatches(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    class Results(object):
+        def iter_results(self, container_id, fields=None):
+            yield {'name': 'a', 'n': 1, 'tags': ['x']}
+            yield {'name': 'b', 'n': 2, 'mixed': 1}
+            yield {'name': 'c', 'n': 2, 'mixed': 'two'}
+            yield {'name': 3, 'n': 'three', 'late': True}
+
+    path = tmp_path / 'out.parquet'
+    stats = Exporter(Results(), format='parquet', batch_size=1, sample_size=3).export(['1'], str(path))
+    table = pq.read_table(str(path))
+    assert table.column_names == ['name', 'n', 'tags', 'mixed']
+    assert table.column('name').to_pylist() == ['a', 'b', 'c', '3']
+    assert table.column('n').to_pylist() == [1, 2, 2, None]
+    assert table.column('tags').to_pylist() == ['["x"]', None, None, None]
+    assert table.column('mixed').to_pylist() == [None, '1', 'two', None]
+    assert stats['records'] == 4
+    assert stats['dropped_fields'] == ['late'] and stats['mismatched_fields'] == ['mixed', 'n', 'name']
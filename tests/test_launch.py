@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import threading
+import pytest
+from pbuster.phantombuster import PhantomBuster
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+from pbuster.utils import ScriptSettingsRegistry
+
+SHEET = {'spreadsheetUrl': 'https://docs.google.com/spreadsheets/d/1'}
+
+
+class FakeAPI(object):
+    """API serving agents held in memory. Launching an agent listed in `failing` answers 400."""
+
+    def __init__(self, **agents):
+        self.agents = {agent_id: {'id': agent_id, 'scriptId': script_id, 'updatedAt': 1}
+                       for agent_id, script_id in agents.items()}
+        self.failing = set()
+        self.transport = InMemoryTransport(self)
+
+    def __call__(self, method, route, query, body):
+        if route == 'agents/fetch-all':
+            return list(self.agents.values())
+        if route == 'agents/fetch':
+            agent = self.agents.get(query['id'])
+            return agent if agent is not None else (404, {'error': 'Agent not found'})
+        if route == 'agents/launch':
+            if body['id'] in self.failing:
+                return 400, {'error': 'Agent is already running'}
+            return {'containerId': 'c' + body['id']}
+        if route == 'agents/delete':
+            return {}
+        return 404, {'error': 'Not found'}
+
+    def count(self, route):
+        return sum(request['route'] == route for request in self.transport.requests)
+
+
+def client(api, **kw):
+    return PhantomBuster(api_key='test', transport=api.transport, retry_policy=RetryPolicy(retries=0), coalesce=False, **kw)
+
+
+def test_plan_is_reused_between_launches():
+    api = FakeAPI(a1='3112')
+    pb = client(api)
+    pb.agent.launch('a1', SHEET)
+    pb.agent.launch('a1', dict(SHEET, numberOfAddsPerLaunch=3))
+    assert api.count('agents/fetch') == 1 and api.count('agents/launch') == 2
+    assert pb.agent.plans.stats == {'hits': 1, 'misses': 1}
+    payload = api.transport.requests[-1]['body']
+    assert payload['arguments']['numberOfAddsPerLaunch'] == 3 and payload['arguments']['saveImg'] is True
+
+
+def test_missing_required_argument_is_checked_before_launching():
+    api = FakeAPI(a1='3112')
+    pb = client(api)
+    with pytest.raises(ValueError):
+        pb.agent.launch('a1')
+    assert api.count('agents/launch') == 0
+
+
+def test_expired_plan_is_refetched_and_kept_if_the_agent_did_not_change():
+    api = FakeAPI(a1='3112')
+    pb = client(api)
+    pb.agent.plans.ttl = 0
+    pb.agent.launch('a1', SHEET)
+    plan = pb.agent.plans._plans['a1']
+    pb.agent.launch('a1', SHEET)
+    assert api.count('agents/fetch') == 2
+    assert pb.agent.plans._plans['a1'] is plan
+
+
+def test_plan_is_rebuilt_when_updated_at_changes():
+    api = FakeAPI(a1='3112')
+    pb = client(api)
+    assert pb.agent.prime() == 1
+    plan = pb.agent.plans.get('a1')
+    pb.agent.prime()
+    assert pb.agent.plans.get('a1') is plan  # Same updatedAt
+
+    api.agents['a1'].update(updatedAt=2, scriptId='unknown')
+    pb.agent.prime(['a1'])
+    rebuilt = pb.agent.plans.get('a1')
+    assert rebuilt is not plan and rebuilt.updated_at == 2 and rebuilt.required == frozenset()
+    pb.agent.launch('a1')
+    assert api.count('agents/fetch') == 0 and api.count('agents/fetch-all') == 3
+
+
+def test_plans_are_dropped_when_the_settings_change(tmp_path):
+    overlay = tmp_path / 'scripts.yaml'
+    overlay.write_text("- id: 3112\n  required: []\n")
+    pb = client(FakeAPI(a1='3112'), script_overlays=[str(overlay)])
+    pb.agent.script_settings.check_interval = 0
+    pb.agent.prime()
+    assert pb.agent.plans.get('a1').required == frozenset()
+
+    overlay.write_text("- id: 3112\n  required: [spreadsheetUrl, csvName]\n")
+    os.utime(overlay, ns=(2_000_000_000, 2_000_000_000))
+    assert pb.agent.plans.get('a1') is None
+    with pytest.raises(ValueError):
+        pb.agent.launch('a1', SHEET)
+
+
+def test_delete_invalidates_the_plan():
+    api = FakeAPI(a1='3112')
+    pb = client(api)
+    pb.agent.prime()
+    pb.agent.delete('a1')
+    assert pb.agent.plans.get('a1') is None
+    pb.agent.plans.put('a1', api.agents['a1'])
+    pb.agent.plans.invalidate()
+    assert pb.agent.plans.get('a1') is None
+
+
+def test_launch_many_isolates_failures():
+    api = FakeAPI(a1='3112', a2='unknown', a3='unknown')
+    api.failing.add('a2')
+    pb = client(api)
+    results = pb.agent.launch_many([('a1', SHEET), ('a2', None), ('missing', None), ('a1', None), ('a3', None), ('a1', SHEET)])
+    assert [r['agent_id'] for r in results] == ['a1', 'a2', 'missing', 'a1', 'a3', 'a1']
+    assert [r['container_id'] for r in results] == ['ca1', None, None, None, 'ca3', 'ca1']
+    assert results[0]['error'] is None and results[0]['response'] == {'containerId': 'ca1'}
+    assert results[1]['error'].args[0]['code'] == 400
+    assert results[2]['error'].args[0]['code'] == 404
+    assert isinstance(results[3]['error'], ValueError)  # Missing spreadsheetUrl
+    assert api.count('agents/fetch-all') == 1  # Plans resolved upfront
+
+
+def test_launch_many_bounds_launches_in_flight():
+    api = FakeAPI(**{f'a{i}': 'unknown' for i in range(8)})
+    handler, lock, state = api.transport.handler, threading.Lock(), {'running': 0, 'peak': 0}
+
+    def slow(method, route, query, body):
+        if route != 'agents/launch':
+            return handler(method, route, query, body)
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        return handler(method, route, query, body)
+
+    api.transport.handler = slow
+    results = client(api).agent.launch_many([(f'a{i}', None) for i in range(8)], max_in_flight=2)
+    assert all(r['error'] is None for r in results)
+    assert state['peak'] == 2
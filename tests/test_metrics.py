@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import pytest
+from pbuster.metrics import Hooks, MetricsCollector, OpenTelemetryTracer
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport, TransportError
+from pbuster.utils import RequestHandler
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+def handler_for(*answers):
+    """Transport handler answering with `answers` in turn: a response, or an exception to raise."""
+    answers = list(answers)
+
+    def handler(method, route, query, body):
+        answer = answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+    return handler
+
+
+def client(*answers, retries=0):
+    transport = InMemoryTransport(handler_for(*answers))
+    return RequestHandler(ENDPOINT, {}, retry_policy=RetryPolicy(retries=retries, backoff=0, jitter=0),
+                          transport=transport, hooks=Hooks(), coalesce=False)
+
+
+def record(hooks):
+    """Listen to every event. Returns the `(event, status_code, error)` tuples, in order."""
+    events = []
+    for event in Hooks.EVENTS:
+        hooks.add(event, lambda call, event=event: events.append((event, call.get('status_code'), call.get('error'))))
+    return events
+
+
+def test_hooks_fire_around_a_successful_call():
+    req = client((503, {}), {'id': '1'}, retries=1)
+    events = record(req.hooks)
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert [(event, status) for event, status, _ in events] == [
+        ('before_request', None), ('retry', 503), ('after_request', 200)]
+
+
+def test_error_fires_on_the_final_error_response():
+    req = client((500, {}), (502, {'error': 'Bad gateway'}), retries=1)
+    events = record(req.hooks)
+    with pytest.raises(Exception) as error:
+        req.get('agents/fetch?id=1')
+    assert [(event, status) for event, status, _ in events] == [
+        ('before_request', None), ('retry', 500), ('error', 502), ('after_request', 502)]
+    assert events[-1][2] is error.value
+
+
+def test_error_fires_on_transport_errors():
+    req = client(TransportError('connection reset'))
+    events = record(req.hooks)
+    with pytest.raises(ConnectionError):
+        req.post('agents/launch', {'id': '1'})
+    assert [event for event, _, _ in events] == ['before_request', 'error', 'after_request']
+    assert isinstance(events[1][2], TransportError) and events[1][1] is None
+
+
+def test_no_error_on_success_and_listener_removal():
+    req = client({'id': '1'}, (404, {'error': 'Agent not found'}))
+    errors = []
+    req.hooks.add('error', errors.append)
+    req.get('agents/fetch?id=1')
+    assert errors == []
+    req.hooks.remove('error', errors.append)
+    assert not req.hooks.active
+    with pytest.raises(Exception):
+        req.get('agents/fetch?id=2')
+    assert errors == []
+    with pytest.raises(ValueError):
+        req.hooks.add('unknown', errors.append)
+
+
+def test_collector_snapshot_and_prometheus():
+    req = client({'id': '1'}, (503, {}), (404, {}), retries=1)
+    metrics = MetricsCollector(buckets=(0.5, 1.0)).attach(req.hooks)
+    req.get('agents/fetch?id=1')
+    with pytest.raises(Exception):
+        req.get('agents/fetch?id=2')
+    req.hooks.emit('wait', {'polls': 3, 'outcome': None})
+
+    snapshot = metrics.snapshot()
+    route = snapshot['requests']['GET agents/fetch']
+    assert (route['requests'], route['errors'], route['retries']) == (2, 1, 1)
+    assert route['status_codes'] == {200: 1, 404: 1}
+    assert snapshot['waits'] == {'finished': 1, 'polls': 3, 'polls_per_wait': 3.0}
+
+    lines = metrics.prometheus().splitlines()
+    assert '# TYPE pbuster_request_duration_seconds histogram' in lines
+    assert 'pbuster_request_duration_seconds_bucket{method="GET",route="agents/fetch",le="0.5"} 2' in lines
+    assert 'pbuster_request_duration_seconds_bucket{method="GET",route="agents/fetch",le="+Inf"} 2' in lines
+    assert 'pbuster_request_duration_seconds_count{method="GET",route="agents/fetch"} 2' in lines
+    assert 'pbuster_requests_total{method="GET",route="agents/fetch",status="200"} 1' in lines
+    assert 'pbuster_requests_total{method="GET",route="agents/fetch",status="404"} 1' in lines
+    assert 'pbuster_request_errors_total{method="GET",route="agents/fetch"} 1' in lines
+    assert 'pbuster_request_retries_total{method="GET",route="agents/fetch"} 1' in lines
+    assert 'pbuster_container_waits_total{outcome="finished"} 1' in lines
+    assert 'pbuster_container_polls_total 3' in lines
+
+    metrics.detach(req.hooks)
+    assert not req.hooks.active
+
+
+def test_opentelemetry_spans():
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.trace import SpanKind, StatusCode
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    req = client({'id': '1'}, (500, {}))
+    OpenTelemetryTracer(provider.get_tracer('test')).attach(req.hooks)
+    req.get('agents/fetch?id=1')
+    with pytest.raises(Exception):
+        req.get('agents/fetch?id=2')
+
+    ok, failed = exporter.get_finished_spans()
+    assert ok.name == 'GET agents/fetch' and ok.kind == SpanKind.CLIENT
+    assert ok.attributes['http.request.method'] == 'GET'
+    assert ok.attributes['url.full'] == ENDPOINT + 'agents/fetch?id=1'
+    assert ok.attributes['http.response.status_code'] == 200 and ok.attributes['pbuster.retries'] == 0
+    assert ok.status.status_code != StatusCode.ERROR
+    assert failed.attributes['http.response.status_code'] == 500
+    assert failed.status.status_code == StatusCode.ERROR
+    assert [event.name for event in failed.events] == ['exception']
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timezone
+from pbuster.container import Container, ContainerPager
+from pbuster.phantombuster import PhantomBuster
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+
+ROUTE = Container.CONTAINERS_PAGE
+
+
+def containers(*ids, status='finished'):
+    """Containers newest first: container `n` is created at `n` seconds and ended at `n + 0.5`."""
+    return [{'id': str(n), 'status': status, 'createdAt': n * 1000, 'endedAt': n * 1000 + 500} for n in ids]
+
+
+def test_cursor_moves_to_the_oldest_end_of_the_page():
+    pager = ContainerPager(ROUTE, 'a1', page_size=3)
+    assert pager.route == 'containers/fetch-all?agentId=a1&limit=3'
+    assert [c['id'] for c in pager.feed({'containers': containers(9, 8, 7)})] == ['9', '8', '7']
+    assert pager.route == 'containers/fetch-all?agentId=a1&limit=3&beforeEndedAt=7500'
+    assert [c['id'] for c in pager.feed(containers(6, 5))] == ['6', '5']  # Short page: the last one
+    assert pager.route is None and pager.pages == 2
+
+
+def test_containers_seen_on_a_previous_page_are_skipped():
+    pager = ContainerPager(ROUTE, 'a1', page_size=3)
+    pager.feed(containers(9, 8, 7))
+    assert [c['id'] for c in pager.feed(containers(7, 6, 5))] == ['6', '5']
+    assert pager.route.endswith('beforeEndedAt=5500')
+    assert pager.feed(containers(6, 5, 4)[:2] + containers(5)) == []  # Nothing new: stop
+    assert pager.route is None
+
+
+def test_since_stops_at_older_containers():
+    pager = ContainerPager(ROUTE, 'a1', since=datetime.fromtimestamp(7, timezone.utc), page_size=5)
+    assert [c['id'] for c in pager.feed(containers(9, 8, 7, 6, 5))] == ['9', '8', '7']
+    assert pager.route is None
+    assert ContainerPager(ROUTE, 'a1', since=7.5).since == 7500
+
+
+def test_status_filters():
+    running = ContainerPager(ROUTE, 'a1', status='running')
+    assert running.route.endswith('&mode=unfinalized')
+    page = containers(3, status='running') + containers(2) + [{'id': '1', 'status': 'running', 'createdAt': 1000}]
+    assert [c['id'] for c in running.feed(page)] == ['3', '1']
+    assert running.route is None
+
+    launching = ContainerPager(ROUTE, 'a1', status='starting')
+    assert 'mode=' not in launching.route  # Filtered client-side only
+
+
+def test_page_without_ended_containers_has_no_cursor():
+    pager = ContainerPager(ROUTE, 'a1', page_size=2)
+    pager.feed([{'id': '2', 'status': 'running', 'createdAt': 2000}, {'id': '1', 'status': 'running', 'createdAt': 1000}])
+    assert pager.route is None
+
+
+def test_iter_fetches_pages_lazily():
+    history = containers(*range(10, 0, -1))
+
+    def handler(method, route, query, body):
+        before = int(query.get('beforeEndedAt', 10 ** 12))
+        return {'containers': [c for c in history if c['endedAt'] < before][:int(query['limit'])]}
+
+    transport = InMemoryTransport(handler)
+    pb = PhantomBuster(api_key='test', transport=transport, retry_policy=RetryPolicy(retries=0), coalesce=False)
+    assert [c['id'] for c in pb.container.iter('a1', page_size=4)] == [str(n) for n in range(10, 0, -1)]
+    assert len(transport.requests) == 3
+
+    transport.requests.clear()
+    iterator = pb.container.iter('a1', page_size=4)
+    assert [next(iterator)['id'] for _ in range(4)] == ['10', '9', '8', '7']
+    assert len(transport.requests) == 1
+
+    transport.requests.clear()
+    assert [c['id'] for c in pb.container.iter('a1', since=6, page_size=4)] == ['10', '9', '8', '7', '6']
+    assert len(transport.requests) == 2
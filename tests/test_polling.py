@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import pytest
+from pbuster.polling import Backoff, Fixed, PollScheduler, WaitTimeout, CancellationToken, WaitCancelled
+
+
+def test_first_polls_due_at_once_and_paced():
+    schedule = PollScheduler(['a', 'b', 'c'], Fixed(60), max_rate=100)
+    due = [schedule.pop_due() for _ in range(3)]
+    assert due == ['a', 'b', 'c'] and schedule.pop_due() is None
+    slots = [schedule.reserve() for _ in range(3)]
+    assert slots[0] == pytest.approx(0, abs=1e-3)
+    assert slots[2] == pytest.approx(0.02, abs=5e-3)
+
+
+def test_no_pacing_without_rate():
+    schedule = PollScheduler(['a', 'b'], Fixed(60), max_rate=None)
+    assert [schedule.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_expedite_rescheduled_container():
+    schedule = PollScheduler(['a', 'b'], Backoff(min_interval=60, max_interval=60, jitter=0))
+    assert schedule.pop_due() == 'a'
+    schedule.reschedule('a')
+    assert schedule.pop_due() == 'b'
+    assert schedule.pop_due() is None
+    schedule.expedite('a')
+    assert schedule.scheduled == 1
+    assert schedule.pop_due() == 'a'
+    assert schedule.pop_due() is None and schedule.scheduled == 0
+
+
+def test_check_timeout_and_cancel():
+    assert pytest.raises(WaitTimeout, PollScheduler(['a'], Fixed(1), timeout=0).check)
+    token = CancellationToken()
+    token.cancel()
+    assert pytest.raises(WaitCancelled, PollScheduler(['a'], Fixed(1), cancel=token).check)
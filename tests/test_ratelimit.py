@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import time
+from email.utils import formatdate
+
+import pytest
+from pbuster.ratelimit import RateLimiter, RateLimitExceeded, TokenBucket
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+from pbuster.utils import RequestHandler
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+def client(limiter, *answers, retries=0):
+    answers = list(answers)
+    transport = InMemoryTransport(lambda method, route, query, body: answers.pop(0))
+    return RequestHandler(ENDPOINT, {}, rate_limiter=limiter, transport=transport, coalesce=False,
+                          retry_policy=RetryPolicy(retries=retries, backoff=0, jitter=0))
+
+
+def test_bucket_spaces_requests_after_the_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert TokenBucket().reserve() == 0  # No rate: never waits
+
+
+def test_remaining_budget_is_spread_over_the_window():
+    limiter = RateLimiter()
+    limiter.update('agents/fetch', 200, {'X-RateLimit-Remaining': '20', 'X-RateLimit-Reset': '10'})
+    assert limiter.bucket.rate == 2.0
+    limiter.update('agents/fetch', 200, {'RateLimit-Remaining': '30', 'RateLimit-Reset': '10'})
+    assert limiter.bucket.rate == 3.0
+
+    capped = RateLimiter(rate=1)
+    capped.update('agents/fetch', 200, {'X-RateLimit-Remaining': '20', 'X-RateLimit-Reset': '10'})
+    assert capped.bucket.rate == 1
+
+
+def test_exhausted_budget_pauses_until_the_reset():
+    limiter = RateLimiter()
+    limiter.update('agents/fetch', 200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(time.time() + 5)})
+    assert limiter.reserve('agents/fetch') == pytest.approx(5, abs=0.1)
+    assert limiter.stats['throttled'] == 1
+
+
+def test_malformed_headers_are_ignored():
+    limiter = RateLimiter(rate=5)
+    limiter.update('agents/fetch', 200, {'X-RateLimit-Remaining': 'many', 'X-RateLimit-Reset': '10'})
+    limiter.update('agents/fetch', 200, {'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': 'soon'})
+    assert limiter.bucket.rate == 5 and limiter.reserve('agents/fetch') == 0
+
+
+def test_delay_headers():
+    assert RateLimiter._seconds('2.5') == 2.5
+    assert RateLimiter._seconds(str(time.time() + 3)) == pytest.approx(3, abs=0.1)
+    assert RateLimiter._seconds(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert RateLimiter._seconds('-1') == 0.0
+    assert RateLimiter._seconds('later') is None and RateLimiter._seconds(None) is None
+
+
+def test_per_route_limits():
+    limiter = RateLimiter(limits={'agents/launch': 1}, burst=1)
+    assert limiter.reserve('agents/launch') == 0
+    assert limiter.reserve('agents/launch') == pytest.approx(1, abs=0.05)
+    assert limiter.reserve('containers/fetch?id=1') == 0
+
+
+def test_responses_adapt_the_limiter():
+    limiter = RateLimiter()
+    req = client(limiter, (200, {'id': '1'}, {'x-ratelimit-remaining': '50', 'x-ratelimit-reset': '10'}))
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert limiter.bucket.rate == 5.0 and limiter.stats['requests'] == 1
+
+
+def test_429_pauses_and_is_retried_after_retry_after():
+    limiter = RateLimiter()
+    req = client(limiter, (429, {'error': 'Too many requests'}, {'Retry-After': '0.2'}), {'id': '1'}, retries=1)
+    started = time.monotonic()
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert time.monotonic() - started >= 0.2
+    assert limiter.stats['rate_limited'] == 1
+
+
+def test_429_raises_rate_limit_exceeded_once_retries_are_exhausted():
+    req = client(RateLimiter(), (429, {'error': 'Too many requests'}, {'Retry-After': '30'}))
+    with pytest.raises(RateLimitExceeded) as error:
+        req.get('agents/fetch?id=1')
+    assert error.value.retry_after == 30 and error.value.args[0]['code'] == 429
+    assert req.rate_limiter.reserve('agents/fetch') == pytest.approx(30, abs=0.1)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import json
+import asyncio
+import pytest
+from pbuster.aio.utils import AsyncRequestHandler
+from pbuster.transport import InMemoryTransport
+from pbuster.utils import RequestHandler
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+def test_get_payload_is_sent_as_query_parameters():
+    transport = InMemoryTransport(lambda method, route, query, body: {'ok': True})
+    req = RequestHandler(ENDPOINT, {}, transport=transport)
+    req.get('containers/fetch-all', {'agentId': '1', 'limit': 10})
+    req.get('containers/fetch-all?agentId=1', {'mode': 'finalized'})
+    req.post('agents/launch', {'id': '1'})
+    (first, second, launch) = transport.requests
+    assert (first['route'], first['query'], first['body']) == ('containers/fetch-all', {'agentId': '1', 'limit': '10'}, None)
+    assert second['query'] == {'agentId': '1', 'mode': 'finalized'} and second['body'] is None
+    assert launch['query'] == {} and launch['body'] == {'id': '1'}
+
+
+def test_async_get_payload_is_sent_as_query_parameters():
+    httpx = pytest.importorskip('httpx')
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'ok': True})
+
+    async def main():
+        req = AsyncRequestHandler(ENDPOINT, {})
+        req._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await req.get('containers/fetch-all', {'agentId': '1', 'limit': 10})
+        await req.post('agents/launch', {'id': '1'})
+        await req.close()
+
+    asyncio.run(main())
+    get, launch = requests
+    assert str(get.url) == ENDPOINT + 'containers/fetch-all?agentId=1&limit=10' and get.content == b''
+    assert json.loads(launch.content) == {'id': '1'}
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import json
+import pytest
+from pbuster.results import ResultObjectParser, iter_records
+
+RECORDS = [-1.5, {'name': 'Zoë', 'score': -25000000000.5e-3, 'tags': ['a', '\\"b"']}, 1e10, -7, 0.25, None, True]
+
+
+def parse(body, split):
+    """Records of `body` fed to the parser in two chunks cut at byte `split`."""
+    parser = ResultObjectParser()
+    return parser.feed(body[:split]) + parser.feed(body[split:]) + parser.close()
+
+
+@pytest.mark.parametrize('body', [
+    json.dumps({'id': '1', 'resultObject': json.dumps(RECORDS)}).encode(),
+    json.dumps({'id': '1', 'resultObject': RECORDS}).encode(),
+    json.dumps({'id': '1', 'resultObject': json.dumps(RECORDS, indent=1)}).encode(),
+], ids=['string', 'raw', 'whitespace'])
+def test_split_at_every_offset(body):
+    for split in range(len(body) + 1):
+        assert parse(body, split) == RECORDS, f'split at {split}: {body[:split]!r}'
+
+
+def test_byte_by_byte():
+    body = json.dumps({'resultObject': json.dumps([-1.5, -25000000000.0, 3])}).encode()
+    assert list(iter_records(body[i:i + 1] for i in range(len(body)))) == [-1.5, -25000000000.0, 3]
+
+
+def test_single_value():
+    body = json.dumps({'resultObject': json.dumps(-12.5)}).encode()
+    for split in range(len(body) + 1):
+        assert parse(body, split) == [-12.5]
+
+
+def test_truncated_body_raises():
+    body = json.dumps({'resultObject': json.dumps([1, 2, 3])}).encode()
+    parser = ResultObjectParser()
+    parser.feed(body[:-6])
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import pytest
+from pbuster.utils import RequestHandler
+from pbuster.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from pbuster.transport import InMemoryTransport
+
+ENDPOINT = 'https://api.phantombuster.com/api/v2/'
+
+
+def handler_for(*answers):
+    """Transport handler answering with `answers` in turn: a response, or an exception to raise."""
+    answers = list(answers)
+
+    def handler(method, route, query, body):
+        answer = answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+    return handler
+
+
+def client(breaker, *answers, retry_policy=None):
+    transport = InMemoryTransport(handler_for(*answers))
+    return RequestHandler(ENDPOINT, {}, circuit_breaker=breaker, retry_policy=retry_policy, transport=transport), transport
+
+
+def test_breaker_opens_and_closes_after_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    req, _ = client(breaker, (500, {}), (500, {}), {'id': '1'})
+    for _ in range(2):
+        with pytest.raises(Exception):
+            req.get('agents/fetch?id=1')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_rejects_while_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    req, transport = client(breaker, (503, {}))
+    with pytest.raises(Exception):
+        req.get('agents/fetch?id=1')
+    with pytest.raises(CircuitOpenError):
+        req.get('agents/fetch?id=1')
+    assert len(transport.requests) == 1
+    assert breaker.stats['rejected'] == 1
+
+
+def test_trial_failing_in_the_client_is_abandoned():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    req, _ = client(breaker, (500, {}), RuntimeError('bug in a hook'), {'id': '1'})
+    with pytest.raises(Exception):
+        req.get('agents/fetch?id=1')
+    with pytest.raises(RuntimeError):
+        req.get('agents/fetch?id=1')  # The trial request
+    # The next request must become the new trial instead of being rejected forever
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rate_limiter_error_abandons_trial():
+    class FailingLimiter(object):
+        def acquire(self, route):
+            raise KeyboardInterrupt
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.failure()
+    req, _ = client(breaker, {'id': '1'})
+    req.rate_limiter = FailingLimiter()
+    with pytest.raises(KeyboardInterrupt):
+        req.get('agents/fetch?id=1')
+    req.rate_limiter = None
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+
+
+def test_retries_idempotent_requests():
+    policy = RetryPolicy(retries=2, backoff=0, jitter=0)
+    req, transport = client(None, (502, {}), (503, {}), {'id': '1'}, retry_policy=policy)
+    assert req.get('agents/fetch?id=1') == {'id': '1'}
+    assert len(transport.requests) == 3
+    assert policy.stats['retries'] == 2
+
+
+def test_client_has_no_circuit_breaker_by_default():
+    from pbuster.phantombuster import PhantomBuster
+
+    transport = InMemoryTransport(lambda method, route, query, body: (500, {'error': 'Internal error'}))
+    pb = PhantomBuster(api_key='test', transport=transport, retry_policy=RetryPolicy(retries=0))
+    assert pb.circuit_breaker is None and 'circuit_breaker' not in pb.stats()
+    for _ in range(10):
+        with pytest.raises(Exception) as error:
+            pb.org.info()
+        assert not isinstance(error.value, CircuitOpenError)
+        assert error.value.args[0]['code'] == 500
+    assert isinstance(PhantomBuster(api_key='test', transport=transport, circuit_breaker=True).circuit_breaker, CircuitBreaker)
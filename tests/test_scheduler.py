@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import threading
+import pytest
+from pbuster.phantombuster import PhantomBuster
+from pbuster.scheduler import LaunchScheduler
+from pbuster.polling import Fixed
+from pbuster.retry import RetryPolicy
+from pbuster.transport import InMemoryTransport
+
+
+class FakeAPI(object):
+    """Organization whose containers finish after `run_polls` polls."""
+
+    def __init__(self, parallelism=2, run_polls=2):
+        self.parallelism = parallelism
+        self.run_polls = run_polls
+        self.launched = []  # agent IDs, in launch order
+        self.polls = {}
+        self.max_running = 0
+        self.usage_error = None
+        self.usage_calls = 0
+        self.failing_agents = set()
+        self.failing_polls = set()
+        self.lock = threading.Lock()
+
+    def running(self):
+        return sum(1 for polls in self.polls.values() if polls < self.run_polls)
+
+    def __call__(self, method, route, query, body):
+        with self.lock:
+            if route == 'orgs/fetch-resources':
+                self.usage_calls += 1
+                if self.usage_error:
+                    return self.usage_error
+                return {'plan': {'parallelism': self.parallelism}, 'current': {'parallelism': self.running()}}
+            if route == 'agents/fetch':
+                return {'id': query['id'], 'scriptId': 'none', 'updatedAt': 1}
+            if route == 'agents/launch':
+                if body['id'] in self.failing_agents:
+                    return 400, {'error': 'Agent is misconfigured'}
+                self.launched.append(body['id'])
+                cid = f'c{len(self.launched)}'
+                self.polls[cid] = 0
+                self.max_running = max(self.max_running, self.running())
+                return {'containerId': cid}
+            if route == 'containers/fetch':
+                if query['id'] in self.failing_polls:
+                    return 404, {'error': 'Not found'}
+                self.polls[query['id']] += 1
+                done = self.polls[query['id']] >= self.run_polls
+                return {'id': query['id'], 'status': 'finished' if done else 'running', 'exitCode': 0 if done else None}
+            return 404, {'error': 'Not found'}
+
+
+def scheduler_for(api, **kwargs):
+    pb = PhantomBuster(api_key='test', transport=InMemoryTransport(api), retry_policy=RetryPolicy(retries=0),
+                       coalesce=False)
+    return LaunchScheduler(pb, polling=Fixed(0.01), **kwargs)
+
+
+def test_dispatch_limited_by_slots():
+    api = FakeAPI(parallelism=2)
+    with scheduler_for(api, usage_ttl=0) as scheduler:
+        futures = [scheduler.submit(str(i)) for i in range(6)]
+        containers = [future.result(timeout=10) for future in futures]
+    assert all(container['status'] == 'finished' for container in containers)
+    assert api.max_running <= 2
+    assert scheduler.stats['launched'] == 6 and scheduler.stats['completed'] == 6
+
+
+def test_priority_order():
+    api = FakeAPI(parallelism=1, run_polls=1)
+    scheduler = scheduler_for(api, usage_ttl=0)
+    scheduler.start = lambda: None  # Queue everything before the first dispatch
+    futures = [scheduler.submit(agent_id, priority=priority) for agent_id, priority in [('low', 0), ('high', 5), ('mid', 1)]]
+    LaunchScheduler.start(scheduler)
+    scheduler.shutdown(wait=True)
+    assert [future.result() for future in futures]
+    assert api.launched == ['high', 'mid', 'low']
+
+
+def test_launch_failure_refreshes_quota():
+    api = FakeAPI(parallelism=2)
+    api.failing_agents.add('bad')
+    with scheduler_for(api, usage_ttl=60) as scheduler:
+        bad = scheduler.submit('bad', priority=1)
+        good = scheduler.submit('good')
+        with pytest.raises(Exception):
+            bad.result(timeout=10)
+        assert good.result(timeout=10)['status'] == 'finished'
+    assert scheduler.stats['failed'] == 1
+    assert scheduler.stats['usage_refreshes'] >= 2  # Forced refresh after the failed launch
+
+
+def test_usage_failure_during_shutdown_fails_queued_launches():
+    api = FakeAPI()
+    api.usage_error = (500, {'error': 'Internal error'})
+    scheduler = scheduler_for(api)
+    scheduler.USAGE_RETRY = 0.01
+    futures = [scheduler.submit(str(i)) for i in range(3)]
+    scheduler.shutdown(wait=True)  # Must not block forever
+    for future in futures:
+        with pytest.raises(Exception):
+            future.result(timeout=0)
+    assert api.launched == []
+
+
+def test_usage_failures_fail_queued_launches():
+    api = FakeAPI()
+    api.usage_error = (503, {'error': 'Unavailable'})
+    scheduler = scheduler_for(api)
+    scheduler.USAGE_RETRY = 0.01
+    future = scheduler.submit('1')
+    with pytest.raises(Exception):
+        future.result(timeout=10)
+    assert scheduler.stats['usage_failures'] >= LaunchScheduler.MAX_USAGE_FAILURES
+    scheduler.shutdown()
+
+
+def test_poll_errors_fail_the_container():
+    api = FakeAPI(parallelism=2)
+    api.failing_polls.add('c1')
+    with scheduler_for(api, usage_ttl=0) as scheduler:
+        lost = scheduler.submit('1', priority=1)
+        with pytest.raises(Exception):
+            lost.result(timeout=10)
+        assert scheduler.submit('2').result(timeout=10)['status'] == 'finished'
+    assert scheduler.running == 0
+    assert scheduler.pb.container.poll_stats['failed'] == 1
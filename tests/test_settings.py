@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+import pytest
+from pbuster.utils import ScriptSettingsRegistry
+
+
+def write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, ns=(mtime, mtime))  # Explicit mtimes: filesystem resolution may hide quick rewrites
+
+
+@pytest.fixture
+def overlay(tmp_path):
+    path = tmp_path / 'scripts.yaml'
+    write(path, "- id: 3112\n  arguments:\n    numberOfAddsPerLaunch: 25\n  required: []\n", 1_000_000_000)
+    return path
+
+
+def test_packaged_defaults():
+    settings = ScriptSettingsRegistry().get(3112)
+    assert settings['name'] == 'LinkedIn Profile Visitor.js'
+    assert settings['required'] == ['spreadsheetUrl']
+    assert settings['arguments']['numberOfAddsPerLaunch'] == 10
+    assert ScriptSettingsRegistry().get('unknown') == {}
+
+
+def test_overlay_merges_arguments_and_replaces_other_keys(overlay):
+    settings = ScriptSettingsRegistry(overlays=[str(overlay)]).get('3112')
+    assert settings['arguments']['numberOfAddsPerLaunch'] == 25
+    assert settings['arguments']['saveImg'] is True  # Default argument kept
+    assert settings['required'] == []
+    assert settings['name'] == 'LinkedIn Profile Visitor.js'
+
+
+def test_later_overlays_win(overlay, tmp_path):
+    second = tmp_path / 'second.yaml'
+    write(second, "- id: 3112\n  arguments:\n    numberOfAddsPerLaunch: 50\n- id: 1\n  name: mine.js\n", 1_000_000_000)
+    registry = ScriptSettingsRegistry(overlays=[str(overlay)])
+    registry.add_overlay(str(second))
+    assert registry.get(3112)['arguments']['numberOfAddsPerLaunch'] == 50
+    assert registry.get(1) == {'id': 1, 'name': 'mine.js', 'arguments': {}}
+
+
+def test_reloads_only_when_a_file_changes(overlay, monkeypatch):
+    registry = ScriptSettingsRegistry(overlays=[str(overlay)], check_interval=0)
+    loads = []
+    load = registry._load
+    monkeypatch.setattr(registry, '_load', lambda: loads.append(1) or load())
+    first = registry.scripts
+    assert registry.scripts is first and len(loads) == 1
+
+    write(overlay, "- id: 3112\n  arguments:\n    numberOfAddsPerLaunch: 30\n", 2_000_000_000)
+    assert registry.get(3112)['arguments']['numberOfAddsPerLaunch'] == 30
+    assert len(loads) == 2
+
+
+def test_mtime_checks_are_throttled(overlay):
+    registry = ScriptSettingsRegistry(overlays=[str(overlay)], check_interval=60)
+    assert registry.get(3112)['arguments']['numberOfAddsPerLaunch'] == 25
+    write(overlay, "- id: 3112\n  arguments:\n    numberOfAddsPerLaunch: 30\n", 2_000_000_000)
+    assert registry.get(3112)['arguments']['numberOfAddsPerLaunch'] == 25  # Not checked again yet
+    registry._checked_at = 0.0
+    assert registry.get(3112)['arguments']['numberOfAddsPerLaunch'] == 30
+
+
+def test_missing_overlay(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ScriptSettingsRegistry(overlays=[str(tmp_path / 'missing.yaml')]).get(3112)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+from pbuster.phantombuster import PhantomBuster
+from pbuster.retry import RetryPolicy
+from pbuster.store import Store
+from pbuster.transport import InMemoryTransport
+
+NOW = int(time.time() * 1000)
+MINUTE = 60 * 1000
+
+
+class FakeAPI(object):
+    """API serving agents, scripts and containers held in memory, newest container first."""
+
+    def __init__(self):
+        self.agents = {'a1': {'id': 'a1', 'name': 'Scraper', 'scriptId': 's1', 'lastEndType': 'finished',
+                              'createdAt': NOW - 60 * MINUTE, 'updatedAt': NOW - 60 * MINUTE}}
+        self.scripts = [{'id': 's1', 'name': 'scraper.js', 'updatedAt': NOW - 60 * MINUTE}]
+        self.containers = {'a1': []}
+        self.transport = InMemoryTransport(self)
+
+    def add(self, agent_id, container_id, created, status='running', ended=None, exit_code=None):
+        container = {'id': container_id, 'status': status, 'createdAt': NOW + created * MINUTE,
+                     'endedAt': NOW + ended * MINUTE if ended is not None else None, 'exitCode': exit_code}
+        self.containers[agent_id].insert(0, container)
+        return container
+
+    def __call__(self, method, route, query, body):
+        if route == 'agents/fetch-all':
+            return list(self.agents.values())
+        if route == 'scripts/fetch-all':
+            return self.scripts
+        if route == 'containers/fetch-all':
+            containers = self.containers.get(query['agentId'], [])
+            if 'beforeEndedAt' in query:
+                containers = [c for c in containers if c['endedAt'] is not None and c['endedAt'] < int(query['beforeEndedAt'])]
+            return {'containers': containers[:int(query.get('limit', 100))]}
+        return 404, {'error': 'Not found'}
+
+
+@pytest.fixture
+def api():
+    return FakeAPI()
+
+
+@pytest.fixture
+def store(api):
+    pb = PhantomBuster(api_key='test', transport=api.transport, retry_policy=RetryPolicy(retries=0), coalesce=False)
+    with Store(pb, path=':memory:') as store:
+        yield store
+
+
+def test_sync_requires_a_client():
+    with Store(path=':memory:') as store:
+        assert store.synced_at is None
+        with pytest.raises(ValueError):
+            store.sync()
+
+
+def test_first_sync_mirrors_everything(api, store):
+    api.add('a1', 'c1', -30, 'finished', -29, 0)
+    api.add('a1', 'c2', -20, 'finished', -18, 1)
+    api.add('a1', 'c3', -10)
+    stats = store.sync()
+    assert (stats['agents'], stats['scripts'], stats['containers']) == (1, 1, 3)
+    assert store.synced_at is not None
+    assert [c['id'] for c in store.containers('a1')] == ['c3', 'c2', 'c1']
+
+
+def test_incremental_sync_fetches_new_and_unfinished_containers_only(api, store):
+    api.add('a1', 'c1', -30, 'finished', -29, 0)
+    running = api.add('a1', 'c2', -20)
+    store.sync()
+
+    running.update(status='finished', endedAt=NOW - 15 * MINUTE, exitCode=0)
+    api.add('a1', 'c3', -5)
+    stats = store.sync()
+    # Unchanged agents and scripts are not rewritten; c1 is older than the oldest running container
+    assert (stats['agents'], stats['scripts'], stats['containers']) == (0, 0, 2)
+    assert [c['id'] for c in store.containers('a1', status='finished')] == ['c2', 'c1']
+    assert [c['id'] for c in store.running_containers()] == ['c3']
+
+    assert store.sync()['containers'] == 1  # Only the one still running
+
+
+def test_deleted_agents_are_dropped_with_their_containers(api, store):
+    api.add('a1', 'c1', -30, 'finished', -29, 0)
+    store.sync()
+    del api.agents['a1']
+    store.sync()
+    assert store.agents() == [] and store.containers() == []
+
+
+def test_queries(api, store):
+    api.agents['a2'] = {'id': 'a2', 'name': 'Mailer', 'scriptId': 's1', 'lastEndType': None,
+                        'createdAt': NOW - 30 * MINUTE, 'updatedAt': NOW - 30 * MINUTE}
+    api.containers['a2'] = []
+    api.add('a1', 'c1', -48 * 60, 'finished', -48 * 60 + 1, 1)  # Two days old
+    api.add('a1', 'c2', -20, 'finished', -18, 1)
+    api.add('a1', 'c3', -10, 'finished', -9, 0)
+    api.add('a2', 'c4', -5, 'finished', -1, 0)
+    store.sync()
+    requests = len(api.transport.requests)
+
+    assert [a['id'] for a in store.agents()] == ['a1', 'a2']
+    assert store.agent('a2')['name'] == 'Mailer' and store.agent('nope') is None
+    assert store.agent_status('a1') == 'finished'
+    assert store.agent_status('a2') == '' and store.agent_status('nope') is None
+    assert [s['id'] for s in store.scripts()] == ['s1']
+    assert [c['id'] for c in store.failed_since(hours=24)] == ['c2']
+    assert [c['id'] for c in store.containers(limit=2)] == ['c4', 'c3']
+    assert [c['id'] for c in store.containers('a1', since=(NOW - 15 * MINUTE) / 1000)] == ['c3']
+    durations = store.average_duration()
+    assert durations['a1'] == pytest.approx((60 + 120 + 60) / 3)
+    assert durations['a2'] == pytest.approx(240)
+    assert len(api.transport.requests) == requests  # Queries never hit the API
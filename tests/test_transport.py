@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import time
+from pbuster.transport import RequestsTransport, InMemoryTransport
+
+
+class FakeResponse(object):
+    status_code = 200
+    reason = 'OK'
+    headers = {}
+
+    def __init__(self):
+        self.closed = False
+
+    def iter_content(self, size):
+        yield b'[]'
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.closed = False
+
+    def request(self, method, url, data=None, headers=None, stream=False):
+        assert not self.closed, 'request on a closed session'
+        return FakeResponse()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport(RequestsTransport):
+    def _new_session(self):
+        return FakeSession()
+
+
+def test_session_not_recycled_while_streaming():
+    transport = FakeTransport(keepalive_timeout=0.01)
+    res = transport.send('get', 'https://example.com/a', stream=True)
+    session = transport._session
+    time.sleep(0.05)
+    transport.send('get', 'https://example.com/b')
+    assert transport._session is session and not session.closed
+    assert list(res.iter_content(1024)) == [b'[]']
+    res.close()
+    time.sleep(0.05)
+    transport.send('get', 'https://example.com/c')
+    assert session.closed and transport._session is not session
+
+
+def test_in_memory_transport():
+    transport = InMemoryTransport(lambda method, route, query, body: (201, {'route': route, 'query': query}))
+    res = transport.send('post', 'https://api.phantombuster.com/api/v2/agents/launch?x=1', body=b'{"id": "1"}')
+    assert res.status_code == 201 and res.reason == 'Created'
+    assert transport.requests[0]['body'] == {'id': '1'}
+    assert res.headers.get('content-type') == 'application/json'
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import hmac
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import pytest
+from pbuster.webhook import WebhookReceiver, Completion, payload, simulate
+from pbuster.utils import RequestHandler
+from pbuster.container import Container
+from pbuster.polling import Backoff, CancellationToken, WaitCancelled
+from pbuster.transport import InMemoryTransport
+
+
+def api(finished):
+    """Transport answering `containers/fetch` with a container that finished once `finished` is set."""
+    def handler(method, route, query, body):
+        done = finished.is_set()
+        return {'id': query['id'], 'status': 'finished' if done else 'running', 'exitCode': 0 if done else None}
+    return InMemoryTransport(handler)
+
+
+def container_client(receiver, finished):
+    transport = api(finished)
+    req = RequestHandler('https://api.phantombuster.com/api/v2/', {}, transport=transport)
+    container = Container(req, polling=Backoff(min_interval=0.01, max_interval=0.01), webhook=receiver)
+    return container, transport
+
+
+def finish_later(receiver, finished, container_id, delay=0.2):
+    def finish():
+        finished.set()
+        receiver.receive(payload(container_id))
+    timer = threading.Timer(delay, finish)
+    timer.start()
+    return timer
+
+
+def test_signature_and_token():
+    receiver = WebhookReceiver(secret='k', token='t')
+    body = json.dumps(payload('1')).encode()
+    signature = hmac.new(b'k', body, hashlib.sha256).hexdigest()
+    assert receiver.handle(body, {'X-Phantombuster-Signature': signature}, {'token': 't'})[0] == 200
+    assert receiver.handle(body, {'x-phantombuster-signature': 'sha256=' + signature}, {'token': 't'})[0] == 200
+    assert receiver.handle(body, {'X-Phantombuster-Signature': signature}, {})[0] == 401
+    assert receiver.handle(body, {'X-Phantombuster-Signature': 'bad'}, {'token': 't'})[0] == 401
+    assert receiver.handle(b'[]', {'X-Phantombuster-Signature': hmac.new(b'k', b'[]', hashlib.sha256).hexdigest()},
+                           {'token': 't'})[0] == 400
+    assert receiver.stats == {'received': 2, 'rejected': 3, 'resolved': 0}
+
+
+def test_expect_after_arrival():
+    receiver = WebhookReceiver()
+    receiver.receive(payload('42', exit_code=1))
+    completion = receiver.expect(42)
+    assert completion.done and completion.payload['exitCode'] == 1
+
+
+def test_completion_wait_is_cancellable():
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+    started = time.monotonic()
+    assert Completion('1').wait(5, token) is False
+    assert time.monotonic() - started < 1
+
+
+def test_wait_wakes_up_on_webhook():
+    receiver, finished = WebhookReceiver(), threading.Event()
+    container, transport = container_client(receiver, finished)
+    finish_later(receiver, finished, 'c1')
+    started = time.monotonic()
+    assert container.wait('c1', timeout=10)['status'] == 'finished'
+    # Without the webhook, the next safety-net poll would be WEBHOOK_WAIT_TIME seconds away
+    assert time.monotonic() - started < 2
+    assert len(transport.requests) == 2
+    assert receiver._pending == {}
+
+
+def test_wait_cancelled_while_waiting_for_webhook():
+    receiver, finished = WebhookReceiver(), threading.Event()
+    container, _ = container_client(receiver, finished)
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel).start()
+    with pytest.raises(WaitCancelled):
+        container.wait('c1', cancel=token)
+    assert receiver._pending == {}
+
+
+def test_lost_webhook_falls_back_to_polling():
+    receiver, finished = WebhookReceiver(), threading.Event()
+    container, transport = container_client(receiver, finished)
+    container.webhook_polling = Backoff(min_interval=0.05, max_interval=0.05)
+    threading.Timer(0.2, finished.set).start()
+    assert container.wait('c1', timeout=10)['status'] == 'finished'
+    assert len(transport.requests) > 2
+
+
+def test_wait_many_wakes_up_on_webhooks():
+    receiver, finished = WebhookReceiver(), threading.Event()
+    container, transport = container_client(receiver, finished)
+    ids = [f'c{i}' for i in range(5)]
+
+    def finish():
+        finished.set()
+        for cid in ids:
+            receiver.receive(payload(cid))
+
+    threading.Timer(0.2, finish).start()
+    started = time.monotonic()
+    assert sorted(container.wait_many(ids, timeout=10)) == ids
+    assert time.monotonic() - started < 2
+    assert len(transport.requests) == 10
+
+
+def test_wait_async_and_simulate():
+    with WebhookReceiver(secret='k') as receiver:
+        completion = receiver.expect('c1')
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            sent = loop.run_in_executor(None, lambda: (time.sleep(0.1), simulate(receiver.url, 'c1', secret='k'))[1])
+            assert await completion.wait_async(5)
+            return await sent
+
+        assert asyncio.run(main()) == 200
+        assert simulate(receiver.url, 'c2') == 401
+    assert completion.payload['containerId'] == 'c1'